@@ -1,7 +1,11 @@
+from collections import Counter
 from datetime import datetime
 from enum import Enum
-import dateutil.parser
+import logging
+import threading
+from types import MappingProxyType
 
+from august.dateparse import parse_datetime
 from august.lock import LockDoorStatus, LockStatus
 
 ACTION_LOCK_ONETOUCHLOCK = "onetouchlock"
@@ -35,6 +39,8 @@ ACTIVITY_ACTION_STATES = {
     ACTION_DOOR_CLOSED: LockDoorStatus.CLOSED,
 }
 
+_LOGGER = logging.getLogger(__name__)
+
 
 def epoch_to_datetime(epoch):
     return datetime.fromtimestamp(int(epoch) / 1000.0)
@@ -48,172 +54,306 @@ class ActivityType(Enum):
     DOOR_OPERATION = "door_operation"
 
 
+class decoded_property:
+    """A read-only property decoded from the raw activity dict.
+
+    The decoder receives the raw dict and its result is stored in the slot
+    named after the property with a leading underscore. Eager activities
+    run every decoder up front; lazy activities run them on first access.
+    """
+
+    def __init__(self, decode):
+        self._decode = decode
+        self._member = None
+        self.__doc__ = decode.__doc__
+
+    def __set_name__(self, owner, name):
+        self._member = getattr(owner, "_" + name)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return self._member.__get__(instance, owner)
+        except AttributeError:
+            return self.decode(instance, instance._data)
+
+    def decode(self, instance, data):
+        value = self._decode(instance, data)
+        self._member.__set__(instance, value)
+        return value
+
+
 class Activity:
-    def __init__(self, activity_type, data):
+    __slots__ = (
+        "_data",
+        "_activity_type",
+        "_activity_id",
+        "_house_id",
+        "_activity_start_epoch_ms",
+        "_action",
+        "_device_id",
+        "_device_name",
+        "_device_type",
+    )
+
+    _decoded_properties = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        decoded = {}
+        for klass in reversed(cls.__mro__):
+            for name, attr in vars(klass).items():
+                if isinstance(attr, decoded_property):
+                    decoded[name] = attr
+                elif name in decoded:
+                    del decoded[name]
+        cls._decoded_properties = tuple(decoded.values())
+
+    def __init__(self, activity_type, data, lazy=False):
+        """Create an activity from a dict returned by the api.
+
+        With lazy=True a reference to data is kept and every field is
+        decoded the first time it is read.
+        """
         self._activity_type = activity_type
+        self._data = data
 
-        entities = data.get("entities", {})
-        self._activity_id = entities.get("activity")
-        self._house_id = entities.get("house")
-
-        self._activity_time = epoch_to_datetime(data.get("dateTime"))
-        self._action = data.get("action")
-        self._device_id = data.get("deviceID")
-        self._device_name = data.get("deviceName")
-        self._device_type = data.get("deviceType")
+        if not lazy:
+            for decoded in self._decoded_properties:
+                decoded.decode(self, data)
+            self._data = None
 
     @property
     def activity_type(self):
         return self._activity_type
 
-    @property
-    def activity_id(self):
-        return self._activity_id
+    @decoded_property
+    def activity_id(self, data):
+        return data.get("entities", {}).get("activity")
+
+    @decoded_property
+    def house_id(self, data):
+        return data.get("entities", {}).get("house")
+
+    @decoded_property
+    def activity_start_epoch_ms(self, data):
+        return int(data.get("dateTime"))
 
     @property
-    def house_id(self):
-        return self._house_id
+    def activity_end_epoch_ms(self):
+        return self.activity_start_epoch_ms
 
     @property
     def activity_start_time(self):
-        return self._activity_time
+        return epoch_to_datetime(self.activity_start_epoch_ms)
 
     @property
     def activity_end_time(self):
-        return self._activity_time
+        return epoch_to_datetime(self.activity_end_epoch_ms)
 
-    @property
-    def action(self):
-        return self._action
+    @decoded_property
+    def action(self, data):
+        return data.get("action")
 
-    @property
-    def device_id(self):
-        return self._device_id
+    @decoded_property
+    def device_id(self, data):
+        return data.get("deviceID")
 
-    @property
-    def device_name(self):
-        return self._device_name
+    @decoded_property
+    def device_name(self, data):
+        return data.get("deviceName")
 
-    @property
-    def device_type(self):
-        return self._device_type
+    @decoded_property
+    def device_type(self, data):
+        return data.get("deviceType")
 
 
 class DoorbellMotionActivity(Activity):
-    def __init__(self, data):
-        super().__init__(ActivityType.DOORBELL_MOTION, data)
+    __slots__ = ("_image_url", "_image_created_at_datetime")
 
-        image = data.get("info", {}).get("image")
-        self._image_url = None if image is None else image.get("secure_url")
-        self._image_created_at_datetime = None
-        if image is not None and "created_at" in image:
-            self._image_created_at_datetime = dateutil.parser.parse(image["created_at"])
+    def __init__(self, data, lazy=False):
+        super().__init__(ActivityType.DOORBELL_MOTION, data, lazy)
 
-    @property
-    def image_url(self):
-        return self._image_url
+    @decoded_property
+    def image_url(self, data):
+        image = data.get("info", {}).get("image")
+        return None if image is None else image.get("secure_url")
 
-    @property
-    def image_created_at_datetime(self):
-        return self._image_created_at_datetime
+    @decoded_property
+    def image_created_at_datetime(self, data):
+        image = data.get("info", {}).get("image")
+        if image is None or "created_at" not in image:
+            return None
+        return parse_datetime(image["created_at"])
 
 
 class DoorbellDingActivity(Activity):
-    def __init__(self, data):
-        super().__init__(ActivityType.DOORBELL_DING, data)
+    __slots__ = ("_activity_end_epoch_ms", "_image_url")
 
-        info = data.get("info", {})
-        self._activity_start_time = epoch_to_datetime(info.get("started"))
-        self._activity_end_time = epoch_to_datetime(info.get("ended"))
-        self._image_url = info.get("image")
+    def __init__(self, data, lazy=False):
+        super().__init__(ActivityType.DOORBELL_DING, data, lazy)
 
-    @property
-    def image_url(self):
-        return self._image_url
+    @decoded_property
+    def image_url(self, data):
+        return data.get("info", {}).get("image")
 
-    @property
-    def activity_start_time(self):
-        return self._activity_start_time
+    @decoded_property
+    def activity_start_epoch_ms(self, data):
+        return int(data.get("info", {}).get("started"))
 
-    @property
-    def activity_end_time(self):
-        return self._activity_end_time
+    @decoded_property
+    def activity_end_epoch_ms(self, data):
+        return int(data.get("info", {}).get("ended"))
 
 
 class DoorbellViewActivity(Activity):
-    def __init__(self, data):
-        super().__init__(ActivityType.DOORBELL_VIEW, data)
+    __slots__ = ("_activity_end_epoch_ms", "_image_url")
 
-        info = data.get("info", {})
-        self._activity_start_time = epoch_to_datetime(info.get("started"))
-        self._activity_end_time = epoch_to_datetime(info.get("ended"))
-        self._image_url = info.get("image")
+    def __init__(self, data, lazy=False):
+        super().__init__(ActivityType.DOORBELL_VIEW, data, lazy)
 
-    @property
-    def image_url(self):
-        return self._image_url
+    @decoded_property
+    def image_url(self, data):
+        return data.get("info", {}).get("image")
 
-    @property
-    def activity_start_time(self):
-        return self._activity_start_time
+    @decoded_property
+    def activity_start_epoch_ms(self, data):
+        return int(data.get("info", {}).get("started"))
 
-    @property
-    def activity_end_time(self):
-        return self._activity_end_time
+    @decoded_property
+    def activity_end_epoch_ms(self, data):
+        return int(data.get("info", {}).get("ended"))
 
 
 class LockOperationActivity(Activity):
-    def __init__(self, data):
-        super().__init__(ActivityType.LOCK_OPERATION, data)
-
+    __slots__ = (
+        "_operated_remote",
+        "_operated_keypad",
+        "_operated_autorelock",
+        "_operated_by",
+        "_operator_image_url",
+        "_operator_thumbnail_url",
+    )
+
+    def __init__(self, data, lazy=False):
+        super().__init__(ActivityType.LOCK_OPERATION, data, lazy)
+
+    @decoded_property
+    def operated_by(self, data):
         calling_user = data.get("callingUser", {})
-
-        info = data.get("info", {})
-        self._operated_remote = info.get("remote", False)
-        self._operated_keypad = info.get("keypad", False)
-        self._operated_autorelock = calling_user.get("UserID") == "automaticrelock"
-        self._operated_by = "{} {}".format(
+        return "{} {}".format(
             calling_user.get("FirstName"), calling_user.get("LastName"),
         )
 
-        image_info = calling_user.get("imageInfo", {})
-        self._operator_image_url = image_info.get("original", {}).get(
-            "secure_url", None
-        )
-        self._operator_thumbnail_url = image_info.get("thumbnail", {}).get(
-            "secure_url", None
-        )
-
-    @property
-    def operated_by(self):
-        return self._operated_by
-
-    @property
-    def operated_remote(self):
+    @decoded_property
+    def operated_remote(self, data):
         """Operation was remote."""
-        return self._operated_remote
+        return data.get("info", {}).get("remote", False)
 
-    @property
-    def operated_keypad(self):
+    @decoded_property
+    def operated_keypad(self, data):
         """Operation used keypad."""
-        return self._operated_keypad
+        return data.get("info", {}).get("keypad", False)
 
-    @property
-    def operated_autorelock(self):
+    @decoded_property
+    def operated_autorelock(self, data):
         """Operation done by automatic relock."""
-        return self._operated_autorelock
+        return data.get("callingUser", {}).get("UserID") == "automaticrelock"
 
-    @property
-    def operator_image_url(self):
+    @decoded_property
+    def operator_image_url(self, data):
         """URL to the image of the lock operator."""
-        return self._operator_image_url
+        image_info = data.get("callingUser", {}).get("imageInfo", {})
+        return image_info.get("original", {}).get("secure_url", None)
 
-    @property
-    def operator_thumbnail_url(self):
+    @decoded_property
+    def operator_thumbnail_url(self, data):
         """URL to the thumbnail of the lock operator."""
-        return self._operator_thumbnail_url
+        image_info = data.get("callingUser", {}).get("imageInfo", {})
+        return image_info.get("thumbnail", {}).get("secure_url", None)
 
 
 class DoorOperationActivity(Activity):
-    def __init__(self, data):
-        super().__init__(ActivityType.DOOR_OPERATION, data)
+    __slots__ = ()
+
+    def __init__(self, data, lazy=False):
+        super().__init__(ActivityType.DOOR_OPERATION, data, lazy)
+
+
+# Maps an action to the Activity subclass it is decoded as. The mapping is
+# never mutated, registering an action swaps in a new one.
+_ACTIVITY_TYPES = MappingProxyType(
+    {
+        **dict.fromkeys(ACTIVITY_ACTIONS_DOORBELL_DING, DoorbellDingActivity),
+        **dict.fromkeys(ACTIVITY_ACTIONS_DOORBELL_MOTION, DoorbellMotionActivity),
+        **dict.fromkeys(ACTIVITY_ACTIONS_DOORBELL_VIEW, DoorbellViewActivity),
+        **dict.fromkeys(ACTIVITY_ACTIONS_LOCK_OPERATION, LockOperationActivity),
+        **dict.fromkeys(ACTIVITY_ACTIONS_DOOR_OPERATION, DoorOperationActivity),
+    }
+)
+_ACTIVITY_TYPES_LOCK = threading.Lock()
+_UNKNOWN_ACTIONS = Counter()
+
+
+def activity_types():
+    """Return a read-only mapping of action to Activity subclass."""
+    return _ACTIVITY_TYPES
+
+
+def unknown_actions():
+    """Return how often each unregistered action has been dropped."""
+    return dict(_UNKNOWN_ACTIONS)
+
+
+def register_activity_type(action, activity_class, replace=False):
+    """Decode activities with the given action as activity_class.
+
+    activity_class must be an Activity subclass taking the raw activity
+    dict and the lazy flag. Registering an action that already has a
+    different class raises ValueError unless replace is True.
+    """
+    global _ACTIVITY_TYPES
+
+    if not isinstance(activity_class, type) or not issubclass(
+        activity_class, Activity
+    ):
+        raise TypeError("{!r} is not an Activity subclass".format(activity_class))
+
+    with _ACTIVITY_TYPES_LOCK:
+        registered = _ACTIVITY_TYPES.get(action)
+        if registered not in (None, activity_class) and not replace:
+            raise ValueError(
+                "Action {} is already registered as {}".format(
+                    action, registered.__name__
+                )
+            )
+        types_by_action = dict(_ACTIVITY_TYPES)
+        types_by_action[action] = activity_class
+        _ACTIVITY_TYPES = MappingProxyType(types_by_action)
+        _UNKNOWN_ACTIONS.pop(action, None)
+
+
+def unregister_activity_type(action):
+    """Stop decoding activities with the given action."""
+    global _ACTIVITY_TYPES
+
+    with _ACTIVITY_TYPES_LOCK:
+        types_by_action = dict(_ACTIVITY_TYPES)
+        del types_by_action[action]
+        _ACTIVITY_TYPES = MappingProxyType(types_by_action)
+
+
+def activity_from_dict(activity_dict, lazy=False):
+    """Create an activity from a dict returned by the api.
+
+    None is returned for actions that are not registered.
+    """
+    action = activity_dict.get("action")
+    activity_class = _ACTIVITY_TYPES.get(action)
+    if activity_class is None:
+        if action not in _UNKNOWN_ACTIONS:
+            _LOGGER.debug("Dropping activity with unknown action: %s", action)
+        _UNKNOWN_ACTIONS[action] += 1
+        return None
+    return activity_class(activity_dict, lazy)
@@ -0,0 +1,350 @@
+"""Columnar storage for long activity histories."""
+
+from array import array
+from datetime import datetime
+
+from august.activity import activity_from_dict
+from august.dateparse import datetime_to_epoch_ms
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+# Marks a missing info.started or info.ended in the int64 columns
+_MISSING_EPOCH = -(1 << 63)
+
+# Bits of the flags column
+_REMOTE = 1
+_KEYPAD = 2
+_IMAGE_DICT = 4
+
+
+def _to_epoch_ms(value):
+    if isinstance(value, datetime):
+        return datetime_to_epoch_ms(value)
+    return int(value)
+
+
+def _epoch_column(value):
+    return _MISSING_EPOCH if value is None else int(value)
+
+
+def _without_none(**values):
+    return {key: value for key, value in values.items() if value is not None}
+
+
+def _user_row(calling_user):
+    """Return the fields of a callingUser the activities decode, or None."""
+    if calling_user is None:
+        return None
+    image_info = calling_user.get("imageInfo", {})
+    return (
+        calling_user.get("UserID"),
+        calling_user.get("FirstName"),
+        calling_user.get("LastName"),
+        image_info.get("original", {}).get("secure_url"),
+        image_info.get("thumbnail", {}).get("secure_url"),
+    )
+
+
+def _user_dict(user_row):
+    user_id, first_name, last_name, image_url, thumbnail_url = user_row
+    calling_user = _without_none(
+        UserID=user_id, FirstName=first_name, LastName=last_name
+    )
+    image_info = {}
+    if image_url is not None:
+        image_info["original"] = {"secure_url": image_url}
+    if thumbnail_url is not None:
+        image_info["thumbnail"] = {"secure_url": thumbnail_url}
+    if image_info:
+        calling_user["imageInfo"] = image_info
+    return calling_user
+
+
+class _StringTable:
+    """Interns strings, or other hashable values, to small integer codes."""
+
+    __slots__ = ("_codes", "_strings")
+
+    def __init__(self):
+        self._codes = {}
+        self._strings = []
+
+    def __len__(self):
+        return len(self._strings)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def lookup(self, value):
+        """Return the code of value, or -1 if it was never interned."""
+        return self._codes.get(value, -1)
+
+    def __getitem__(self, code):
+        return self._strings[code]
+
+
+class ActivityLog:
+    """Activities stored column-wise.
+
+    Timestamps are the epoch milliseconds of the activity dateTime. The
+    action, device type, device id and house id of every activity are
+    stored as codes into string tables, so scanning months of history
+    compares integers only. Activity objects are created on demand from
+    the columns, which hold every field the Activity classes decode: the
+    device name, info.started and info.ended, the image, the calling user
+    and the remote and keypad flags. With keep_raw the raw json is kept
+    as well and activities are created from it instead.
+
+    Filters run on NumPy when it is installed.
+    """
+
+    _COLUMNS = (
+        "_timestamps",
+        "_actions",
+        "_device_types",
+        "_device_ids",
+        "_device_names",
+        "_house_ids",
+        "_started",
+        "_ended",
+        "_flags",
+        "_calling_users",
+        "_activity_ids",
+        "_image_urls",
+        "_image_created_ats",
+    )
+
+    def __init__(self, keep_raw=False):
+        self._keep_raw = keep_raw
+        self._timestamps = array("q")
+        self._actions = array("i")
+        self._device_types = array("i")
+        self._device_ids = array("i")
+        self._device_names = array("i")
+        self._house_ids = array("i")
+        self._started = array("q")
+        self._ended = array("q")
+        self._flags = array("B")
+        self._calling_users = array("i")
+        self._activity_ids = []
+        self._image_urls = []
+        self._image_created_ats = []
+        self._raw = [] if keep_raw else None
+        self._action_table = _StringTable()
+        self._device_type_table = _StringTable()
+        self._device_table = _StringTable()
+        self._device_name_table = _StringTable()
+        self._house_table = _StringTable()
+        # Interns (UserID, FirstName, LastName, image url, thumbnail url)
+        self._user_table = _StringTable()
+
+    @classmethod
+    def from_json(cls, json_list, keep_raw=False):
+        """Build a log from the json returned by the house activities api."""
+        log = cls(keep_raw)
+        log.extend(json_list)
+        return log
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def __iter__(self):
+        return (self.activity(row) for row in range(len(self)))
+
+    @property
+    def timestamps(self):
+        """Epoch milliseconds of every activity."""
+        return self._timestamps
+
+    def append(self, activity_dict):
+        entities = activity_dict.get("entities", {})
+        info = activity_dict.get("info", {})
+        self._timestamps.append(int(activity_dict.get("dateTime") or 0))
+        self._actions.append(self._action_table.code(activity_dict.get("action")))
+        self._device_types.append(
+            self._device_type_table.code(activity_dict.get("deviceType"))
+        )
+        self._device_ids.append(self._device_table.code(activity_dict.get("deviceID")))
+        self._device_names.append(
+            self._device_name_table.code(activity_dict.get("deviceName"))
+        )
+        self._house_ids.append(self._house_table.code(entities.get("house")))
+        self._activity_ids.append(entities.get("activity"))
+        self._started.append(_epoch_column(info.get("started")))
+        self._ended.append(_epoch_column(info.get("ended")))
+
+        flags = 0
+        if info.get("remote"):
+            flags |= _REMOTE
+        if info.get("keypad"):
+            flags |= _KEYPAD
+        image = info.get("image")
+        if isinstance(image, dict):
+            flags |= _IMAGE_DICT
+            self._image_urls.append(image.get("secure_url"))
+            self._image_created_ats.append(image.get("created_at"))
+        else:
+            self._image_urls.append(image)
+            self._image_created_ats.append(None)
+        self._flags.append(flags)
+        self._calling_users.append(
+            self._user_table.code(_user_row(activity_dict.get("callingUser")))
+        )
+        if self._keep_raw:
+            self._raw.append(activity_dict)
+
+    def extend(self, json_list):
+        for activity_dict in json_list:
+            self.append(activity_dict)
+
+    def action(self, row):
+        return self._action_table[self._actions[row]]
+
+    def device_id(self, row):
+        return self._device_table[self._device_ids[row]]
+
+    def device_ids(self):
+        """Return the distinct device ids in the log."""
+        return [self._device_table[code] for code in sorted(set(self._device_ids))]
+
+    def rows(self, device_id=None, action=None, start=None, end=None):
+        """Return the rows matching all given filters.
+
+        start is inclusive and end exclusive, either may be a datetime or
+        epoch milliseconds. action may be a single action or a collection
+        of actions.
+        """
+        device_code = None
+        if device_id is not None:
+            device_code = self._device_table.lookup(device_id)
+            if device_code < 0:
+                return []
+
+        action_codes = None
+        if action is not None:
+            actions = [action] if isinstance(action, str) else action
+            action_codes = {self._action_table.lookup(name) for name in actions} - {-1}
+            if not action_codes:
+                return []
+
+        start = None if start is None else _to_epoch_ms(start)
+        end = None if end is None else _to_epoch_ms(end)
+
+        if numpy is not None:
+            return self._numpy_rows(device_code, action_codes, start, end)
+
+        timestamps = self._timestamps
+        device_ids = self._device_ids
+        actions = self._actions
+        return [
+            row
+            for row in range(len(timestamps))
+            if (device_code is None or device_ids[row] == device_code)
+            and (action_codes is None or actions[row] in action_codes)
+            and (start is None or timestamps[row] >= start)
+            and (end is None or timestamps[row] < end)
+        ]
+
+    def _numpy_rows(self, device_code, action_codes, start, end):
+        if not self:
+            return []
+        mask = numpy.ones(len(self), dtype=bool)
+        if device_code is not None:
+            mask &= numpy.frombuffer(self._device_ids, dtype="i") == device_code
+        if action_codes is not None:
+            mask &= numpy.isin(
+                numpy.frombuffer(self._actions, dtype="i"), list(action_codes)
+            )
+        if start is not None or end is not None:
+            timestamps = numpy.frombuffer(self._timestamps, dtype="q")
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps < end
+        return numpy.flatnonzero(mask).tolist()
+
+    def filter(self, device_id=None, action=None, start=None, end=None):
+        """Return a new log with the activities matching all given filters."""
+        return self.take(self.rows(device_id, action, start, end))
+
+    def take(self, rows):
+        """Return a new log with the given rows."""
+        log = ActivityLog(self._keep_raw)
+        # The string tables only grow, so the codes stay valid when shared
+        log._action_table = self._action_table
+        log._device_type_table = self._device_type_table
+        log._device_table = self._device_table
+        log._device_name_table = self._device_name_table
+        log._house_table = self._house_table
+        log._user_table = self._user_table
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            getattr(log, name).extend(column[row] for row in rows)
+        if self._keep_raw:
+            log._raw = [self._raw[row] for row in rows]
+        return log
+
+    def activity_dict(self, row):
+        """Return the json of the activity in the given row."""
+        if self._keep_raw:
+            return self._raw[row]
+        info = {}
+        if self._started[row] != _MISSING_EPOCH:
+            info["started"] = self._started[row]
+        if self._ended[row] != _MISSING_EPOCH:
+            info["ended"] = self._ended[row]
+        flags = self._flags[row]
+        if flags & _REMOTE:
+            info["remote"] = True
+        if flags & _KEYPAD:
+            info["keypad"] = True
+        if flags & _IMAGE_DICT:
+            info["image"] = _without_none(
+                secure_url=self._image_urls[row],
+                created_at=self._image_created_ats[row],
+            )
+        elif self._image_urls[row] is not None:
+            info["image"] = self._image_urls[row]
+
+        activity_dict = {
+            "action": self._action_table[self._actions[row]],
+            "dateTime": self._timestamps[row],
+            "deviceID": self._device_table[self._device_ids[row]],
+            "deviceName": self._device_name_table[self._device_names[row]],
+            "deviceType": self._device_type_table[self._device_types[row]],
+            "entities": {
+                "activity": self._activity_ids[row],
+                "house": self._house_table[self._house_ids[row]],
+            },
+            "info": info,
+        }
+        calling_user = self._user_table[self._calling_users[row]]
+        if calling_user is not None:
+            activity_dict["callingUser"] = _user_dict(calling_user)
+        return activity_dict
+
+    def activity(self, row, lazy=False):
+        """Create the Activity of the given row.
+
+        None is returned when the action has no registered activity type.
+        """
+        return activity_from_dict(self.activity_dict(row), lazy)
+
+    def activities(self, rows=None, lazy=False):
+        """Create the Activity objects of the given rows, or of all rows."""
+        if rows is None:
+            rows = range(len(self))
+        activities = []
+        for row in rows:
+            activity = self.activity(row, lazy)
+            if activity is not None:
+                activities.append(activity)
+        return activities
@@ -0,0 +1,200 @@
+"""Poll house activities incrementally, returning only new activities."""
+
+from collections import OrderedDict
+import logging
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+ACTIVITY_POLL_LIMIT = 8
+# The largest limit a gap is paged back with
+ACTIVITY_POLL_MAX_LIMIT = 128
+# The number of activity keys remembered per house
+ACTIVITY_SEEN_MAX_SIZE = 512
+
+
+def _activity_key(epoch_ms, activity):
+    return (activity.activity_id, epoch_ms, activity.action, activity.device_id)
+
+
+def _dated_activities(log, lazy):
+    """Return (dateTime epoch ms, Activity) pairs of the known actions in log.
+
+    The pollers order and de-duplicate by the dateTime the server logged
+    the activity at, which for dings and views differs from the
+    activity_start_epoch_ms taken from info.started.
+    """
+    timestamps = log.timestamps
+    dated = []
+    for row in range(len(log)):
+        activity = log.activity(row, lazy)
+        if activity is not None:
+            dated.append((timestamps[row], activity))
+    return dated
+
+
+class _HouseCursor:
+    """The high-water mark and recently seen activities of a house.
+
+    All times are the dateTime of the activities in epoch ms. Activities
+    logged at or before floor_epoch_ms are never new: it starts just
+    below the first page ever polled, since older activities predate the
+    poller, and moves up to the newest time of any key that aged out of
+    the seen-set. Every activity returned before that was logged later is
+    still in the seen-set.
+    """
+
+    __slots__ = ("epoch_ms", "activity_id", "seen", "floor_epoch_ms")
+
+    def __init__(self):
+        self.epoch_ms = None
+        self.activity_id = None
+        self.seen = OrderedDict()
+        self.floor_epoch_ms = None
+
+
+class ActivityPollerCommon:
+    """Cursor and de-duplication bookkeeping shared by the pollers."""
+
+    def __init__(
+        self,
+        limit=ACTIVITY_POLL_LIMIT,
+        max_limit=ACTIVITY_POLL_MAX_LIMIT,
+        seen_size=ACTIVITY_SEEN_MAX_SIZE,
+    ):
+        if max_limit < limit:
+            raise ValueError("max_limit must not be smaller than limit")
+        self._limit = limit
+        self._max_limit = max_limit
+        # Must hold at least one full page, or a page could look new again
+        self._seen_size = max(seen_size, max_limit)
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self._gaps = 0
+        self._lost = 0
+
+    @property
+    def gaps(self):
+        """Number of polls that had to page back to close a gap."""
+        return self._gaps
+
+    @property
+    def lost(self):
+        """Number of gaps that could not be closed within max_limit."""
+        return self._lost
+
+    def cursor(self, house_id):
+        """Return the (dateTime epoch ms, activity id) high-water mark of a house."""
+        cursor = self._cursors.get(house_id)
+        if cursor is None or cursor.epoch_ms is None:
+            return None
+        return cursor.epoch_ms, cursor.activity_id
+
+    def reset(self, house_id=None):
+        """Forget the cursor of a house, or of all houses."""
+        with self._lock:
+            if house_id is None:
+                self._cursors.clear()
+            else:
+                self._cursors.pop(house_id, None)
+
+    def _next_limit(self, house_id, log, dated, limit):
+        """Return the limit to page back with, or None if there is no gap.
+
+        There may be a gap when the server returned a full page that does
+        not reach back to the previous poll of the house. The page length
+        is taken from the ActivityLog, which also holds the actions that
+        have no registered activity type.
+        """
+        cursor = self._cursors.get(house_id)
+        if cursor is None or cursor.epoch_ms is None or len(log) < limit:
+            return None
+        if min(log.timestamps) <= cursor.epoch_ms:
+            return None
+        for epoch_ms, activity in dated:
+            if _activity_key(epoch_ms, activity) in cursor.seen:
+                return None
+
+        with self._lock:
+            if limit >= self._max_limit:
+                self._lost += 1
+                _LOGGER.warning(
+                    "More than %s activities of house %s are new, some may be lost",
+                    limit,
+                    house_id,
+                )
+                return None
+            self._gaps += 1
+        return min(limit * 2, self._max_limit)
+
+    def _new_activities(self, house_id, log, dated):
+        """Return the activities not returned before and advance the cursor."""
+        with self._lock:
+            cursor = self._cursors.get(house_id)
+            if cursor is None:
+                cursor = self._cursors[house_id] = _HouseCursor()
+            if cursor.floor_epoch_ms is None and len(log):
+                cursor.floor_epoch_ms = min(log.timestamps) - 1
+
+            new_dated = []
+            for epoch_ms, activity in dated:
+                if _activity_key(epoch_ms, activity) in cursor.seen:
+                    continue
+                # Activities that sync late from a bridge are new as long as
+                # their key could not have aged out of the seen-set
+                if epoch_ms <= cursor.floor_epoch_ms:
+                    continue
+                new_dated.append((epoch_ms, activity))
+
+            for epoch_ms, activity in reversed(new_dated):
+                cursor.seen[_activity_key(epoch_ms, activity)] = None
+                if cursor.epoch_ms is None or epoch_ms >= cursor.epoch_ms:
+                    cursor.epoch_ms = epoch_ms
+                    cursor.activity_id = activity.activity_id
+            while len(cursor.seen) > self._seen_size:
+                forgotten_epoch_ms = cursor.seen.popitem(last=False)[0][1]
+                cursor.floor_epoch_ms = max(cursor.floor_epoch_ms, forgotten_epoch_ms)
+
+        return [activity for _, activity in new_dated]
+
+
+class ActivityPoller(ActivityPollerCommon):
+    """Returns only the activities of a house that were not seen before."""
+
+    def __init__(self, api, **kwargs):
+        super().__init__(**kwargs)
+        self._api = api
+
+    def poll(self, access_token, house_id, lazy=False):
+        limit = self._limit
+        while True:
+            log = self._api.get_house_activity_log(
+                access_token, house_id, limit=limit
+            )
+            dated = _dated_activities(log, lazy)
+            next_limit = self._next_limit(house_id, log, dated, limit)
+            if next_limit is None:
+                break
+            limit = next_limit
+        return self._new_activities(house_id, log, dated)
+
+
+class ActivityPollerAsync(ActivityPollerCommon):
+    """Returns only the activities of a house that were not seen before."""
+
+    def __init__(self, api, **kwargs):
+        super().__init__(**kwargs)
+        self._api = api
+
+    async def async_poll(self, access_token, house_id, lazy=False):
+        limit = self._limit
+        while True:
+            log = await self._api.async_get_house_activity_log(
+                access_token, house_id, limit=limit
+            )
+            dated = _dated_activities(log, lazy)
+            next_limit = self._next_limit(house_id, log, dated, limit)
+            if next_limit is None:
+                break
+            limit = next_limit
+        return self._new_activities(house_id, log, dated)
@@ -1,37 +1,98 @@
 """Api calls for sync."""
 
+from concurrent.futures import ThreadPoolExecutor
 import json
 import logging
+import threading
 import time
 
-from requests import Session, request
+from requests import Session
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 from requests.exceptions import HTTPError
+from august.activity_log import ActivityLog
 from august.api_common import (
+    API_BULK_MAX_CONCURRENCY,
     API_LOCK_URL,
-    API_RETRY_ATTEMPTS,
-    API_RETRY_TIME,
     API_UNLOCK_URL,
     HEADER_AUGUST_ACCESS_TOKEN,
     ApiCommon,
     _api_headers,
     _convert_lock_result_to_activities,
     _process_activity_json,
+    _process_activity_json_lazy,
     _process_doorbells_json,
     _process_locks_json,
+    _request_key,
 )
 from august.doorbell import DoorbellDetail
 from august.exceptions import AugustApiHTTPError
 from august.lock import LockDetail, determine_door_state, determine_lock_status
 from august.pin import Pin
+from august.retry import RetryPolicy
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class Api(ApiCommon):
-    def __init__(self, timeout=10, command_timeout=60, http_session: Session = None):
+    def __init__(
+        self,
+        timeout=10,
+        command_timeout=60,
+        http_session: Session = None,
+        pool_connections=DEFAULT_POOLSIZE,
+        pool_maxsize=DEFAULT_POOLSIZE,
+        keep_alive=True,
+        retry_policy=None,
+        rate_limiter=None,
+        response_cache=None,
+        conditional_cache=None,
+    ):
         self._timeout = timeout
         self._command_timeout = command_timeout
         self._http_session = http_session
+        self._owns_http_session = http_session is None
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._keep_alive = keep_alive
+        self._http_session_lock = threading.Lock()
+        self._retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+        self._rate_limiter = rate_limiter
+        self._response_cache = response_cache
+        self._conditional_cache = conditional_cache
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def http_session(self):
+        """Return the pooled session used for all api calls.
+
+        The session is created on first use when one was not passed in.
+        """
+        http_session = self._http_session
+        if http_session is not None:
+            return http_session
+
+        with self._http_session_lock:
+            if self._http_session is None:
+                self._http_session = _create_http_session(
+                    self._pool_connections, self._pool_maxsize, self._keep_alive
+                )
+            return self._http_session
+
+    def close(self):
+        """Close the session if it is owned by this Api.
+
+        A session passed in by the caller is left open. The Api may
+        still be used after close; a new session is created on demand.
+        """
+        with self._http_session_lock:
+            if self._owns_http_session and self._http_session is not None:
+                self._http_session.close()
+                self._http_session = None
 
     def get_session(self, install_id, identifier, password):
         return self._dict_to_api(
@@ -55,15 +116,26 @@ class Api(ApiCommon):
         )
 
     def get_doorbells(self, access_token):
-        return _process_doorbells_json(
-            self._dict_to_api(self._build_get_doorbells_request(access_token)).json()
+        return self._get_parsed(
+            self._build_get_doorbells_request(access_token), _process_doorbells_json
         )
 
     def get_doorbell_detail(self, access_token, doorbell_id):
-        return DoorbellDetail(
-            self._dict_to_api(
-                self._build_get_doorbell_detail_request(access_token, doorbell_id)
-            ).json()
+        return self._get_parsed(
+            self._build_get_doorbell_detail_request(access_token, doorbell_id),
+            DoorbellDetail,
+        )
+
+    def get_doorbell_details(
+        self, access_token, doorbell_ids, max_workers=API_BULK_MAX_CONCURRENCY
+    ):
+        """Fetch the detail of many doorbells on a thread pool.
+
+        Returns a dict of doorbell id to DoorbellDetail, or to the exception
+        raised while fetching that doorbell.
+        """
+        return self._bulk_fetch(
+            self.get_doorbell_detail, access_token, doorbell_ids, max_workers
         )
 
     def wakeup_doorbell(self, access_token, doorbell_id):
@@ -73,25 +145,38 @@ class Api(ApiCommon):
         return True
 
     def get_houses(self, access_token):
-        return self._dict_to_api(self._build_get_houses_request(access_token))
+        return self._get_parsed(self._build_get_houses_request(access_token))
 
     def get_house(self, access_token, house_id):
-        return self._dict_to_api(
-            self._build_get_house_request(access_token, house_id)
-        ).json()
-
-    def get_house_activities(self, access_token, house_id, limit=8):
-        return _process_activity_json(
-            self._dict_to_api(
-                self._build_get_house_activities_request(
-                    access_token, house_id, limit=limit
-                )
-            ).json()
+        return self._get_parsed(self._build_get_house_request(access_token, house_id))
+
+    def get_house_activities(
+        self, access_token, house_id, limit=8, lazy=False
+    ):
+        """Fetch the latest activities of a house.
+
+        With lazy=True the activities keep the raw json and decode each
+        field the first time it is read.
+        """
+        return self._get_parsed(
+            self._build_get_house_activities_request(
+                access_token, house_id, limit=limit
+            ),
+            _process_activity_json_lazy if lazy else _process_activity_json,
+        )
+
+    def get_house_activity_log(self, access_token, house_id, limit=8):
+        """Fetch the latest activities of a house as an ActivityLog."""
+        return self._get_parsed(
+            self._build_get_house_activities_request(
+                access_token, house_id, limit=limit
+            ),
+            ActivityLog.from_json,
         )
 
     def get_locks(self, access_token):
-        return _process_locks_json(
-            self._dict_to_api(self._build_get_locks_request(access_token)).json()
+        return self._get_parsed(
+            self._build_get_locks_request(access_token), _process_locks_json
         )
 
     def get_operable_locks(self, access_token):
@@ -100,16 +185,26 @@ class Api(ApiCommon):
         return [lock for lock in locks if lock.is_operable]
 
     def get_lock_detail(self, access_token, lock_id):
-        return LockDetail(
-            self._dict_to_api(
-                self._build_get_lock_detail_request(access_token, lock_id)
-            ).json()
+        return self._get_parsed(
+            self._build_get_lock_detail_request(access_token, lock_id), LockDetail
+        )
+
+    def get_lock_details(
+        self, access_token, lock_ids, max_workers=API_BULK_MAX_CONCURRENCY
+    ):
+        """Fetch the detail of many locks on a thread pool.
+
+        Returns a dict of lock id to LockDetail, or to the exception raised
+        while fetching that lock.
+        """
+        return self._bulk_fetch(
+            self.get_lock_detail, access_token, lock_ids, max_workers
         )
 
     def get_lock_status(self, access_token, lock_id, door_status=False):
-        json_dict = self._dict_to_api(
+        json_dict = self._get_parsed(
             self._build_get_lock_status_request(access_token, lock_id)
-        ).json()
+        )
 
         if door_status:
             return (
@@ -120,9 +215,9 @@ class Api(ApiCommon):
         return determine_lock_status(json_dict.get("status"))
 
     def get_lock_door_status(self, access_token, lock_id, lock_status=False):
-        json_dict = self._dict_to_api(
+        json_dict = self._get_parsed(
             self._build_get_lock_status_request(access_token, lock_id)
-        ).json()
+        )
 
         if lock_status:
             return (
@@ -133,18 +228,43 @@ class Api(ApiCommon):
         return determine_door_state(json_dict.get("doorState"))
 
     def get_pins(self, access_token, lock_id):
-        json_dict = self._dict_to_api(
+        json_dict = self._get_parsed(
             self._build_get_pins_request(access_token, lock_id)
-        ).json()
+        )
 
         return [Pin(pin_json) for pin_json in json_dict.get("loaded", [])]
 
+    def get_pins_for_locks(
+        self, access_token, lock_ids, max_workers=API_BULK_MAX_CONCURRENCY
+    ):
+        """Fetch the pins of many locks on a thread pool.
+
+        Returns a dict of lock id to a list of Pins, or to the exception
+        raised while fetching the pins of that lock.
+        """
+        return self._bulk_fetch(self.get_pins, access_token, lock_ids, max_workers)
+
+    def _bulk_fetch(self, fetch, access_token, device_ids, max_workers):
+        def _fetch_one(device_id):
+            try:
+                return fetch(access_token, device_id)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug("Failed to fetch %s: %s", device_id, err)
+                return err
+
+        device_ids = list(dict.fromkeys(device_ids))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(device_ids, executor.map(_fetch_one, device_ids)))
+
     def _call_lock_operation(self, url_str, access_token, lock_id):
-        return self._dict_to_api(
-            self._build_call_lock_operation_request(
-                url_str, access_token, lock_id, self._command_timeout
-            )
-        ).json()
+        try:
+            return self._dict_to_api(
+                self._build_call_lock_operation_request(
+                    url_str, access_token, lock_id, self._command_timeout
+                )
+            ).json()
+        finally:
+            self._invalidate_lock_cache(lock_id)
 
     def _lock(self, access_token, lock_id):
         return self._call_lock_operation(API_LOCK_URL, access_token, lock_id)
@@ -192,6 +312,38 @@ class Api(ApiCommon):
             self._build_refresh_access_token_request(access_token)
         ).headers[HEADER_AUGUST_ACCESS_TOKEN]
 
+    def _get_parsed(self, api_dict, factory=None):
+        """Fetch the json of a GET request and optionally build objects from it."""
+        key = _request_key(api_dict)
+        json_dict = self._cache_lookup(key)
+        if json_dict is not None:
+            return json_dict if factory is None else factory(json_dict)
+
+        conditional_key, previous = self._prepare_conditional_request(
+            api_dict, factory
+        )
+        response = self._dict_to_api(api_dict)
+        if response.status_code == 304 and previous is not None:
+            self._conditional_cache.record_not_modified()
+            return previous
+
+        json_dict = response.json()
+        self._cache_store(key, json_dict)
+        if factory is None:
+            return json_dict
+        parsed = factory(json_dict)
+        if conditional_key is not None:
+            self._conditional_cache.set(conditional_key, response.headers, parsed)
+        return parsed
+
+    def _wait_for_rate_limiter(self, url):
+        if self._rate_limiter is None:
+            return
+        delay = self._rate_limiter.reserve(url)
+        if delay:
+            _LOGGER.debug("Rate limit reached, holding request for %.2fs", delay)
+            time.sleep(delay)
+
     def _dict_to_api(self, api_dict):
         url = api_dict["url"]
         method = api_dict["method"]
@@ -216,31 +368,45 @@ class Api(ApiCommon):
             payload,
         )
 
+        started = time.monotonic()
         attempts = 0
-        while attempts < API_RETRY_ATTEMPTS:
+        while True:
             attempts += 1
-            response = (
-                self._http_session.request(method, url, **api_dict)
-                if self._http_session is not None
-                else request(method, url, **api_dict)
-            )
+            self._wait_for_rate_limiter(url)
+            response = self.http_session.request(method, url, **api_dict)
             _LOGGER.debug(
                 "Received API response: %s, %s", response.status_code, response.content
             )
-            if response.status_code == 429:
-                _LOGGER.debug(
-                    "August sent a 429 (attempt: %d), sleeping and trying again",
-                    attempts,
-                )
-                time.sleep(API_RETRY_TIME)
-                continue
-            break
+            if not self._retry_policy.should_retry(response.status_code):
+                break
+            delay = self._retry_policy.next_delay(
+                attempts, started, response.headers.get("Retry-After")
+            )
+            if delay is None:
+                break
+            _LOGGER.debug(
+                "August sent a %s (attempt: %d), sleeping %.2fs and trying again",
+                response.status_code,
+                attempts,
+                delay,
+            )
+            time.sleep(delay)
 
         _raise_response_exceptions(response)
 
         return response
 
 
+def _create_http_session(pool_connections, pool_maxsize, keep_alive):
+    http_session = Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    http_session.mount("https://", adapter)
+    http_session.mount("http://", adapter)
+    if not keep_alive:
+        http_session.headers["Connection"] = "close"
+    return http_session
+
+
 def _raise_response_exceptions(response):
     try:
         response.raise_for_status()
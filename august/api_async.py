@@ -1,35 +1,62 @@
 """Api calls for sync."""
 
 import asyncio
+import copy
 import logging
+import time
 
 from aiohttp import ClientResponseError
+from august.activity_log import ActivityLog
 from august.api_common import (
+    API_BULK_MAX_CONCURRENCY,
     API_LOCK_URL,
-    API_RETRY_ATTEMPTS,
-    API_RETRY_TIME,
     API_UNLOCK_URL,
     HEADER_AUGUST_ACCESS_TOKEN,
     ApiCommon,
     _api_headers,
     _convert_lock_result_to_activities,
     _process_activity_json,
+    _process_activity_json_lazy,
     _process_doorbells_json,
     _process_locks_json,
+    _request_key,
 )
 from august.doorbell import DoorbellDetail
-from august.exceptions import AugustApiAIOHTTPError
+from august.exceptions_async import AugustApiAIOHTTPError
 from august.lock import LockDetail, determine_door_state, determine_lock_status
 from august.pin import Pin
+from august.retry import RetryPolicy
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class ApiAsync(ApiCommon):
-    def __init__(self, aiohttp_session, timeout=10, command_timeout=60):
+    def __init__(
+        self,
+        aiohttp_session,
+        timeout=10,
+        command_timeout=60,
+        retry_policy=None,
+        rate_limiter=None,
+        coalesce_requests=True,
+        response_cache=None,
+        conditional_cache=None,
+    ):
         self._timeout = timeout
         self._command_timeout = command_timeout
         self._aiohttp_session = aiohttp_session
+        self._retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+        self._rate_limiter = rate_limiter
+        self._coalesce_requests = coalesce_requests
+        self._response_cache = response_cache
+        self._conditional_cache = conditional_cache
+        self._inflight_requests = {}
+        self._coalesced_requests = 0
+
+    @property
+    def coalesced_requests(self):
+        """Number of GET requests that joined an identical in-flight request."""
+        return self._coalesced_requests
 
     async def async_get_session(self, install_id, identifier, password):
         return await self._async_dict_to_api(
@@ -53,16 +80,27 @@ class ApiAsync(ApiCommon):
         )
 
     async def async_get_doorbells(self, access_token):
-        response = await self._async_dict_to_api(
-            self._build_get_doorbells_request(access_token)
+        return await self._async_get_parsed(
+            self._build_get_doorbells_request(access_token), _process_doorbells_json
         )
-        return _process_doorbells_json(await response.json())
 
     async def async_get_doorbell_detail(self, access_token, doorbell_id):
-        response = await self._async_dict_to_api(
-            self._build_get_doorbell_detail_request(access_token, doorbell_id)
+        return await self._async_get_parsed(
+            self._build_get_doorbell_detail_request(access_token, doorbell_id),
+            DoorbellDetail,
+        )
+
+    async def async_get_doorbell_details(
+        self, access_token, doorbell_ids, max_concurrency=API_BULK_MAX_CONCURRENCY
+    ):
+        """Fetch the detail of many doorbells concurrently.
+
+        Returns a dict of doorbell id to DoorbellDetail, or to the exception
+        raised while fetching that doorbell.
+        """
+        return await self._async_bulk_fetch(
+            self.async_get_doorbell_detail, access_token, doorbell_ids, max_concurrency
         )
-        return DoorbellDetail(await response.json())
 
     async def async_wakeup_doorbell(self, access_token, doorbell_id):
         await self._async_dict_to_api(
@@ -71,29 +109,43 @@ class ApiAsync(ApiCommon):
         return True
 
     async def async_get_houses(self, access_token):
-        return await self._async_dict_to_api(
+        return await self._async_get_parsed(
             self._build_get_houses_request(access_token)
         )
 
     async def async_get_house(self, access_token, house_id):
-        response = await self._async_dict_to_api(
+        return await self._async_get_parsed(
             self._build_get_house_request(access_token, house_id)
         )
-        return await response.json()
 
-    async def async_get_house_activities(self, access_token, house_id, limit=8):
-        response = await self._async_dict_to_api(
+    async def async_get_house_activities(
+        self, access_token, house_id, limit=8, lazy=False
+    ):
+        """Fetch the latest activities of a house.
+
+        With lazy=True the activities keep the raw json and decode each
+        field the first time it is read.
+        """
+        return await self._async_get_parsed(
             self._build_get_house_activities_request(
                 access_token, house_id, limit=limit
-            )
+            ),
+            _process_activity_json_lazy if lazy else _process_activity_json,
+        )
+
+    async def async_get_house_activity_log(self, access_token, house_id, limit=8):
+        """Fetch the latest activities of a house as an ActivityLog."""
+        return await self._async_get_parsed(
+            self._build_get_house_activities_request(
+                access_token, house_id, limit=limit
+            ),
+            ActivityLog.from_json,
         )
-        return _process_activity_json(await response.json())
 
     async def async_get_locks(self, access_token):
-        response = await self._async_dict_to_api(
-            self._build_get_locks_request(access_token)
+        return await self._async_get_parsed(
+            self._build_get_locks_request(access_token), _process_locks_json
         )
-        return _process_locks_json(await response.json())
 
     async def async_get_operable_locks(self, access_token):
         locks = await self.async_get_locks(access_token)
@@ -101,16 +153,26 @@ class ApiAsync(ApiCommon):
         return [lock for lock in locks if lock.is_operable]
 
     async def async_get_lock_detail(self, access_token, lock_id):
-        response = await self._async_dict_to_api(
-            self._build_get_lock_detail_request(access_token, lock_id)
+        return await self._async_get_parsed(
+            self._build_get_lock_detail_request(access_token, lock_id), LockDetail
+        )
+
+    async def async_get_lock_details(
+        self, access_token, lock_ids, max_concurrency=API_BULK_MAX_CONCURRENCY
+    ):
+        """Fetch the detail of many locks concurrently.
+
+        Returns a dict of lock id to LockDetail, or to the exception raised
+        while fetching that lock.
+        """
+        return await self._async_bulk_fetch(
+            self.async_get_lock_detail, access_token, lock_ids, max_concurrency
         )
-        return LockDetail(await response.json())
 
     async def async_get_lock_status(self, access_token, lock_id, door_status=False):
-        response = await self._async_dict_to_api(
+        json_dict = await self._async_get_parsed(
             self._build_get_lock_status_request(access_token, lock_id)
         )
-        json_dict = await response.json()
 
         if door_status:
             return (
@@ -123,10 +185,9 @@ class ApiAsync(ApiCommon):
     async def async_get_lock_door_status(
         self, access_token, lock_id, lock_status=False
     ):
-        response = await self._async_dict_to_api(
+        json_dict = await self._async_get_parsed(
             self._build_get_lock_status_request(access_token, lock_id)
         )
-        json_dict = await response.json()
 
         if lock_status:
             return (
@@ -137,20 +198,55 @@ class ApiAsync(ApiCommon):
         return determine_door_state(json_dict.get("doorState"))
 
     async def async_get_pins(self, access_token, lock_id):
-        response = await self._async_dict_to_api(
+        json_dict = await self._async_get_parsed(
             self._build_get_pins_request(access_token, lock_id)
         )
-        json_dict = await response.json()
 
         return [Pin(pin_json) for pin_json in json_dict.get("loaded", [])]
 
+    async def async_get_pins_for_locks(
+        self, access_token, lock_ids, max_concurrency=API_BULK_MAX_CONCURRENCY
+    ):
+        """Fetch the pins of many locks concurrently.
+
+        Returns a dict of lock id to a list of Pins, or to the exception
+        raised while fetching the pins of that lock.
+        """
+        return await self._async_bulk_fetch(
+            self.async_get_pins, access_token, lock_ids, max_concurrency
+        )
+
+    async def _async_bulk_fetch(
+        self, async_fetch, access_token, device_ids, max_concurrency
+    ):
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _async_fetch_one(device_id):
+            async with semaphore:
+                try:
+                    return await async_fetch(access_token, device_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.debug("Failed to fetch %s: %s", device_id, err)
+                    return err
+
+        device_ids = list(dict.fromkeys(device_ids))
+        results = await asyncio.gather(
+            *(_async_fetch_one(device_id) for device_id in device_ids)
+        )
+        return dict(zip(device_ids, results))
+
     async def _async_call_lock_operation(self, url_str, access_token, lock_id):
-        response = await self._async_dict_to_api(
-            self._build_call_lock_operation_request(
-                url_str, access_token, lock_id, self._command_timeout
+        try:
+            response = await self._async_dict_to_api(
+                self._build_call_lock_operation_request(
+                    url_str, access_token, lock_id, self._command_timeout
+                )
             )
-        )
-        return await response.json()
+            return await response.json()
+        finally:
+            self._invalidate_lock_cache(lock_id)
 
     async def _async_lock(self, access_token, lock_id):
         return await self._async_call_lock_operation(
@@ -212,6 +308,67 @@ class ApiAsync(ApiCommon):
             )
         ).headers[HEADER_AUGUST_ACCESS_TOKEN]
 
+    async def _async_get_parsed(self, api_dict, factory=None):
+        """Fetch the json of a GET request and optionally build objects from it.
+
+        Concurrent identical GET requests (same url, params and token)
+        share a single in-flight request. Callers that join it receive a
+        deep copy of the result, so mutating one result never changes
+        another caller's.
+        """
+        key = _request_key(api_dict)
+        json_dict = self._cache_lookup(key)
+        if json_dict is not None:
+            return json_dict if factory is None else factory(json_dict)
+
+        if not self._coalesce_requests or api_dict["method"] != "get":
+            return await self._async_fetch_parsed(api_dict, key, factory)
+
+        inflight_key = key + (factory,)
+        inflight = self._inflight_requests.get(inflight_key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(
+                self._async_fetch_parsed(api_dict, key, factory)
+            )
+            self._inflight_requests[inflight_key] = inflight
+
+            def _request_done(_):
+                if self._inflight_requests.get(inflight_key) is inflight:
+                    del self._inflight_requests[inflight_key]
+
+            inflight.add_done_callback(_request_done)
+            return await asyncio.shield(inflight)
+
+        self._coalesced_requests += 1
+        _LOGGER.debug("Joining in-flight request to %s", api_dict["url"])
+        return copy.deepcopy(await asyncio.shield(inflight))
+
+    async def _async_fetch_parsed(self, api_dict, key, factory):
+        conditional_key, previous = self._prepare_conditional_request(
+            api_dict, factory
+        )
+        response = await self._async_dict_to_api(api_dict)
+        if response.status == 304 and previous is not None:
+            self._conditional_cache.record_not_modified()
+            return previous
+
+        json_dict = await response.json()
+        self._cache_store(key, json_dict)
+        if factory is None:
+            return json_dict
+        parsed = factory(json_dict)
+        if conditional_key is not None:
+            self._conditional_cache.set(conditional_key, response.headers, parsed)
+        return parsed
+
+    async def _async_wait_for_rate_limiter(self, url):
+        if self._rate_limiter is None:
+            return
+        delay = self._rate_limiter.reserve(url)
+        if delay:
+            _LOGGER.debug("Rate limit reached, holding request for %.2fs", delay)
+            await asyncio.sleep(delay)
+
     async def _async_dict_to_api(self, api_dict):
         url = api_dict["url"]
         method = api_dict["method"]
@@ -236,21 +393,29 @@ class ApiAsync(ApiCommon):
             payload,
         )
 
+        started = time.monotonic()
         attempts = 0
-        while attempts < API_RETRY_ATTEMPTS:
+        while True:
             attempts += 1
+            await self._async_wait_for_rate_limiter(url)
             response = await self._aiohttp_session.request(method, url, **api_dict)
             _LOGGER.debug(
                 "Received API response: %s, %s", response.status, await response.read()
             )
-            if response.status == 429:
-                _LOGGER.debug(
-                    "August sent a 429 (attempt: %d), sleeping and trying again",
-                    attempts,
-                )
-                asyncio.sleep(API_RETRY_TIME)
-                continue
-            break
+            if not self._retry_policy.should_retry(response.status):
+                break
+            delay = self._retry_policy.next_delay(
+                attempts, started, response.headers.get("Retry-After")
+            )
+            if delay is None:
+                break
+            _LOGGER.debug(
+                "August sent a %s (attempt: %d), sleeping %.2fs and trying again",
+                response.status,
+                attempts,
+                delay,
+            )
+            await asyncio.sleep(delay)
 
         _raise_response_exceptions(response)
 
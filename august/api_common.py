@@ -1,23 +1,18 @@
 """Api functions common between sync and async."""
 
-import dateutil.parser
-from august.activity import (
-    ACTIVITY_ACTIONS_DOOR_OPERATION,
-    ACTIVITY_ACTIONS_DOORBELL_DING,
-    ACTIVITY_ACTIONS_DOORBELL_MOTION,
-    ACTIVITY_ACTIONS_DOORBELL_VIEW,
-    ACTIVITY_ACTIONS_LOCK_OPERATION,
-    DoorbellDingActivity,
-    DoorbellMotionActivity,
-    DoorbellViewActivity,
-    DoorOperationActivity,
-    LockOperationActivity,
-)
+import functools
+import re
+import string
+
+from august.activity import activity_from_dict
+from august.dateparse import datetime_to_epoch_ms, parse_datetime
 from august.doorbell import Doorbell
 from august.lock import Lock, LockDoorStatus, determine_door_state, door_state_to_string
 
 API_RETRY_TIME = 2.5
 API_RETRY_ATTEMPTS = 10
+# Default number of concurrent requests of the bulk fetch methods
+API_BULK_MAX_CONCURRENCY = 10
 
 HEADER_ACCEPT_VERSION = "Accept-Version"
 HEADER_AUGUST_ACCESS_TOKEN = "x-august-access-token"
@@ -54,6 +49,38 @@ API_GET_PINS_URL = API_BASE_URL + "/locks/{lock_id}/pins"
 API_LOCK_URL = API_BASE_URL + "/remoteoperate/{lock_id}/lock"
 API_UNLOCK_URL = API_BASE_URL + "/remoteoperate/{lock_id}/unlock"
 
+API_ENDPOINT_URLS = (
+    API_GET_SESSION_URL,
+    *API_SEND_VERIFICATION_CODE_URLS.values(),
+    *API_VALIDATE_VERIFICATION_CODE_URLS.values(),
+    API_GET_HOUSE_ACTIVITIES_URL,
+    API_GET_DOORBELLS_URL,
+    API_GET_DOORBELL_URL,
+    API_WAKEUP_DOORBELL_URL,
+    API_GET_HOUSES_URL,
+    API_GET_HOUSE_URL,
+    API_GET_LOCKS_URL,
+    API_GET_LOCK_URL,
+    API_GET_LOCK_STATUS_URL,
+    API_GET_PINS_URL,
+    API_LOCK_URL,
+    API_UNLOCK_URL,
+)
+
+
+def _endpoint_pattern(url_template):
+    pattern = ""
+    for literal, field_name, _, _ in string.Formatter().parse(url_template):
+        pattern += re.escape(literal)
+        if field_name is not None:
+            pattern += "[^/]+"
+    return re.compile(pattern)
+
+
+_ENDPOINT_PATTERNS = tuple(
+    (_endpoint_pattern(endpoint), endpoint) for endpoint in API_ENDPOINT_URLS
+)
+
 
 def _api_headers(access_token=None):
     headers = {
@@ -70,6 +97,29 @@ def _api_headers(access_token=None):
     return headers
 
 
+@functools.lru_cache(maxsize=1024)
+def _endpoint_for_url(url):
+    """Return the API_*_URL template a formatted url was built from.
+
+    Urls that do not belong to a known endpoint are returned unchanged.
+    """
+    for pattern, endpoint in _ENDPOINT_PATTERNS:
+        if pattern.fullmatch(url):
+            return endpoint
+    return url
+
+
+def _request_key(api_dict):
+    """Return a hashable key identifying the request an api dict describes."""
+    params = api_dict.get("params")
+    return (
+        api_dict["method"],
+        api_dict["url"],
+        tuple(sorted(params.items())) if params else (),
+        api_dict.get("access_token"),
+    )
+
+
 def _convert_lock_result_to_activities(lock_json_dict):
     activities = []
     lock_info_json_dict = lock_json_dict.get("info", {})
@@ -91,22 +141,6 @@ def _convert_lock_result_to_activities(lock_json_dict):
     return activities
 
 
-def _activity_from_dict(activity_dict):
-    action = activity_dict.get("action")
-
-    if action in ACTIVITY_ACTIONS_DOORBELL_DING:
-        return DoorbellDingActivity(activity_dict)
-    if action in ACTIVITY_ACTIONS_DOORBELL_MOTION:
-        return DoorbellMotionActivity(activity_dict)
-    if action in ACTIVITY_ACTIONS_DOORBELL_VIEW:
-        return DoorbellViewActivity(activity_dict)
-    if action in ACTIVITY_ACTIONS_LOCK_OPERATION:
-        return LockOperationActivity(activity_dict)
-    if action in ACTIVITY_ACTIONS_DOOR_OPERATION:
-        return DoorOperationActivity(activity_dict)
-    return None
-
-
 def _map_lock_result_to_activity(lock_id, activity_epoch, action_text):
     """Create an august activity from a lock result."""
     mapped_dict = {
@@ -115,23 +149,27 @@ def _map_lock_result_to_activity(lock_id, activity_epoch, action_text):
         "deviceType": "lock",
         "action": action_text,
     }
-    return _activity_from_dict(mapped_dict)
+    return activity_from_dict(mapped_dict)
 
 
 def _datetime_string_to_epoch(datetime_string):
-    return dateutil.parser.parse(datetime_string).timestamp() * 1000
+    return datetime_to_epoch_ms(parse_datetime(datetime_string))
 
 
-def _process_activity_json(json_dict):
+def _process_activity_json(json_dict, lazy=False):
     activities = []
     for activity_json in json_dict:
-        activity = _activity_from_dict(activity_json)
+        activity = activity_from_dict(activity_json, lazy)
         if activity:
             activities.append(activity)
 
     return activities
 
 
+def _process_activity_json_lazy(json_dict):
+    return _process_activity_json(json_dict, lazy=True)
+
+
 def _process_doorbells_json(json_dict):
     return [Doorbell(device_id, data) for device_id, data in json_dict.items()]
 
@@ -143,6 +181,56 @@ def _process_locks_json(json_dict):
 class ApiCommon:
     """Api dict shared between async and sync."""
 
+    _response_cache = None
+    _conditional_cache = None
+
+    @property
+    def response_cache(self):
+        return self._response_cache
+
+    @property
+    def conditional_cache(self):
+        return self._conditional_cache
+
+    def _prepare_conditional_request(self, api_dict, factory):
+        """Add the validators of a previous response to a detail request.
+
+        Returns the key to store the parsed response under and the object
+        parsed from the previous response, or (None, None) when the request
+        is not sent conditionally.
+        """
+        if (
+            self._conditional_cache is None
+            or factory is None
+            or not self._conditional_cache.applies_to(api_dict["url"])
+        ):
+            return None, None
+
+        key = _request_key(api_dict) + (factory,)
+        conditional_headers, previous = self._conditional_cache.get(key)
+        if conditional_headers:
+            headers = _api_headers(access_token=api_dict.get("access_token"))
+            headers.update(conditional_headers)
+            api_dict["headers"] = headers
+        return key, previous
+
+    def _cache_lookup(self, key):
+        if self._response_cache is None:
+            return None
+        return self._response_cache.get(key)
+
+    def _cache_store(self, key, value):
+        if self._response_cache is not None:
+            self._response_cache.set(key, value)
+
+    def _invalidate_lock_cache(self, lock_id):
+        """Drop cached detail and status of a lock after operating it."""
+        if self._response_cache is not None:
+            self._response_cache.invalidate(API_GET_LOCK_URL.format(lock_id=lock_id))
+            self._response_cache.invalidate(
+                API_GET_LOCK_STATUS_URL.format(lock_id=lock_id)
+            )
+
     def _build_get_session_request(self, install_id, identifier, password):
         return {
             "method": "post",
@@ -196,7 +284,11 @@ class ApiCommon:
         }
 
     def _build_get_houses_request(self, access_token):
-        return {"method": "get", "access_token": access_token}
+        return {
+            "method": "get",
+            "url": API_GET_HOUSES_URL,
+            "access_token": access_token,
+        }
 
     def _build_get_house_request(self, access_token, house_id):
         return {
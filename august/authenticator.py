@@ -1,17 +1,12 @@
-from datetime import datetime, timedelta, timezone
-import json
 import logging
-import os
 
 import requests
 from august.authenticator_common import (
-    Authentication,
     AuthenticationState,
     AuthenticatorCommon,
     ValidationResult,
-    from_authentication_json,
-    to_authentication_json,
 )
+from august.token_store import FileTokenStore
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,56 +14,23 @@ _LOGGER = logging.getLogger(__name__)
 class Authenticator(AuthenticatorCommon):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        if self._token_store is None and self._access_token_cache_file is not None:
+            self._token_store = FileTokenStore(self._access_token_cache_file)
         self._setup_authentication()
 
     def _setup_authentication(self):
-        access_token_cache_file = self._access_token_cache_file
-        if access_token_cache_file is not None and os.path.exists(
-            access_token_cache_file
-        ):
-            with open(access_token_cache_file, "r") as file:
-                try:
-                    self._authentication = from_authentication_json(json.load(file))
-
-                    # If token is to expire within 7 days then print a warning.
-                    if self._authentication.is_expired():
-                        _LOGGER.error("Token has expired.")
-                        self._authentication = Authentication(
-                            AuthenticationState.REQUIRES_AUTHENTICATION,
-                            install_id=self._install_id,
-                        )
-                    # If token is not expired but less then 7 days before it
-                    # will.
-                    elif (
-                        self._authentication.parsed_expiration_time()
-                        - datetime.now(timezone.utc)
-                    ) < timedelta(days=7):
-                        exp_time = self._authentication.access_token_expires
-                        _LOGGER.warning(
-                            "API Token is going to expire at %s "
-                            "hours. Deleting file %s will result "
-                            "in a new token being requested next"
-                            " time",
-                            exp_time,
-                            access_token_cache_file,
-                        )
-                    return
-                except json.decoder.JSONDecodeError as error:
-                    _LOGGER.error(
-                        "Unable to read cache file (%s): %s",
-                        access_token_cache_file,
-                        error,
-                    )
-
-        self._authentication = Authentication(
-            AuthenticationState.REQUIRES_AUTHENTICATION, install_id=self._install_id
-        )
+        if self._authentication is not None:
+            return
+        authentication = None
+        if self._token_store is not None:
+            authentication = self._token_store.get(self.identifier)
+        self._authentication = self._restore_authentication(authentication)
 
     def authenticate(self):
         if self._authentication.state == AuthenticationState.AUTHENTICATED:
             return self._authentication
 
-        identifier = self._login_method + ":" + self._username
+        identifier = self.identifier
         install_id = self._authentication.install_id
         response = self._api.get_session(install_id, identifier, self._password)
 
@@ -121,6 +83,5 @@ class Authenticator(AuthenticatorCommon):
         return authentication
 
     def _cache_authentication(self, authentication):
-        if self._access_token_cache_file is not None:
-            with open(self._access_token_cache_file, "w") as file:
-                file.write(to_authentication_json(authentication))
+        if self._token_store is not None:
+            self._token_store.set(self.identifier, authentication)
@@ -1,75 +1,46 @@
-from datetime import datetime, timedelta, timezone
-import json
+import asyncio
 import logging
-import os
+import random
 
-import aiofiles
 from aiohttp import ClientError
 from august.authenticator_common import (
-    Authentication,
     AuthenticationState,
     AuthenticatorCommon,
     ValidationResult,
-    from_authentication_json,
-    to_authentication_json,
 )
+from august.token_store import FileTokenStore
 
 _LOGGER = logging.getLogger(__name__)
 
+# The background refresh renews up to this many seconds before the threshold
+TOKEN_REFRESH_JITTER = 3600
+# Wait before retrying a failed background refresh
+TOKEN_REFRESH_RETRY_DELAY = 60
+# The longest the background refresh sleeps before checking the token again
+TOKEN_REFRESH_CHECK_INTERVAL = 3600
+
 
 class AuthenticatorAsync(AuthenticatorCommon):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        if self._token_store is None and self._access_token_cache_file is not None:
+            self._token_store = FileTokenStore(self._access_token_cache_file)
+        self._refresh_future = None
+        self._background_refresh = None
 
     async def async_setup_authentication(self):
-        access_token_cache_file = self._access_token_cache_file
-        if access_token_cache_file is not None and os.path.exists(
-            access_token_cache_file
-        ):
-            async with aiofiles.open(access_token_cache_file, "r") as file:
-                try:
-                    contents = await file.read()
-                    self._authentication = from_authentication_json(json.loads(contents))
-
-                    # If token is to expire within 7 days then print a warning.
-                    if self._authentication.is_expired():
-                        _LOGGER.error("Token has expired.")
-                        self._authentication = Authentication(
-                            AuthenticationState.REQUIRES_AUTHENTICATION,
-                            install_id=self._install_id,
-                        )
-                    # If token is not expired but less then 7 days before it
-                    # will.
-                    elif (
-                        self._authentication.parsed_expiration_time()
-                        - datetime.now(timezone.utc)
-                    ) < timedelta(days=7):
-                        exp_time = self._authentication.access_token_expires
-                        _LOGGER.warning(
-                            "API Token is going to expire at %s "
-                            "hours. Deleting file %s will result "
-                            "in a new token being requested next"
-                            " time",
-                            exp_time,
-                            access_token_cache_file,
-                        )
-                    return
-                except json.decoder.JSONDecodeError as error:
-                    _LOGGER.error(
-                        "Unable to read cache file (%s): %s",
-                        access_token_cache_file,
-                        error,
-                    )
-
-        self._authentication = Authentication(
-            AuthenticationState.REQUIRES_AUTHENTICATION, install_id=self._install_id
-        )
+        if self._authentication is not None:
+            return
+        authentication = None
+        if self._token_store is not None:
+            authentication = await self._token_store.async_get(self.identifier)
+        self._authentication = self._restore_authentication(authentication)
 
     async def async_authenticate(self):
         if self._authentication.state == AuthenticationState.AUTHENTICATED:
             return self._authentication
 
-        identifier = self._login_method + ":" + self._username
+        identifier = self.identifier
         install_id = self._authentication.install_id
         response = await self._api.async_get_session(
             install_id, identifier, self._password
@@ -108,14 +79,37 @@ class AuthenticatorAsync(AuthenticatorCommon):
 
         return True
 
+    async def async_get_access_token(self):
+        """Return the access token, refreshing it first if it is due.
+
+        Only awaits when a refresh is due or already running.
+        """
+        if self.should_refresh() or self._refresh_future is not None:
+            await self.async_refresh_access_token()
+        return self._authentication.access_token
+
     async def async_refresh_access_token(self, force=False):
-        if not self.should_refresh() and not force:
-            return self._authentication
+        if self._refresh_future is None:
+            if not self.should_refresh() and not force:
+                return self._authentication
 
-        if self._authentication.state != AuthenticationState.AUTHENTICATED:
-            _LOGGER.warning("Tried to refresh access token when not authenticated")
-            return self._authentication
+            if self._authentication.state != AuthenticationState.AUTHENTICATED:
+                _LOGGER.warning("Tried to refresh access token when not authenticated")
+                return self._authentication
+
+            # Callers arriving while the refresh runs share its result
+            self._refresh_future = asyncio.ensure_future(
+                self._async_refresh_access_token()
+            )
+            self._refresh_future.add_done_callback(self._refresh_done)
 
+        return await asyncio.shield(self._refresh_future)
+
+    def _refresh_done(self, future):
+        if future is self._refresh_future:
+            self._refresh_future = None
+
+    async def _async_refresh_access_token(self):
         refreshed_token = await self._api.async_refresh_access_token(
             self._authentication.access_token
         )
@@ -124,7 +118,67 @@ class AuthenticatorAsync(AuthenticatorCommon):
         await self._async_cache_authentication(authentication)
         return authentication
 
+    def start_background_refresh(self, jitter=TOKEN_REFRESH_JITTER):
+        """Renew the token in a background task before it needs refreshing.
+
+        Each renewal happens a random 0 to jitter seconds before the
+        renewal threshold, so many clients do not renew at the same time.
+        A token that is already due when the task starts, such as after
+        downtime, is renewed after a random 0 to jitter seconds instead of
+        right away, but never after it expires.
+        """
+        if self._background_refresh is None or self._background_refresh.done():
+            self._background_refresh = asyncio.ensure_future(
+                self._async_background_refresh(jitter)
+            )
+        return self._background_refresh
+
+    async def async_stop_background_refresh(self):
+        task, self._background_refresh = self._background_refresh, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def _seconds_until_background_refresh(self, ahead):
+        authentication = self._authentication
+        if authentication.state != AuthenticationState.AUTHENTICATED:
+            return TOKEN_REFRESH_RETRY_DELAY
+        return (
+            authentication.seconds_until_expiry()
+            - self._access_token_renewal_seconds
+            - ahead
+        )
+
+    async def _async_background_refresh(self, jitter):
+        ahead = random.uniform(0, jitter)
+        if self._seconds_until_background_refresh(ahead) <= 0:
+            # Spread out the accounts that all became due while nothing ran
+            spread = min(jitter, max(self._authentication.seconds_until_expiry(), 0))
+            await asyncio.sleep(random.uniform(0, spread))
+        while True:
+            delay = self._seconds_until_background_refresh(ahead)
+            if delay <= 0:
+                try:
+                    await self.async_refresh_access_token(force=True)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Background access token refresh failed")
+                    delay = TOKEN_REFRESH_RETRY_DELAY
+                else:
+                    ahead = random.uniform(0, jitter)
+                    # A token issued inside the threshold is not refreshed
+                    # again until the next check
+                    delay = self._seconds_until_background_refresh(ahead)
+                    if delay <= 0:
+                        delay = TOKEN_REFRESH_CHECK_INTERVAL
+
+            await asyncio.sleep(min(delay, TOKEN_REFRESH_CHECK_INTERVAL))
+
     async def _async_cache_authentication(self, authentication):
-        if self._access_token_cache_file is not None:
-            async with aiofiles.open(self._access_token_cache_file, "w") as file:
-                await file.write(to_authentication_json(authentication))
+        if self._token_store is not None:
+            await self._token_store.async_set(self.identifier, authentication)
@@ -1,12 +1,13 @@
 import base64
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from enum import Enum
 import json
 import logging
+import time
 import uuid
 
-import dateutil.parser
-from august.api import HEADER_AUGUST_ACCESS_TOKEN
+from august.api_common import HEADER_AUGUST_ACCESS_TOKEN
+from august.dateparse import parse_datetime
 
 # The default time before expiration to refresh a token
 DEFAULT_RENEWAL_THRESHOLD = timedelta(days=7)
@@ -14,18 +15,20 @@ DEFAULT_RENEWAL_THRESHOLD = timedelta(days=7)
 _LOGGER = logging.getLogger(__name__)
 
 
-def to_authentication_json(authentication):
+def authentication_to_dict(authentication):
     if authentication is None:
-        return json.dumps({})
+        return {}
+
+    return {
+        "install_id": authentication.install_id,
+        "access_token": authentication.access_token,
+        "access_token_expires": authentication.access_token_expires,
+        "state": authentication.state.value,
+    }
 
-    return json.dumps(
-        {
-            "install_id": authentication.install_id,
-            "access_token": authentication.access_token,
-            "access_token_expires": authentication.access_token_expires,
-            "state": authentication.state.value,
-        }
-    )
+
+def to_authentication_json(authentication):
+    return json.dumps(authentication_to_dict(authentication))
 
 
 def from_authentication_json(data):
@@ -41,12 +44,24 @@ def from_authentication_json(data):
 
 class Authentication:
     def __init__(
-        self, state, install_id=None, access_token=None, access_token_expires=None
+        self,
+        state,
+        install_id=None,
+        access_token=None,
+        access_token_expires=None,
+        jwt_claims=None,
     ):
         self._state = state
         self._install_id = str(uuid.uuid4()) if install_id is None else install_id
         self._access_token = access_token
         self._access_token_expires = access_token_expires
+        self._jwt_claims = jwt_claims
+        # Parsed once, the expiry is checked before every api call
+        self._access_token_expires_epoch = None
+        if access_token_expires is not None:
+            self._access_token_expires_epoch = int(
+                parse_datetime(access_token_expires).timestamp()
+            )
 
     @property
     def install_id(self):
@@ -60,6 +75,15 @@ class Authentication:
     def access_token_expires(self):
         return self._access_token_expires
 
+    @property
+    def access_token_expires_epoch(self):
+        return self._access_token_expires_epoch
+
+    @property
+    def jwt_claims(self):
+        """Claims of the refreshed access token, None for session tokens."""
+        return self._jwt_claims
+
     @property
     def state(self):
         return self._state
@@ -69,10 +93,13 @@ class Authentication:
         self._state = value
 
     def parsed_expiration_time(self):
-        return dateutil.parser.parse(self.access_token_expires)
+        return parse_datetime(self.access_token_expires)
+
+    def seconds_until_expiry(self):
+        return self._access_token_expires_epoch - time.time()
 
     def is_expired(self):
-        return self.parsed_expiration_time() < datetime.now(timezone.utc)
+        return self.seconds_until_expiry() < 0
 
 
 class AuthenticationState(Enum):
@@ -97,6 +124,8 @@ class AuthenticatorCommon:
         install_id=None,
         access_token_cache_file=None,
         access_token_renewal_threshold=DEFAULT_RENEWAL_THRESHOLD,
+        token_store=None,
+        authentication=None,
     ):
         self._api = api
         self._login_method = login_method
@@ -105,7 +134,45 @@ class AuthenticatorCommon:
         self._install_id = install_id
         self._access_token_cache_file = access_token_cache_file
         self._access_token_renewal_threshold = access_token_renewal_threshold
+        self._access_token_renewal_seconds = (
+            access_token_renewal_threshold.total_seconds()
+        )
+        self._token_store = token_store
         self._authentication = None
+        if authentication is not None:
+            self._authentication = self._restore_authentication(authentication)
+
+    @property
+    def identifier(self):
+        """The login identifier, which also keys the account in a token store."""
+        return self._login_method + ":" + self._username
+
+    @property
+    def authentication(self):
+        return self._authentication
+
+    def _restore_authentication(self, authentication):
+        """Use a stored Authentication unless it is missing or expired."""
+        if (
+            authentication is not None
+            and authentication.access_token_expires_epoch is not None
+        ):
+            seconds_until_expiry = authentication.seconds_until_expiry()
+            if seconds_until_expiry < 0:
+                _LOGGER.error("Token has expired.")
+                authentication = None
+            # If token is not expired but less then 7 days before it will.
+            elif seconds_until_expiry < timedelta(days=7).total_seconds():
+                _LOGGER.warning(
+                    "API Token is going to expire at %s hours. A new token "
+                    "will be requested once it has expired",
+                    authentication.access_token_expires,
+                )
+        if authentication is not None:
+            return authentication
+        return Authentication(
+            AuthenticationState.REQUIRES_AUTHENTICATION, install_id=self._install_id
+        )
 
     def _authentication_from_session_response(
         self, install_id, response_headers, json_dict
@@ -130,13 +197,13 @@ class AuthenticatorCommon:
 
     def should_refresh(self):
         return self._authentication.state == AuthenticationState.AUTHENTICATED and (
-            (self._authentication.parsed_expiration_time() - datetime.now(timezone.utc))
-            < self._access_token_renewal_threshold
+            self._authentication.seconds_until_expiry()
+            < self._access_token_renewal_seconds
         )
 
     def _process_refreshed_access_token(self, refreshed_token):
         jwt_parts = refreshed_token.split(".")
-        jwt_claims = json.loads(base64.b64decode(jwt_parts[1] + "==="))
+        jwt_claims = json.loads(base64.urlsafe_b64decode(jwt_parts[1] + "==="))
 
         if "exp" not in jwt_claims:
             _LOGGER.warning("Did not find expected `exp' claim in JWT")
@@ -153,6 +220,7 @@ class AuthenticatorCommon:
             install_id=self._authentication.install_id,
             access_token=refreshed_token,
             access_token_expires=new_expiration.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            jwt_claims=jwt_claims,
         )
 
         _LOGGER.info("Successfully refreshed access token")
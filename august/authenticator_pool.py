@@ -0,0 +1,109 @@
+"""Manage the authentication of many accounts in one process."""
+
+import asyncio
+
+from august.authenticator_async import TOKEN_REFRESH_JITTER, AuthenticatorAsync
+from august.authenticator_common import (
+    DEFAULT_RENEWAL_THRESHOLD,
+    Authentication,
+    AuthenticationState,
+)
+
+
+class AuthenticatorPool:
+    """AuthenticatorAsyncs for many accounts sharing one token store.
+
+    async_load() reads the tokens of all accounts at once, so adding an
+    account afterwards does not touch the store. Every authenticator
+    persists its tokens to the shared store, and the background refresh
+    renews each account at its own random point within jitter seconds
+    ahead of the renewal threshold so the accounts do not all renew at
+    once. Accounts that are already due when it starts are spread out
+    over the same jitter.
+    """
+
+    def __init__(
+        self,
+        api,
+        token_store,
+        access_token_renewal_threshold=DEFAULT_RENEWAL_THRESHOLD,
+        jitter=TOKEN_REFRESH_JITTER,
+    ):
+        self._api = api
+        self._token_store = token_store
+        self._access_token_renewal_threshold = access_token_renewal_threshold
+        self._jitter = jitter
+        self._stored = None
+        self._authenticators = {}
+
+    @property
+    def token_store(self):
+        return self._token_store
+
+    @property
+    def identifiers(self):
+        return list(self._authenticators)
+
+    async def async_load(self):
+        """Read the tokens of every account from the store."""
+        self._stored = await self._token_store.async_load_all()
+
+    def add_account(self, login_method, username, password, install_id=None):
+        """Add an account and return its AuthenticatorAsync.
+
+        The authenticator starts from the token loaded by async_load(), or
+        requires authentication if the store had none.
+        """
+        identifier = login_method + ":" + username
+        if identifier in self._authenticators:
+            return self._authenticators[identifier]
+
+        if self._stored is None:
+            raise RuntimeError("async_load must be awaited before adding accounts")
+        authentication = self._stored.get(identifier)
+        if authentication is None:
+            authentication = Authentication(
+                AuthenticationState.REQUIRES_AUTHENTICATION, install_id=install_id
+            )
+
+        authenticator = AuthenticatorAsync(
+            self._api,
+            login_method,
+            username,
+            password,
+            install_id=install_id,
+            access_token_renewal_threshold=self._access_token_renewal_threshold,
+            token_store=self._token_store,
+            authentication=authentication,
+        )
+        self._authenticators[identifier] = authenticator
+        return authenticator
+
+    def get(self, identifier):
+        return self._authenticators.get(identifier)
+
+    def expiries(self):
+        """Return the seconds until each account's token expires.
+
+        Accounts that are not authenticated map to None.
+        """
+        expiries = {}
+        for identifier, authenticator in self._authenticators.items():
+            authentication = authenticator.authentication
+            if authentication.state == AuthenticationState.AUTHENTICATED:
+                expiries[identifier] = authentication.seconds_until_expiry()
+            else:
+                expiries[identifier] = None
+        return expiries
+
+    def start_background_refresh(self):
+        for authenticator in self._authenticators.values():
+            authenticator.start_background_refresh(self._jitter)
+
+    async def async_stop_background_refresh(self):
+        await asyncio.gather(
+            *(
+                authenticator.async_stop_background_refresh()
+                for authenticator in self._authenticators.values()
+            )
+        )
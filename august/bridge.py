@@ -9,6 +9,8 @@ class BridgeStatus(Enum):
 
 
 class BridgeDetail(DeviceDetail):
+    __slots__ = ("_operative", "_status")
+
     def __init__(self, house_id, data):
         super().__init__(data["_id"], None, house_id, None, data["firmwareVersion"])
 
@@ -29,6 +31,8 @@ class BridgeDetail(DeviceDetail):
 
 
 class BridgeStatusDetail:
+    __slots__ = ("_current", "_updated", "_last_online", "_last_offline")
+
     def __init__(self, data):
         self._current = BridgeStatus.UNKNOWN
 
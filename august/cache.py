@@ -0,0 +1,176 @@
+"""Response cache shared between async and sync."""
+
+from collections import OrderedDict
+import copy
+import threading
+import time
+
+from august.api_common import (
+    API_GET_DOORBELL_URL,
+    API_GET_DOORBELLS_URL,
+    API_GET_HOUSE_URL,
+    API_GET_HOUSES_URL,
+    API_GET_LOCK_URL,
+    API_GET_LOCKS_URL,
+    _endpoint_for_url,
+)
+
+# Discovery endpoints whose data rarely changes, ttl in seconds
+DEFAULT_CACHE_TTLS = {
+    API_GET_LOCKS_URL: 300,
+    API_GET_DOORBELLS_URL: 300,
+    API_GET_HOUSES_URL: 300,
+    API_GET_HOUSE_URL: 300,
+}
+DEFAULT_CACHE_MAX_ENTRIES = 256
+
+# Device detail endpoints that are fetched with If-None-Match/If-Modified-Since
+CONDITIONAL_GET_URLS = frozenset((API_GET_LOCK_URL, API_GET_DOORBELL_URL))
+
+HEADER_ETAG = "ETag"
+HEADER_LAST_MODIFIED = "Last-Modified"
+HEADER_IF_NONE_MATCH = "If-None-Match"
+HEADER_IF_MODIFIED_SINCE = "If-Modified-Since"
+
+
+class ResponseCache:
+    """A bounded LRU cache of api responses with per-endpoint ttls.
+
+    ttls maps an API_*_URL template from august.api_common to the number
+    of seconds a response stays fresh. Endpoints without a ttl are never
+    cached. Entries are keyed by api_common._request_key(), so the access
+    token is part of the key and one cache may be shared between accounts.
+    Values are deep copied on the way in and out, so callers that mutate
+    a result never change the cached response.
+    """
+
+    def __init__(self, ttls=None, max_entries=DEFAULT_CACHE_MAX_ENTRIES):
+        self._ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def ttl_for(self, url):
+        return self._ttls.get(_endpoint_for_url(url))
+
+    def get(self, key):
+        """Return the cached value for a request key or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+            if self.ttl_for(key[1]) is not None:
+                self._misses += 1
+            return None
+
+    def set(self, key, value):
+        """Store a value if its endpoint has a ttl."""
+        ttl = self.ttl_for(key[1])
+        if ttl is None or value is None:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, url):
+        """Drop every entry for a url, regardless of params or token."""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == url]:
+                del self._entries[key]
+
+    def invalidate_endpoint(self, endpoint):
+        """Drop every entry for an API_*_URL template."""
+        with self._lock:
+            for key in [
+                key for key in self._entries if _endpoint_for_url(key[1]) == endpoint
+            ]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+            }
+
+
+class ConditionalRequestCache:
+    """Validators and parsed objects of the last device detail responses.
+
+    When a previous response carried an ETag or Last-Modified header the
+    next request for the same url is sent as a conditional GET, and a 304
+    returns the previously parsed object without decoding anything.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._not_modified = 0
+        self._modified = 0
+
+    @staticmethod
+    def applies_to(url):
+        return _endpoint_for_url(url) in CONDITIONAL_GET_URLS
+
+    def get(self, key):
+        """Return (conditional headers, parsed value) for a request key.
+
+        Both are None when there is no previous response with validators.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            self._entries.move_to_end(key)
+        etag, last_modified, value = entry
+        headers = {}
+        if etag is not None:
+            headers[HEADER_IF_NONE_MATCH] = etag
+        if last_modified is not None:
+            headers[HEADER_IF_MODIFIED_SINCE] = last_modified
+        return headers, value
+
+    def set(self, key, response_headers, value):
+        """Remember a parsed response if it carried validators."""
+        etag = response_headers.get(HEADER_ETAG)
+        last_modified = response_headers.get(HEADER_LAST_MODIFIED)
+        with self._lock:
+            self._modified += 1
+            if etag is None and last_modified is None:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = (etag, last_modified, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def record_not_modified(self):
+        with self._lock:
+            self._not_modified += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "not_modified": self._not_modified,
+                "modified": self._modified,
+                "size": len(self._entries),
+            }
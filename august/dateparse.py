@@ -0,0 +1,82 @@
+"""Parse the timestamps returned by the August api."""
+
+from datetime import datetime, timezone
+import functools
+
+DATETIME_CACHE_SIZE = 1024
+
+_DIGITS = frozenset("0123456789")
+
+
+@functools.lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def parse_datetime(datetime_string):
+    """Parse a timestamp returned by the August api.
+
+    The api uses '%Y-%m-%dT%H:%M:%S.%fZ' (the fraction is sometimes
+    missing), which is parsed directly. Anything else is handed to
+    dateutil. Results are memoized since the same timestamps tend to be
+    parsed over and over while polling.
+    """
+    parsed = _parse_utc_iso8601(datetime_string)
+    if parsed is None:
+        # dateutil is slow to import and rarely needed
+        import dateutil.parser  # pylint: disable=import-outside-toplevel
+
+        parsed = dateutil.parser.parse(datetime_string)
+    return parsed
+
+
+def datetime_to_epoch_ms(dtime):
+    """Return the epoch milliseconds of a datetime, naive ones are local."""
+    return int(round(dtime.timestamp() * 1000))
+
+
+def epoch_ms_to_datetime(epoch_ms):
+    """Return the UTC datetime of epoch milliseconds, None for None."""
+    if epoch_ms is None:
+        return None
+    return datetime.fromtimestamp(epoch_ms / 1000, timezone.utc)
+
+
+def _parse_utc_iso8601(value):
+    """Parse 'YYYY-MM-DDTHH:MM:SS[.ffffff]Z', returns None for other formats."""
+    if (
+        len(value) < 20
+        or value[-1] != "Z"
+        or value[4] != "-"
+        or value[7] != "-"
+        or value[10] not in "T "
+        or value[13] != ":"
+        or value[16] != ":"
+    ):
+        return None
+
+    microsecond = 0
+    fraction = value[19:-1]
+    if fraction:
+        if fraction[0] != "." or not 2 <= len(fraction) <= 7:
+            return None
+        fraction = fraction[1:]
+        # str.isdigit() also accepts non-ASCII digits that int() rejects
+        if not _DIGITS.issuperset(fraction):
+            return None
+        microsecond = int(fraction.ljust(6, "0"))
+
+    date_digits = value[0:4] + value[5:7] + value[8:10]
+    time_digits = value[11:13] + value[14:16] + value[17:19]
+    if not _DIGITS.issuperset(date_digits + time_digits):
+        return None
+
+    try:
+        return datetime(
+            int(value[0:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+            int(value[17:19]),
+            microsecond,
+            tzinfo=timezone.utc,
+        )
+    except ValueError:
+        return None
@@ -1,4 +1,6 @@
 class Device:
+    __slots__ = ("_device_id", "_device_name", "_house_id")
+
     def __init__(self, device_id, device_name, house_id):
         self._device_id = device_id
         self._device_name = device_name
@@ -18,6 +20,14 @@ class Device:
 
 
 class DeviceDetail:
+    __slots__ = (
+        "_device_id",
+        "_device_name",
+        "_house_id",
+        "_serial_number",
+        "_firmware_version",
+    )
+
     def __init__(self, device_id, device_name, house_id, serial_number,
                  firmware_version):
         self._device_id = device_id
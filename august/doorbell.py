@@ -1,12 +1,16 @@
 import datetime
+import inspect
+import os
 
-import dateutil.parser
-import requests
-
+from august.dateparse import parse_datetime
 from august.device import Device, DeviceDetail
 
+DOORBELL_IMAGE_CHUNK_SIZE = 64 * 1024
+
 
 class Doorbell(Device):
+    __slots__ = ("_serial_number", "_status", "_image_url", "_has_subscription")
+
     def __init__(self, device_id, data):
         super().__init__(device_id, data["name"], data["HouseID"])
         self._serial_number = data["serialNumber"]
@@ -46,6 +50,15 @@ class Doorbell(Device):
 
 
 class DoorbellDetail(DeviceDetail):
+    __slots__ = (
+        "_status",
+        "_image_url",
+        "_has_subscription",
+        "_image_created_at_datetime",
+        "_model",
+        "_battery_level",
+    )
+
     def __init__(self, data):
         super().__init__(
             data["doorbellID"],
@@ -66,7 +79,7 @@ class DoorbellDetail(DeviceDetail):
             self._model = data["type"]
 
         if "created_at" in recent_image:
-            self._image_created_at_datetime = dateutil.parser.parse(
+            self._image_created_at_datetime = parse_datetime(
                 recent_image["created_at"]
             )
 
@@ -137,5 +150,153 @@ class DoorbellDetail(DeviceDetail):
         response = await aiohttp_session.request("get", self._image_url, timeout=timeout)
         return await response.read()
 
-    def get_doorbell_image(self, timeout=10):
-        return requests.get(self._image_url, timeout=timeout).content
+    async def async_download_doorbell_image(
+        self,
+        aiohttp_session,
+        destination,
+        timeout=10,
+        max_size=None,
+        chunk_size=DOORBELL_IMAGE_CHUNK_SIZE,
+    ):
+        """Stream the image into destination, return its size in bytes.
+
+        destination is a path (written with aiofiles), a binary file
+        object, or a bytearray or memoryview that is filled from the
+        start. Raises ValueError when the image is larger than max_size
+        or the buffer.
+        """
+        response = await aiohttp_session.request(
+            "get", self._image_url, timeout=timeout
+        )
+        try:
+            response.raise_for_status()
+            writer = _AsyncImageWriter(destination, max_size)
+            writer.expect(response.content_length)
+            async with writer:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    await writer.write(chunk)
+            return writer.size
+        finally:
+            response.release()
+
+    def get_doorbell_image(self, timeout=10, session=None):
+        return _http_session(session).get(self._image_url, timeout=timeout).content
+
+    def download_doorbell_image(
+        self,
+        destination,
+        timeout=10,
+        session=None,
+        max_size=None,
+        chunk_size=DOORBELL_IMAGE_CHUNK_SIZE,
+    ):
+        """Stream the image into destination, return its size in bytes.
+
+        destination is a path, a binary file object, or a bytearray or
+        memoryview that is filled from the start. Pass a requests Session
+        to reuse its pooled connections. Raises ValueError when the image
+        is larger than max_size or the buffer.
+        """
+        response = _http_session(session).get(
+            self._image_url, timeout=timeout, stream=True
+        )
+        try:
+            response.raise_for_status()
+            writer = _ImageWriter(destination, max_size)
+            writer.expect(response.headers.get("Content-Length"))
+            with writer:
+                for chunk in response.iter_content(chunk_size):
+                    writer.write(chunk)
+            return writer.size
+        finally:
+            response.close()
+
+
+def _http_session(session):
+    if session is not None:
+        return session
+    # Imported here so async users never load requests
+    import requests  # pylint: disable=import-outside-toplevel
+
+    return requests
+
+
+class _ImageWriter:
+    """Writes image chunks to a path, a file object or a buffer."""
+
+    def __init__(self, destination, max_size):
+        self._max_size = max_size
+        self._buffer = None
+        self._path = None
+        self._file = None
+        self.size = 0
+        if isinstance(destination, (bytearray, memoryview)):
+            self._buffer = memoryview(destination).cast("B")
+            if max_size is None or max_size > len(self._buffer):
+                self._max_size = len(self._buffer)
+        elif isinstance(destination, (str, bytes, os.PathLike)):
+            self._path = destination
+        else:
+            self._file = destination
+
+    def expect(self, content_length):
+        """Fail before downloading when the announced size is too large."""
+        if content_length is not None:
+            self._check_size(int(content_length))
+
+    def _check_size(self, size):
+        if self._max_size is not None and size > self._max_size:
+            raise ValueError(
+                "Doorbell image is larger than {} bytes".format(self._max_size)
+            )
+
+    def _reserve(self, chunk):
+        """Account for a chunk, returns whether it still has to be written."""
+        start = self.size
+        self._check_size(start + len(chunk))
+        self.size = start + len(chunk)
+        if self._buffer is None:
+            return True
+        self._buffer[start : self.size] = chunk
+        return False
+
+    def __enter__(self):
+        if self._path is not None:
+            self._file = open(self._path, "wb")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._path is not None:
+            self._file.close()
+            if exc_type is not None:
+                os.remove(self._path)
+
+    def write(self, chunk):
+        if self._reserve(chunk):
+            self._file.write(chunk)
+
+
+class _AsyncImageWriter(_ImageWriter):
+    """Writes image chunks without blocking the event loop on a path."""
+
+    async def __aenter__(self):
+        if self._path is not None:
+            # Imported here so sync users never load aiofiles
+            import aiofiles  # pylint: disable=import-outside-toplevel
+
+            self._file = await aiofiles.open(self._path, "wb")
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self._path is not None:
+            await self._file.close()
+            if exc_type is not None:
+                import aiofiles.os  # pylint: disable=import-outside-toplevel
+
+                await aiofiles.os.remove(self._path)
+
+    async def write(self, chunk):
+        if self._reserve(chunk):
+            result = self._file.write(chunk)
+            if inspect.isawaitable(result):
+                await result
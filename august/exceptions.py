@@ -1,8 +1,6 @@
 from requests.exceptions import HTTPError
 
-
-class AugustApiAIOHTTPError(Exception):
-    """An august api error with a friendly user consumable string."""
+from august.exceptions_async import AugustApiAIOHTTPError  # noqa: F401
 
 
 class AugustApiHTTPError(HTTPError):
@@ -0,0 +1,2 @@
+class AugustApiAIOHTTPError(Exception):
+    """An august api error with a friendly user consumable string."""
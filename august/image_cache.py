@@ -0,0 +1,345 @@
+"""Content addressed cache of doorbell images shared between async and sync."""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import logging
+import os
+import re
+import threading
+
+from august.doorbell import _http_session
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_IMAGE_CACHE_MAX_DISK_BYTES = 256 * 1024 * 1024
+IMAGE_PREFETCH_WORKERS = 2
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+_TEMP_RE = re.compile(r"^[0-9a-f]{64}\.tmp$")
+
+
+def image_cache_key(image_url, image_created_at=None):
+    """Return the sha256 hex digest of an image url and creation time."""
+    created_at = "" if image_created_at is None else image_created_at.isoformat()
+    return hashlib.sha256(
+        "{}\n{}".format(image_url, created_at).encode("utf-8")
+    ).hexdigest()
+
+
+class ImageCache:
+    """A byte-bounded LRU of doorbell images that spills to a directory.
+
+    Images are keyed by url and image_created_at_datetime, which both
+    change with every new snapshot, so entries never go stale. Once the
+    images in memory exceed max_bytes the least recently used ones are
+    moved to spill_directory, which is itself bounded by max_disk_bytes.
+    Without a spill_directory they are dropped. Images spilled by an
+    earlier process are picked up again when the cache is created.
+
+    The get_image methods accept anything with image_url and
+    image_created_at_datetime, such as a DoorbellDetail or a
+    DoorbellMotionActivity. Pass a requests session, such as
+    Api.http_session, or an aiohttp session to have downloads and
+    prefetches reuse its pooled connections.
+    """
+
+    def __init__(
+        self,
+        max_bytes=DEFAULT_IMAGE_CACHE_MAX_BYTES,
+        spill_directory=None,
+        max_disk_bytes=DEFAULT_IMAGE_CACHE_MAX_DISK_BYTES,
+        session=None,
+        aiohttp_session=None,
+    ):
+        self._max_bytes = max_bytes
+        self._session = session
+        self._aiohttp_session = aiohttp_session
+        self._spill_directory = spill_directory
+        self._max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+        self._memory_bytes = 0
+        self._spilled = OrderedDict()
+        self._disk_bytes = 0
+        self._inflight = {}
+        self._executor = None
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._joined = 0
+        self._bytes_saved = 0
+        self._evictions = 0
+        if spill_directory is not None:
+            os.makedirs(spill_directory, exist_ok=True)
+            self._load_spilled()
+
+    def _load_spilled(self):
+        entries = []
+        for name in os.listdir(self._spill_directory):
+            path = os.path.join(self._spill_directory, name)
+            if _KEY_RE.match(name):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name, stat.st_size))
+            elif _TEMP_RE.match(name):
+                # Left behind by a process that died while spilling
+                os.remove(path)
+        for _, key, size in sorted(entries):
+            self._spilled[key] = size
+            self._disk_bytes += size
+        self._trim_disk()
+
+    def _spill_path(self, key):
+        return os.path.join(self._spill_directory, key)
+
+    def get(self, image_url, image_created_at=None):
+        """Return a cached image or None, without any network I/O."""
+        return self._locked_lookup(image_cache_key(image_url, image_created_at))
+
+    def put(self, image_url, image_created_at, image):
+        key = image_cache_key(image_url, image_created_at)
+        with self._lock:
+            self._store(key, bytes(image))
+
+    def _lookup(self, key):
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+        elif key in self._spilled:
+            try:
+                with open(self._spill_path(key), "rb") as file:
+                    image = file.read()
+            except OSError as error:
+                _LOGGER.debug("Unable to read spilled image %s: %s", key, error)
+                self._disk_bytes -= self._spilled.pop(key)
+                return None
+            self._spilled.move_to_end(key)
+            self._disk_hits += 1
+            self._store(key, image)
+        else:
+            return None
+        self._hits += 1
+        self._bytes_saved += len(image)
+        return image
+
+    def _store(self, key, image):
+        previous = self._images.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._images[key] = image
+        self._memory_bytes += len(image)
+        while self._memory_bytes > self._max_bytes:
+            old_key, old_image = self._images.popitem(last=False)
+            self._memory_bytes -= len(old_image)
+            self._evictions += 1
+            if self._spill_directory is not None:
+                self._spill(old_key, old_image)
+
+    def _spill(self, key, image):
+        if key in self._spilled:
+            return
+        path = self._spill_path(key)
+        try:
+            with open(path + ".tmp", "wb") as file:
+                file.write(image)
+            os.replace(path + ".tmp", path)
+        except OSError as error:
+            _LOGGER.debug("Unable to spill image %s: %s", key, error)
+            return
+        self._spilled[key] = len(image)
+        self._disk_bytes += len(image)
+        self._trim_disk()
+
+    def _trim_disk(self):
+        while self._disk_bytes > self._max_disk_bytes and self._spilled:
+            key, size = self._spilled.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._spill_path(key))
+            except OSError:
+                pass
+
+    def _claim(self, key):
+        """Return a cached image, or the in-flight download of the key.
+
+        Returns (image, future, owner), where owner tells whether the
+        caller created the future and has to download the image.
+        """
+        with self._lock:
+            image = self._lookup(key)
+            if image is not None:
+                return image, None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                self._joined += 1
+                return None, future, False
+            self._misses += 1
+            future = self._inflight[key] = Future()
+            return None, future, True
+
+    def _joined_result(self, image):
+        """Count a caller that shared another caller's download as a hit."""
+        with self._lock:
+            self._hits += 1
+            self._bytes_saved += len(image)
+        return image
+
+    def _locked_store(self, key, image):
+        with self._lock:
+            self._store(key, image)
+
+    def _finish(self, key, future, image=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is None:
+            future.set_result(image)
+        else:
+            future.set_exception(error)
+
+    def get_image(self, doorbell, session=None, timeout=10):
+        """Return the image of a doorbell, downloading it on a miss.
+
+        session defaults to the requests session the cache was created
+        with. Concurrent callers, sync or async, share one download.
+        """
+        image_url = doorbell.image_url
+        key = image_cache_key(image_url, doorbell.image_created_at_datetime)
+        image, future, owner = self._claim(key)
+        if image is not None:
+            return image
+        if not owner:
+            return self._joined_result(future.result())
+
+        try:
+            response = _http_session(session or self._session).get(
+                image_url, timeout=timeout
+            )
+            response.raise_for_status()
+            image = response.content
+            self._locked_store(key, image)
+        except BaseException as error:
+            self._finish(key, future, error=error)
+            raise
+        self._finish(key, future, image)
+        return image
+
+    async def async_get_image(self, aiohttp_session, doorbell, timeout=10):
+        """Return the image of a doorbell, downloading it on a miss.
+
+        Concurrent callers, sync or async, share one download. Spilled
+        images are read and written in the default executor so the event
+        loop never blocks on disk I/O.
+        """
+        image_url = doorbell.image_url
+        key = image_cache_key(image_url, doorbell.image_created_at_datetime)
+        image, future, owner = await self._async_run(self._claim, key)
+        if image is not None:
+            return image
+        if owner:
+            # A separate task, so cancelling this caller does not cancel
+            # the download other callers are waiting for
+            asyncio.ensure_future(
+                self._async_download(aiohttp_session, key, image_url, timeout, future)
+            )
+        image = await asyncio.shield(asyncio.wrap_future(future))
+        return image if owner else self._joined_result(image)
+
+    async def _async_download(self, aiohttp_session, key, image_url, timeout, future):
+        try:
+            response = await aiohttp_session.request(
+                "get", image_url, timeout=timeout
+            )
+            try:
+                response.raise_for_status()
+                image = await response.read()
+            finally:
+                response.release()
+            await self._async_run(self._locked_store, key, image)
+        except asyncio.CancelledError as error:
+            self._finish(key, future, error=error)
+            raise
+        except Exception as error:  # pylint: disable=broad-except
+            # Raised to the callers waiting on the future
+            self._finish(key, future, error=error)
+        else:
+            self._finish(key, future, image)
+
+    def prefetch(self, doorbell, timeout=10):
+        """Download the image of a doorbell in the background.
+
+        With an aiohttp_session the download is a task on the running
+        event loop, so prefetch has to be called from the loop. Otherwise
+        it runs in a background thread with the requests session. Returns
+        the asyncio Task or concurrent.futures.Future of the image, which
+        is None when the download failed.
+        """
+        if self._aiohttp_session is not None:
+            return asyncio.ensure_future(self._async_prefetch(doorbell, timeout))
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=IMAGE_PREFETCH_WORKERS,
+                    thread_name_prefix="august-image",
+                )
+            executor = self._executor
+        return executor.submit(self._prefetch, doorbell, timeout)
+
+    def _prefetch(self, doorbell, timeout):
+        try:
+            return self.get_image(doorbell, timeout=timeout)
+        except Exception as error:  # pylint: disable=broad-except
+            _LOGGER.debug("Prefetching %s failed: %s", doorbell.image_url, error)
+            return None
+
+    async def _async_prefetch(self, doorbell, timeout):
+        try:
+            return await self.async_get_image(
+                self._aiohttp_session, doorbell, timeout
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            _LOGGER.debug("Prefetching %s failed: %s", doorbell.image_url, error)
+            return None
+
+    def _locked_lookup(self, key):
+        with self._lock:
+            image = self._lookup(key)
+            if image is None:
+                self._misses += 1
+            return image
+
+    async def _async_run(self, func, *args):
+        if self._spill_directory is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def close(self):
+        """Wait for running prefetches and stop the prefetch threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._memory_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "joined": self._joined,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "bytes_saved": self._bytes_saved,
+                "evictions": self._evictions,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "images": len(self._images),
+                "spilled_images": len(self._spilled),
+            }
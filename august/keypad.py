@@ -6,6 +6,8 @@ BATTERY_LEVEL_LOW = "Low"
 
 
 class KeypadDetail(DeviceDetail):
+    __slots__ = ("_battery_level",)
+
     def __init__(self, house_id, keypad_name, data):
         super().__init__(
             data["_id"],
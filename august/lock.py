@@ -1,9 +1,13 @@
 from enum import Enum
 
 import datetime
-import dateutil.parser
 
 from august.bridge import BridgeDetail, BridgeStatus
+from august.dateparse import (
+    datetime_to_epoch_ms,
+    epoch_ms_to_datetime,
+    parse_datetime,
+)
 from august.device import Device, DeviceDetail
 from august.keypad import KeypadDetail
 
@@ -14,6 +18,8 @@ OPEN_STATUS = ("open", "kAugLockDoorState_Open", "kAugDoorState_Open")
 
 
 class Lock(Device):
+    __slots__ = ("_user_type",)
+
     def __init__(self, device_id, data):
         super().__init__(
             device_id, data["LockName"], data["HouseID"],
@@ -31,6 +37,18 @@ class Lock(Device):
 
 
 class LockDetail(DeviceDetail):
+    __slots__ = (
+        "_bridge",
+        "_doorsense",
+        "_lock_status",
+        "_door_state",
+        "_lock_status_epoch_ms",
+        "_door_state_epoch_ms",
+        "_model",
+        "_keypad_detail",
+        "_battery_level",
+    )
+
     def __init__(self, data):
         super().__init__(
             data["LockID"],
@@ -48,8 +66,8 @@ class LockDetail(DeviceDetail):
         self._doorsense = False
         self._lock_status = LockStatus.UNKNOWN
         self._door_state = LockDoorStatus.UNKNOWN
-        self._lock_status_datetime = None
-        self._door_state_datetime = None
+        self._lock_status_epoch_ms = None
+        self._door_state_epoch_ms = None
         self._model = None
 
         if "LockStatus" in data:
@@ -59,10 +77,10 @@ class LockDetail(DeviceDetail):
             self._door_state = determine_door_state(lock_status.get("doorState"))
 
             if "dateTime" in lock_status:
-                self._lock_status_datetime = dateutil.parser.parse(
-                    lock_status["dateTime"]
+                self._lock_status_epoch_ms = datetime_to_epoch_ms(
+                    parse_datetime(lock_status["dateTime"])
                 )
-                self._door_state_datetime = self._lock_status_datetime
+                self._door_state_epoch_ms = self._lock_status_epoch_ms
 
             if "doorState" in lock_status and lock_status["doorState"] != "init":
                 self._doorsense = True
@@ -125,16 +143,27 @@ class LockDetail(DeviceDetail):
             raise ValueError
         self._lock_status = var
 
+    @property
+    def lock_status_epoch_ms(self):
+        return self._lock_status_epoch_ms
+
+    @lock_status_epoch_ms.setter
+    def lock_status_epoch_ms(self, var):
+        """Update the lock status time (usually form the activity log)."""
+        if not isinstance(var, int):
+            raise ValueError
+        self._lock_status_epoch_ms = var
+
     @property
     def lock_status_datetime(self):
-        return self._lock_status_datetime
+        return epoch_ms_to_datetime(self._lock_status_epoch_ms)
 
     @lock_status_datetime.setter
     def lock_status_datetime(self, var):
         """Update the lock status datetime (usually form the activity log)."""
-        if not isinstance(var, datetime.date):
+        if not isinstance(var, datetime.datetime):
             raise ValueError
-        self._lock_status_datetime = var
+        self._lock_status_epoch_ms = datetime_to_epoch_ms(var)
 
     @property
     def door_state(self):
@@ -147,16 +176,27 @@ class LockDetail(DeviceDetail):
             raise ValueError
         self._door_state = var
 
+    @property
+    def door_state_epoch_ms(self):
+        return self._door_state_epoch_ms
+
+    @door_state_epoch_ms.setter
+    def door_state_epoch_ms(self, var):
+        """Update the door state time (usually form the activity log)."""
+        if not isinstance(var, int):
+            raise ValueError
+        self._door_state_epoch_ms = var
+
     @property
     def door_state_datetime(self):
-        return self._door_state_datetime
+        return epoch_ms_to_datetime(self._door_state_epoch_ms)
 
     @door_state_datetime.setter
     def door_state_datetime(self, var):
         """Update the door state datetime (usually form the activity log)."""
-        if not isinstance(var, datetime.date):
+        if not isinstance(var, datetime.datetime):
             raise ValueError
-        self._door_state_datetime = var
+        self._door_state_epoch_ms = datetime_to_epoch_ms(var)
 
 
 class LockStatus(Enum):
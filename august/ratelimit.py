@@ -0,0 +1,110 @@
+"""Client side rate limiting shared between async and sync."""
+
+import threading
+import time
+
+from august.api_common import _endpoint_for_url
+
+RATE_LIMIT_GLOBAL = "global"
+
+
+class TokenBucket:
+    """A token bucket that hands out reservations instead of blocking.
+
+    Taking a token never waits; when the bucket is empty the level goes
+    negative and the caller is told how long to wait for its token.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._rate = rate
+        self._capacity = rate if capacity is None else capacity
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def _refill(self, now):
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    def level(self, now):
+        """Return the tokens available; negative when requests are queued."""
+        self._refill(now)
+        return self._tokens
+
+    def reserve(self, now):
+        """Take a token and return the seconds until it is available."""
+        self._refill(now)
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self._rate
+
+
+class RateLimiter:
+    """Global and per-endpoint token buckets.
+
+    endpoint_limits maps an API_*_URL template from august.api_common to
+    a (rate, capacity) tuple. One limiter can be passed to any number of
+    Api and ApiAsync instances so they share the same budget.
+    """
+
+    def __init__(self, rate=None, capacity=None, endpoint_limits=None):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        if rate is not None:
+            self._buckets[RATE_LIMIT_GLOBAL] = TokenBucket(rate, capacity)
+        for endpoint, (endpoint_rate, endpoint_capacity) in (
+            endpoint_limits or {}
+        ).items():
+            self._buckets[endpoint] = TokenBucket(endpoint_rate, endpoint_capacity)
+        self._delayed = 0
+        self._total_delay = 0.0
+
+    @property
+    def delayed(self):
+        """Number of requests that were held back."""
+        return self._delayed
+
+    @property
+    def total_delay(self):
+        """Seconds requests were held back in total."""
+        return self._total_delay
+
+    def reserve(self, url):
+        """Reserve a slot for a request and return the seconds to wait."""
+        global_bucket = self._buckets.get(RATE_LIMIT_GLOBAL)
+        endpoint_bucket = self._buckets.get(_endpoint_for_url(url))
+        if global_bucket is None and endpoint_bucket is None:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            for bucket in (global_bucket, endpoint_bucket):
+                if bucket is not None:
+                    delay = max(delay, bucket.reserve(now))
+            if delay:
+                self._delayed += 1
+                self._total_delay += delay
+
+        return delay
+
+    def levels(self):
+        """Return the current level of every bucket keyed by endpoint."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                endpoint: bucket.level(now)
+                for endpoint, bucket in self._buckets.items()
+            }
@@ -0,0 +1,138 @@
+"""Retry policy for throttled api calls shared between async and sync."""
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+
+from august.api_common import API_RETRY_ATTEMPTS, API_RETRY_TIME
+
+# The longest single wait between two attempts
+API_RETRY_MAX_TIME = 10
+# The total time budget for all attempts of one api call
+API_RETRY_DEADLINE = 30
+
+RETRY_STATUS_CODES = (429,)
+
+
+def parse_retry_after(value, now=None):
+    """Return the number of seconds a Retry-After header asks us to wait.
+
+    The header may either be a number of seconds or an HTTP date. None is
+    returned when the header is missing or cannot be parsed.
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    if now is None:
+        now = datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for throttled responses.
+
+    One policy may be shared by many Api/ApiAsync instances and threads;
+    the counters are aggregated across all of them.
+    """
+
+    def __init__(
+        self,
+        max_attempts=API_RETRY_ATTEMPTS,
+        base_delay=API_RETRY_TIME,
+        max_delay=API_RETRY_MAX_TIME,
+        deadline=API_RETRY_DEADLINE,
+        jitter=0.5,
+        retry_status_codes=RETRY_STATUS_CODES,
+    ):
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._deadline = deadline
+        self._jitter = jitter
+        self._retry_status_codes = frozenset(retry_status_codes)
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._exhausted = 0
+        self._total_delay = 0.0
+
+    @property
+    def max_attempts(self):
+        return self._max_attempts
+
+    @property
+    def deadline(self):
+        return self._deadline
+
+    @property
+    def retries(self):
+        """Number of retries scheduled by this policy."""
+        return self._retries
+
+    @property
+    def exhausted(self):
+        """Number of calls that were still throttled when the policy gave up."""
+        return self._exhausted
+
+    @property
+    def total_delay(self):
+        """Seconds spent waiting between attempts."""
+        return self._total_delay
+
+    def stats(self):
+        with self._lock:
+            return {
+                "retries": self._retries,
+                "exhausted": self._exhausted,
+                "total_delay": self._total_delay,
+            }
+
+    def should_retry(self, status):
+        return status in self._retry_status_codes
+
+    def backoff(self, attempt):
+        """Return the jittered backoff to wait after the given attempt."""
+        delay = min(self._max_delay, self._base_delay * (2 ** (attempt - 1)))
+        if self._jitter:
+            delay -= delay * self._jitter * random.random()
+        return delay
+
+    def next_delay(self, attempt, started, retry_after=None):
+        """Return the seconds to wait before the next attempt.
+
+        attempt is the number of attempts made so far and started the
+        time.monotonic() value from before the first one. retry_after is
+        the raw Retry-After header, if any. None is returned when the
+        attempts or the deadline budget are used up.
+        """
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.backoff(attempt)
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            if attempt >= self._max_attempts or (
+                self._deadline is not None and elapsed + delay > self._deadline
+            ):
+                self._exhausted += 1
+                return None
+            self._retries += 1
+            self._total_delay += delay
+
+        return delay
@@ -0,0 +1,248 @@
+"""Adaptive scheduling of house activity and device detail polls."""
+
+import asyncio
+import logging
+import time
+
+from august.doorbell import DoorbellDetail
+from august.lock import LockDetail
+
+_LOGGER = logging.getLogger(__name__)
+
+POLL_HOUSE_ACTIVITIES = "house_activities"
+POLL_LOCK_DETAIL = "lock_detail"
+POLL_DOORBELL_DETAIL = "doorbell_detail"
+
+# Interval right after an event or a command
+SCHEDULE_MIN_INTERVAL = 5
+# Interval a quiet target backs off to
+SCHEDULE_MAX_INTERVAL = 900
+SCHEDULE_BACKOFF_FACTOR = 2
+# Interval devices behind an offline bridge are checked at
+SCHEDULE_OFFLINE_INTERVAL = 1800
+
+_NOT_POLLED = object()
+
+
+class _PollTarget:
+    __slots__ = (
+        "kind",
+        "target_id",
+        "interval",
+        "next_poll",
+        "paused",
+        "signature",
+    )
+
+    def __init__(self, kind, target_id, interval, next_poll):
+        self.kind = kind
+        self.target_id = target_id
+        self.interval = interval
+        self.next_poll = next_poll
+        self.paused = False
+        self.signature = _NOT_POLLED
+
+
+def _detail_signature(detail):
+    if isinstance(detail, LockDetail):
+        return (
+            detail.lock_status,
+            detail.lock_status_epoch_ms,
+            detail.door_state,
+            detail.door_state_epoch_ms,
+        )
+    return (detail.status, detail.image_url)
+
+
+def _detail_is_offline(detail):
+    if isinstance(detail, LockDetail):
+        return detail.bridge is not None and not detail.bridge_is_online
+    if isinstance(detail, DoorbellDetail):
+        return not (detail.is_online or detail.is_standby)
+    return False
+
+
+class PollScheduler:
+    """Decides when every house and device should be polled.
+
+    A target is polled at min_interval right after it was added, had an
+    event or was sent a command, and its interval grows by
+    backoff_factor after every poll that found nothing new, up to
+    max_interval. Devices whose bridge (or the doorbell itself) is
+    offline are paused and only checked every offline_interval.
+    """
+
+    def __init__(
+        self,
+        min_interval=SCHEDULE_MIN_INTERVAL,
+        max_interval=SCHEDULE_MAX_INTERVAL,
+        backoff_factor=SCHEDULE_BACKOFF_FACTOR,
+        offline_interval=SCHEDULE_OFFLINE_INTERVAL,
+        clock=time.monotonic,
+    ):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("min_interval must be positive and at most max_interval")
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._backoff_factor = backoff_factor
+        self._offline_interval = offline_interval
+        self._clock = clock
+        self._targets = {}
+        self._device_houses = {}
+
+    def add_house(self, house_id):
+        self._add(POLL_HOUSE_ACTIVITIES, house_id)
+
+    def add_lock(self, lock_id, house_id=None):
+        self._add(POLL_LOCK_DETAIL, lock_id)
+        if house_id is not None:
+            self._device_houses[lock_id] = house_id
+
+    def add_doorbell(self, doorbell_id, house_id=None):
+        self._add(POLL_DOORBELL_DETAIL, doorbell_id)
+        if house_id is not None:
+            self._device_houses[doorbell_id] = house_id
+
+    def _add(self, kind, target_id):
+        if (kind, target_id) not in self._targets:
+            self._targets[(kind, target_id)] = _PollTarget(
+                kind, target_id, self._min_interval, self._clock()
+            )
+
+    def remove(self, kind, target_id):
+        self._targets.pop((kind, target_id), None)
+        self._device_houses.pop(target_id, None)
+
+    def schedule(self):
+        """Return the planned polls, soonest first."""
+        now = self._clock()
+        return [
+            {
+                "kind": target.kind,
+                "target_id": target.target_id,
+                "due_in": max(0.0, target.next_poll - now),
+                "interval": target.interval,
+                "paused": target.paused,
+            }
+            for target in sorted(self._targets.values(), key=lambda t: t.next_poll)
+        ]
+
+    def due(self):
+        """Return the (kind, target id) of every poll that is due."""
+        now = self._clock()
+        return [
+            (target.kind, target.target_id)
+            for target in sorted(self._targets.values(), key=lambda t: t.next_poll)
+            if target.next_poll <= now
+        ]
+
+    def seconds_until_due(self):
+        """Return the seconds until the next poll, None without targets."""
+        if not self._targets:
+            return None
+        next_poll = min(target.next_poll for target in self._targets.values())
+        return max(0.0, next_poll - self._clock())
+
+    def record_poll(self, kind, target_id, changed):
+        """Schedule the next poll of a target after it was polled."""
+        target = self._targets.get((kind, target_id))
+        if target is None:
+            return
+        if target.paused:
+            target.interval = self._offline_interval
+        elif changed:
+            target.interval = self._min_interval
+        else:
+            target.interval = min(
+                self._max_interval, target.interval * self._backoff_factor
+            )
+        target.next_poll = self._clock() + target.interval
+
+    def record_event(self, device_id):
+        """Poll a device and its house soon after an event or a command."""
+        now = self._clock()
+        keys = [(POLL_LOCK_DETAIL, device_id), (POLL_DOORBELL_DETAIL, device_id)]
+        house_id = self._device_houses.get(device_id)
+        if house_id is not None:
+            keys.append((POLL_HOUSE_ACTIVITIES, house_id))
+        for key in keys:
+            target = self._targets.get(key)
+            if target is None or target.paused:
+                continue
+            target.interval = self._min_interval
+            target.next_poll = min(target.next_poll, now + self._min_interval)
+
+    def record_activities(self, house_id, activities):
+        """Record a house activity poll; returns whether it changed."""
+        target = self._targets.get((POLL_HOUSE_ACTIVITIES, house_id))
+        if target is None:
+            return False
+        previous = target.signature
+        newest = max(
+            (activity.activity_start_epoch_ms for activity in activities), default=None
+        )
+        changed = previous is not _NOT_POLLED and newest != previous
+        target.signature = newest
+        self.record_poll(POLL_HOUSE_ACTIVITIES, house_id, changed)
+        if changed:
+            for activity in activities:
+                if previous is None or activity.activity_start_epoch_ms > previous:
+                    self.record_event(activity.device_id)
+        return changed
+
+    def record_detail(self, kind, detail):
+        """Record a device detail poll; returns whether it changed.
+
+        Devices behind an offline bridge are paused until a later detail
+        reports the bridge online again.
+        """
+        target = self._targets.get((kind, detail.device_id))
+        if target is None:
+            return False
+        signature = _detail_signature(detail)
+        changed = target.signature not in (_NOT_POLLED, signature)
+        target.signature = signature
+        offline = _detail_is_offline(detail)
+        if offline != target.paused:
+            _LOGGER.debug(
+                "%s %s", "Pausing" if offline else "Resuming", detail.device_id
+            )
+            target.paused = offline
+            if not offline:
+                target.interval = self._min_interval
+        self.record_poll(kind, detail.device_id, changed)
+        return changed
+
+    async def async_poll_due(self, api, access_token):
+        """Run the polls that are due with an ApiAsync.
+
+        Returns a dict mapping (kind, target id) to the poll result, or to
+        the exception it raised.
+        """
+        due = self.due()
+        results = await asyncio.gather(
+            *(
+                self._async_poll(api, access_token, kind, target_id)
+                for kind, target_id in due
+            ),
+            return_exceptions=True
+        )
+        for (kind, target_id), result in zip(due, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, Exception):
+                _LOGGER.debug("Polling %s %s failed: %s", kind, target_id, result)
+                self.record_poll(kind, target_id, False)
+            elif kind == POLL_HOUSE_ACTIVITIES:
+                self.record_activities(target_id, result)
+            else:
+                self.record_detail(kind, result)
+        return dict(zip(due, results))
+
+    @staticmethod
+    async def _async_poll(api, access_token, kind, target_id):
+        if kind == POLL_HOUSE_ACTIVITIES:
+            return await api.async_get_house_activities(access_token, target_id)
+        if kind == POLL_LOCK_DETAIL:
+            return await api.async_get_lock_detail(access_token, target_id)
+        return await api.async_get_doorbell_detail(access_token, target_id)
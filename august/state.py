@@ -0,0 +1,222 @@
+"""Current state of the devices of an account with change notifications."""
+
+import asyncio
+import logging
+import threading
+
+from august.api_common import _convert_lock_result_to_activities
+from august.doorbell import DoorbellDetail
+from august.lock import LockDetail
+from august.util import update_details_from_activities
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_LOCK_STATUS = "lock_status"
+STATE_DOOR_STATE = "door_state"
+STATE_BATTERY_LEVEL = "battery_level"
+STATE_IMAGE_URL = "image_url"
+
+_WATCHED_ATTRIBUTES = {
+    LockDetail: (STATE_LOCK_STATUS, STATE_DOOR_STATE, STATE_BATTERY_LEVEL),
+    DoorbellDetail: (STATE_BATTERY_LEVEL, STATE_IMAGE_URL),
+}
+
+
+def _watched_attributes(detail):
+    for detail_class, attributes in _WATCHED_ATTRIBUTES.items():
+        if isinstance(detail, detail_class):
+            return attributes
+    raise ValueError("Unsupported detail {!r}".format(detail))
+
+
+class DeviceStateChange:
+    """A watched attribute of a device that changed value."""
+
+    __slots__ = ("_device_id", "_attribute", "_old_value", "_new_value")
+
+    def __init__(self, device_id, attribute, old_value, new_value):
+        self._device_id = device_id
+        self._attribute = attribute
+        self._old_value = old_value
+        self._new_value = new_value
+
+    @property
+    def device_id(self):
+        return self._device_id
+
+    @property
+    def attribute(self):
+        return self._attribute
+
+    @property
+    def old_value(self):
+        return self._old_value
+
+    @property
+    def new_value(self):
+        return self._new_value
+
+    def __eq__(self, other):
+        if not isinstance(other, DeviceStateChange):
+            return NotImplemented
+        return (
+            self._device_id,
+            self._attribute,
+            self._old_value,
+            self._new_value,
+        ) == (
+            other._device_id,
+            other._attribute,
+            other._old_value,
+            other._new_value,
+        )
+
+    def __repr__(self):
+        return "DeviceStateChange(device_id={}, attribute={}, {!r} -> {!r})".format(
+            self._device_id, self._attribute, self._old_value, self._new_value
+        )
+
+
+class DeviceStateStore:
+    """Owns the LockDetail and DoorbellDetail objects of an account.
+
+    Details, lock operation results and polled activities are ingested
+    through the update methods, which return the DeviceStateChanges they
+    caused. Only the devices touched by an update are diffed. Callbacks
+    registered with subscribe() receive the list of changes of every
+    update, queues created with async_subscribe() receive each change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._details = {}
+        self._snapshots = {}
+        self._callbacks = []
+        self._queues = []
+
+    def __len__(self):
+        return len(self._details)
+
+    def __contains__(self, device_id):
+        return device_id in self._details
+
+    @property
+    def device_ids(self):
+        return list(self._details)
+
+    def get(self, device_id):
+        """Return the detail of a device, or None if it is unknown."""
+        return self._details.get(device_id)
+
+    def subscribe(self, callback, device_id=None):
+        """Call callback with a list of changes after every update.
+
+        With device_id only changes of that device are passed. Returns a
+        function that removes the subscription.
+        """
+        subscription = (callback, device_id)
+        with self._lock:
+            self._callbacks.append(subscription)
+
+        def unsubscribe():
+            with self._lock:
+                if subscription in self._callbacks:
+                    self._callbacks.remove(subscription)
+
+        return unsubscribe
+
+    def async_subscribe(self, device_id=None):
+        """Return an asyncio.Queue that receives every change.
+
+        The queue is bound to the running event loop; updates from other
+        threads are handed over to it safely.
+        """
+        queue = asyncio.Queue()
+        with self._lock:
+            self._queues.append((queue, asyncio.get_running_loop(), device_id))
+        return queue
+
+    def async_unsubscribe(self, queue):
+        with self._lock:
+            self._queues = [entry for entry in self._queues if entry[0] is not queue]
+
+    def update_detail(self, detail):
+        """Store a detail fetched from the api, replacing the previous one."""
+        _watched_attributes(detail)
+        with self._lock:
+            self._details[detail.device_id] = detail
+            changes = self._diff([detail.device_id])
+        self._notify(changes)
+        return changes
+
+    def update_details(self, details):
+        details = list(details)
+        with self._lock:
+            for detail in details:
+                _watched_attributes(detail)
+                self._details[detail.device_id] = detail
+            changes = self._diff([detail.device_id for detail in details])
+        self._notify(changes)
+        return changes
+
+    def remove(self, device_id):
+        with self._lock:
+            self._details.pop(device_id, None)
+            self._snapshots.pop(device_id, None)
+
+    def update_from_activities(self, activities):
+        """Apply polled activities to the stored details."""
+        with self._lock:
+            changed = update_details_from_activities(activities, self._details)
+            changes = self._diff(changed)
+        self._notify(changes)
+        return changes
+
+    def update_from_lock_result(self, lock_json_dict):
+        """Apply the json returned by a remote lock or unlock operation."""
+        return self.update_from_activities(
+            _convert_lock_result_to_activities(lock_json_dict)
+        )
+
+    def _diff(self, device_ids):
+        changes = []
+        for device_id in device_ids:
+            detail = self._details[device_id]
+            attributes = _watched_attributes(detail)
+            snapshot = tuple(getattr(detail, attribute) for attribute in attributes)
+            previous = self._snapshots.get(device_id)
+            self._snapshots[device_id] = snapshot
+            if previous is None:
+                previous = (None,) * len(attributes)
+            for attribute, old_value, new_value in zip(attributes, previous, snapshot):
+                if old_value != new_value:
+                    changes.append(
+                        DeviceStateChange(device_id, attribute, old_value, new_value)
+                    )
+        return changes
+
+    def _notify(self, changes):
+        if not changes:
+            return
+        with self._lock:
+            callbacks = list(self._callbacks)
+            queues = list(self._queues)
+
+        for callback, device_id in callbacks:
+            if device_id is None:
+                device_changes = changes
+            else:
+                device_changes = [
+                    change for change in changes if change.device_id == device_id
+                ]
+                if not device_changes:
+                    continue
+            try:
+                callback(device_changes)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error in device state callback %s", callback)
+
+        for queue, loop, device_id in queues:
+            for change in changes:
+                if device_id is None or change.device_id == device_id:
+                    loop.call_soon_threadsafe(queue.put_nowait, change)
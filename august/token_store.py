@@ -0,0 +1,285 @@
+"""Stores for the Authentication of accounts."""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+
+from august.authenticator_common import (
+    Authentication,
+    AuthenticationState,
+    authentication_to_dict,
+    from_authentication_json,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _token_fields(authentication):
+    return (
+        authentication.install_id,
+        authentication.access_token,
+        authentication.access_token_expires,
+        authentication.state,
+    )
+
+
+class TokenStore:
+    """Keeps the Authentication of accounts keyed by login identifier.
+
+    Subclasses implement _load_all, _get, _set and _delete. set() skips
+    the write when the account's token did not change since it was last
+    read or written. The async_ methods run blocking stores in the
+    default executor, so they never block the event loop on I/O.
+    """
+
+    _blocking = True
+
+    def __init__(self):
+        self._known_lock = threading.Lock()
+        self._known = {}
+        self._writes = 0
+        self._skipped_writes = 0
+
+    @property
+    def writes(self):
+        return self._writes
+
+    @property
+    def skipped_writes(self):
+        return self._skipped_writes
+
+    def _remember(self, account, authentication):
+        with self._known_lock:
+            if authentication is None:
+                self._known.pop(account, None)
+            else:
+                self._known[account] = _token_fields(authentication)
+
+    def load_all(self):
+        """Return a dict of account to Authentication for every account."""
+        authentications = self._load_all()
+        for account, authentication in authentications.items():
+            self._remember(account, authentication)
+        return authentications
+
+    def get(self, account):
+        authentication = self._get(account)
+        self._remember(account, authentication)
+        return authentication
+
+    def set(self, account, authentication):
+        """Store the Authentication of an account, returns whether it wrote."""
+        fields = _token_fields(authentication)
+        with self._known_lock:
+            if self._known.get(account) == fields:
+                self._skipped_writes += 1
+                return False
+        self._set(account, authentication)
+        with self._known_lock:
+            self._known[account] = fields
+            self._writes += 1
+        return True
+
+    def delete(self, account):
+        self._delete(account)
+        self._remember(account, None)
+
+    async def async_load_all(self):
+        return await self._async_run(self.load_all)
+
+    async def async_get(self, account):
+        return await self._async_run(self.get, account)
+
+    async def async_set(self, account, authentication):
+        return await self._async_run(self.set, account, authentication)
+
+    async def async_delete(self, account):
+        return await self._async_run(self.delete, account)
+
+    async def _async_run(self, func, *args):
+        if not self._blocking:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _load_all(self):
+        raise NotImplementedError
+
+    def _get(self, account):
+        raise NotImplementedError
+
+    def _set(self, account, authentication):
+        raise NotImplementedError
+
+    def _delete(self, account):
+        raise NotImplementedError
+
+
+class MemoryTokenStore(TokenStore):
+    """Keeps tokens in memory only, for tests and short-lived processes."""
+
+    _blocking = False
+
+    def __init__(self):
+        super().__init__()
+        self._authentications = {}
+
+    def _load_all(self):
+        return dict(self._authentications)
+
+    def _get(self, account):
+        return self._authentications.get(account)
+
+    def _set(self, account, authentication):
+        self._authentications[account] = authentication
+
+    def _delete(self, account):
+        self._authentications.pop(account, None)
+
+
+class FileTokenStore(TokenStore):
+    """Keeps the token of a single account in a JSON file.
+
+    The file uses the format of access_token_cache_file, which does not
+    record the account, so get() returns the stored token for any
+    account. Writes go to a temporary file that is then renamed over the
+    old one, so a crash never leaves a truncated file behind.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self._path = path
+
+    @property
+    def path(self):
+        return self._path
+
+    def _read(self):
+        if not os.path.exists(self._path):
+            return None, None
+        try:
+            with open(self._path, "r") as file:
+                data = json.load(file)
+            if not data:
+                return None, None
+            return data.get("account"), from_authentication_json(data)
+        except (ValueError, KeyError) as error:
+            _LOGGER.error("Unable to read cache file (%s): %s", self._path, error)
+            return None, None
+
+    def _load_all(self):
+        account, authentication = self._read()
+        return {} if authentication is None else {account: authentication}
+
+    def _get(self, account):
+        return self._read()[1]
+
+    def _set(self, account, authentication):
+        data = authentication_to_dict(authentication)
+        data["account"] = account
+        directory = os.path.dirname(os.path.abspath(self._path))
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=".august-", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(data, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self._path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _delete(self, account):
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+
+class SQLiteTokenStore(TokenStore):
+    """Keeps the Authentication of every account in one SQLite file.
+
+    All tokens are loaded with a single query, and the expiry is indexed
+    so the accounts that expire first are cheap to find.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self._path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                "account TEXT PRIMARY KEY, "
+                "install_id TEXT, "
+                "access_token TEXT, "
+                "access_token_expires TEXT, "
+                "expires_epoch INTEGER, "
+                "state TEXT)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS tokens_expires_epoch "
+                "ON tokens (expires_epoch)"
+            )
+
+    @property
+    def path(self):
+        return self._path
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _load_all(self):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT account, install_id, access_token, access_token_expires, "
+                "state FROM tokens"
+            ).fetchall()
+        return {row[0]: _authentication_from_row(row[1:]) for row in rows}
+
+    def _get(self, account):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT install_id, access_token, access_token_expires, state "
+                "FROM tokens WHERE account = ?",
+                (account,),
+            ).fetchone()
+        return None if row is None else _authentication_from_row(row)
+
+    def _set(self, account, authentication):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    account,
+                    authentication.install_id,
+                    authentication.access_token,
+                    authentication.access_token_expires,
+                    authentication.access_token_expires_epoch,
+                    authentication.state.value,
+                ),
+            )
+
+    def _delete(self, account):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM tokens WHERE account = ?", (account,))
+
+    def expiries(self):
+        """Return (account, expiry epoch) pairs, the soonest expiry first."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT account, expires_epoch FROM tokens "
+                "WHERE expires_epoch IS NOT NULL ORDER BY expires_epoch"
+            ).fetchall()
+
+
+def _authentication_from_row(row):
+    install_id, access_token, access_token_expires, state = row
+    return Authentication(
+        AuthenticationState(state), install_id, access_token, access_token_expires
+    )
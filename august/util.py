@@ -1,4 +1,5 @@
 import datetime
+import functools
 
 from august.activity import (
     ACTIVITY_ACTION_STATES,
@@ -6,31 +7,49 @@ from august.activity import (
     DoorOperationActivity,
     LockOperationActivity,
 )
+from august.doorbell import DoorbellDetail
+from august.lock import LockDetail
+
+_ACTIVITY_KIND_LOCK = "lock"
+_ACTIVITY_KIND_DOOR = "door"
+_ACTIVITY_KIND_IMAGE = "image"
 
 
 def update_lock_detail_from_activity(lock_detail, activity):
     """Update the LockDetail from an activity."""
-    activity_end_time_utc = as_utc_from_local(activity.activity_end_time)
+    activity_end_epoch_ms = activity.activity_end_epoch_ms
     if activity.device_id != lock_detail.device_id:
         raise ValueError
     if isinstance(activity, LockOperationActivity):
-        if lock_detail.lock_status_datetime >= activity_end_time_utc:
+        if (
+            lock_detail.lock_status_epoch_ms is not None
+            and lock_detail.lock_status_epoch_ms >= activity_end_epoch_ms
+        ):
             return False
         lock_detail.lock_status = ACTIVITY_ACTION_STATES[activity.action]
-        lock_detail.lock_status_datetime = activity_end_time_utc
+        lock_detail.lock_status_epoch_ms = activity_end_epoch_ms
     elif isinstance(activity, DoorOperationActivity):
-        if lock_detail.door_state_datetime >= activity_end_time_utc:
+        if (
+            lock_detail.door_state_epoch_ms is not None
+            and lock_detail.door_state_epoch_ms >= activity_end_epoch_ms
+        ):
             return False
         lock_detail.door_state = ACTIVITY_ACTION_STATES[activity.action]
-        lock_detail.door_state_datetime = activity_end_time_utc
+        lock_detail.door_state_epoch_ms = activity_end_epoch_ms
     else:
         raise ValueError
 
     return True
 
 
-def update_doorbell_image_from_activity(doorbell_detail, activity):
-    """Update the DoorDetail from an activity with a new image."""
+def update_doorbell_image_from_activity(
+    doorbell_detail, activity, image_cache=None
+):
+    """Update the DoorDetail from an activity with a new image.
+
+    When an ImageCache is passed the new image is prefetched into it in
+    the background, with the session the cache was created with.
+    """
     if activity.device_id != doorbell_detail.device_id:
         raise ValueError
     if isinstance(activity, DoorbellMotionActivity):
@@ -44,6 +63,8 @@ def update_doorbell_image_from_activity(doorbell_detail, activity):
             doorbell_detail.image_created_at_datetime = (
                 activity.image_created_at_datetime
             )
+            if image_cache is not None:
+                image_cache.prefetch(activity)
         else:
             return False
     else:
@@ -52,6 +73,66 @@ def update_doorbell_image_from_activity(doorbell_detail, activity):
     return True
 
 
+@functools.lru_cache(maxsize=None)
+def _activity_kind(activity_class):
+    if issubclass(activity_class, LockOperationActivity):
+        return _ACTIVITY_KIND_LOCK
+    if issubclass(activity_class, DoorOperationActivity):
+        return _ACTIVITY_KIND_DOOR
+    if issubclass(activity_class, DoorbellMotionActivity):
+        return _ACTIVITY_KIND_IMAGE
+    return None
+
+
+def update_details_from_activities(
+    activities, details_by_device_id, image_cache=None
+):
+    """Update LockDetails and DoorbellDetails from a batch of activities.
+
+    Only the newest lock, door and image activity of every device is
+    applied. Activities of devices that are not in details_by_device_id,
+    or that do not apply to the type of their detail, are skipped.
+    New doorbell images are prefetched into image_cache when given.
+    Returns the set of device ids whose detail changed.
+    """
+    newest = {}
+    for activity in activities:
+        kind = _activity_kind(type(activity))
+        if kind is None:
+            continue
+        if kind == _ACTIVITY_KIND_IMAGE:
+            if activity.image_created_at_datetime is None:
+                continue
+            timestamp = (
+                activity.image_created_at_datetime,
+                activity.activity_end_epoch_ms,
+            )
+        else:
+            timestamp = activity.activity_end_epoch_ms
+        key = (activity.device_id, kind)
+        current = newest.get(key)
+        if current is None or current[0] < timestamp:
+            newest[key] = (timestamp, activity)
+
+    changed = set()
+    for (device_id, kind), (_, activity) in newest.items():
+        detail = details_by_device_id.get(device_id)
+        if kind == _ACTIVITY_KIND_IMAGE:
+            if not isinstance(detail, DoorbellDetail):
+                continue
+            updated = update_doorbell_image_from_activity(
+                detail, activity, image_cache
+            )
+        else:
+            if not isinstance(detail, LockDetail):
+                continue
+            updated = update_lock_detail_from_activity(detail, activity)
+        if updated:
+            changed.add(device_id)
+
+    return changed
+
+
 def as_utc_from_local(dtime):
     """Converts the datetime returned from an activity to UTC."""
     return dtime.astimezone(tz=datetime.timezone.utc)
@@ -1,3 +1,4 @@
+import datetime
 import json
 import unittest
 import os
@@ -18,7 +19,18 @@ from august.activity import (
     ACTIVITY_ACTIONS_DOORBELL_MOTION,
     ACTIVITY_ACTIONS_DOORBELL_VIEW,
     ACTIVITY_ACTIONS_LOCK_OPERATION,
+    Activity,
+    ActivityType,
+    DoorbellDingActivity,
+    DoorbellMotionActivity,
+    DoorbellViewActivity,
+    DoorOperationActivity,
     LockOperationActivity,
+    activity_from_dict,
+    activity_types,
+    register_activity_type,
+    unknown_actions,
+    unregister_activity_type,
 )
 from august.lock import LockDoorStatus, LockStatus
 
@@ -121,3 +133,131 @@ class TestActivity(unittest.TestCase):
         assert auto_relock_operation_activity.operated_remote is False
         assert auto_relock_operation_activity.operated_autorelock is True
         assert auto_relock_operation_activity.operated_keypad is False
+
+    def test_activity_epoch_ms(self):
+        lock_activity = LockOperationActivity(
+            json.loads(load_fixture("unlock_activity.json"))
+        )
+        self.assertEqual(1582007217000, lock_activity.activity_start_epoch_ms)
+        self.assertEqual(1582007217000, lock_activity.activity_end_epoch_ms)
+        self.assertEqual(
+            datetime.datetime.fromtimestamp(1582007217),
+            lock_activity.activity_end_time,
+        )
+
+        ding_activity = DoorbellDingActivity(
+            {
+                "action": ACTION_DOORBELL_CALL_MISSED,
+                "info": {"started": 1000, "ended": 2500},
+            }
+        )
+        self.assertEqual(1000, ding_activity.activity_start_epoch_ms)
+        self.assertEqual(2500, ding_activity.activity_end_epoch_ms)
+        self.assertEqual(
+            datetime.datetime.fromtimestamp(2.5), ding_activity.activity_end_time
+        )
+
+    def test_lazy_activity_decodes_on_access(self):
+        data = json.loads(load_fixture("bluetooth_lock_activity.json"))
+        eager = LockOperationActivity(data)
+        lazy = LockOperationActivity(data, lazy=True)
+
+        self.assertIsNone(eager._data)
+        self.assertIs(data, lazy._data)
+        with self.assertRaises(AttributeError):
+            lazy._operated_by  # pylint: disable=pointless-statement
+
+        assert lazy.operated_by == "I have a picture"
+        assert lazy._operated_by == "I have a picture"
+        for name in (
+            "activity_id",
+            "house_id",
+            "activity_start_epoch_ms",
+            "activity_end_epoch_ms",
+            "activity_start_time",
+            "activity_end_time",
+            "action",
+            "device_id",
+            "device_name",
+            "device_type",
+            "operated_remote",
+            "operated_keypad",
+            "operated_autorelock",
+            "operator_image_url",
+            "operator_thumbnail_url",
+        ):
+            self.assertEqual(getattr(eager, name), getattr(lazy, name), name)
+
+    def test_lazy_doorbell_motion_activity(self):
+        data = json.loads(load_fixture("doorbell_motion_activity.json"))
+        eager = DoorbellMotionActivity(data)
+        lazy = DoorbellMotionActivity(data, lazy=True)
+
+        self.assertEqual(eager.image_url, lazy.image_url)
+        self.assertEqual(
+            eager.image_created_at_datetime, lazy.image_created_at_datetime
+        )
+        self.assertEqual(eager.activity_end_time, lazy.activity_end_time)
+
+    def test_activity_types(self):
+        expected = {
+            ACTION_DOORBELL_CALL_MISSED: DoorbellDingActivity,
+            ACTION_DOORBELL_CALL_HANGUP: DoorbellDingActivity,
+            ACTION_DOORBELL_MOTION_DETECTED: DoorbellMotionActivity,
+            ACTION_DOORBELL_CALL_INITIATED: DoorbellViewActivity,
+            ACTION_LOCK_LOCK: LockOperationActivity,
+            ACTION_LOCK_UNLOCK: LockOperationActivity,
+            ACTION_LOCK_ONETOUCHLOCK: LockOperationActivity,
+            ACTION_DOOR_OPEN: DoorOperationActivity,
+            ACTION_DOOR_CLOSED: DoorOperationActivity,
+        }
+        self.assertEqual(dict(activity_types()), expected)
+        with self.assertRaises(TypeError):
+            activity_types()["jammed"] = LockOperationActivity
+
+    def test_unknown_actions_are_counted(self):
+        before = unknown_actions().get("test_unknown_action", 0)
+
+        for _ in range(3):
+            self.assertIsNone(activity_from_dict({"action": "test_unknown_action"}))
+
+        self.assertEqual(unknown_actions()["test_unknown_action"], before + 3)
+
+    def test_register_activity_type(self):
+        class JammedActivity(Activity):
+            __slots__ = ()
+
+            def __init__(self, data, lazy=False):
+                super().__init__(ActivityType.LOCK_OPERATION, data, lazy)
+
+        data = json.loads(load_fixture("bluetooth_lock_activity.json"))
+        data["action"] = "test_jammed"
+        self.assertIsNone(activity_from_dict(data))
+        mapping = activity_types()
+
+        register_activity_type("test_jammed", JammedActivity)
+        self.addCleanup(unregister_activity_type, "test_jammed")
+
+        self.assertNotIn("test_jammed", mapping)
+        self.assertIs(activity_types()["test_jammed"], JammedActivity)
+        self.assertNotIn("test_jammed", unknown_actions())
+        activity = activity_from_dict(data)
+        self.assertIsInstance(activity, JammedActivity)
+        self.assertEqual(activity.action, "test_jammed")
+        self.assertEqual(activity.device_id, data["deviceID"])
+
+    def test_register_activity_type_conflicts(self):
+        with self.assertRaises(TypeError):
+            register_activity_type("test_conflict", dict)
+        with self.assertRaises(ValueError):
+            register_activity_type(ACTION_LOCK_LOCK, DoorOperationActivity)
+        register_activity_type(ACTION_LOCK_LOCK, LockOperationActivity)
+
+        register_activity_type(ACTION_LOCK_LOCK, DoorOperationActivity, replace=True)
+        self.addCleanup(
+            register_activity_type,
+            ACTION_LOCK_LOCK,
+            LockOperationActivity,
+            replace=True,
+        )
+        self.assertIs(activity_types()[ACTION_LOCK_LOCK], DoorOperationActivity)
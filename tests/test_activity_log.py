@@ -0,0 +1,147 @@
+from datetime import datetime
+import json
+import os
+import unittest
+from unittest import mock
+
+from august.activity import (
+    DoorbellDingActivity,
+    DoorbellMotionActivity,
+    DoorOperationActivity,
+    LockOperationActivity,
+)
+from august.activity_log import ActivityLog
+
+
+def load_fixture(filename):
+    """Load a fixture."""
+    path = os.path.join(os.path.dirname(__file__), "fixtures", filename)
+    with open(path) as fptr:
+        return fptr.read()
+
+
+class TestActivityLog(unittest.TestCase):
+    def setUp(self):
+        self.json = json.loads(load_fixture("get_house_activities.json"))
+
+    def test_columns(self):
+        log = ActivityLog.from_json(self.json)
+
+        self.assertEqual(10, len(log))
+        self.assertEqual("q", log.timestamps.typecode)
+        self.assertEqual(
+            [1234, 45454, 12345, 5678, 114334, 545454, 5454, 545435, 44354, 543454],
+            list(log.timestamps),
+        )
+        self.assertEqual("doorclosed", log.action(5))
+        self.assertEqual("mockDevice1", log.device_id(9))
+        self.assertEqual(["mockDeviceId2", "mockDevice1"], log.device_ids())
+
+    def test_filters(self):
+        log = ActivityLog.from_json(self.json)
+
+        self.assertEqual([9], log.rows(device_id="mockDevice1"))
+        self.assertEqual([], log.rows(device_id="missing"))
+        self.assertEqual([1, 3, 8], log.rows(action="unlock"))
+        self.assertEqual([5, 6, 7], log.rows(action=["dooropen", "doorclosed"]))
+        self.assertEqual([], log.rows(action="missing"))
+        self.assertEqual([1, 2, 4, 8, 9], log.rows(start=12345, end=545435))
+        self.assertEqual(
+            [2, 4],
+            log.rows(device_id="mockDeviceId2", action="lock", start=12345),
+        )
+        self.assertEqual(
+            log.rows(start=5678, end=545454),
+            log.rows(
+                start=datetime.fromtimestamp(5.678), end=datetime.fromtimestamp(545.454)
+            ),
+        )
+
+    def test_filters_without_numpy(self):
+        log = ActivityLog.from_json(self.json)
+        expected = log.rows(device_id="mockDeviceId2", action="lock", start=12345)
+
+        with mock.patch("august.activity_log.numpy", None):
+            self.assertEqual(
+                expected,
+                log.rows(device_id="mockDeviceId2", action="lock", start=12345),
+            )
+            self.assertEqual([1, 3, 8], log.rows(action="unlock"))
+
+    def test_filter_materializes_on_demand(self):
+        log = ActivityLog.from_json(self.json, keep_raw=True)
+
+        unlocks = log.filter(action="unlock")
+        self.assertEqual(3, len(unlocks))
+        activities = unlocks.activities()
+        self.assertEqual(3, len(activities))
+        for activity in activities:
+            self.assertIsInstance(activity, LockOperationActivity)
+            self.assertEqual("unlock", activity.action)
+        self.assertIs(self.json[1], unlocks.activity_dict(0))
+
+        door = log.activity(5, lazy=True)
+        self.assertIsInstance(door, DoorOperationActivity)
+        self.assertEqual("activityId", door.activity_id)
+
+    def test_without_raw_json(self):
+        log = ActivityLog.from_json(self.json, keep_raw=False)
+
+        activities = list(log)
+        self.assertEqual(10, len(activities))
+        self.assertEqual("mockActivityId1", activities[9].activity_id)
+        self.assertEqual("mock-house-id", activities[9].house_id)
+        self.assertEqual("mockDevice1", activities[9].device_id)
+        self.assertEqual("lock", activities[9].action)
+        self.assertEqual(
+            datetime.fromtimestamp(543.454), activities[9].activity_start_time
+        )
+        self.assertEqual(1, len(log.filter(device_id="mockDevice1").activities()))
+
+    def test_without_raw_json_keeps_decoded_fields(self):
+        json_list = [
+            json.loads(load_fixture(name))
+            for name in (
+                "doorbell_ding_activity.json",
+                "doorbell_motion_activity.json",
+                "remote_lock_activity.json",
+                "keypad_lock_activity.json",
+                "auto_relock_activity.json",
+                "bluetooth_lock_activity.json",
+            )
+        ]
+        attributes = {
+            DoorbellDingActivity: (
+                "activity_start_epoch_ms",
+                "activity_end_epoch_ms",
+                "image_url",
+            ),
+            DoorbellMotionActivity: ("image_url", "image_created_at_datetime"),
+            LockOperationActivity: (
+                "operated_by",
+                "operated_remote",
+                "operated_keypad",
+                "operated_autorelock",
+                "operator_image_url",
+                "operator_thumbnail_url",
+            ),
+        }
+        common = ("activity_id", "house_id", "action", "device_id", "device_name")
+
+        expected = ActivityLog.from_json(json_list, keep_raw=True).activities()
+        actual = ActivityLog.from_json(json_list).activities()
+
+        self.assertEqual(
+            [type(activity) for activity in expected],
+            [type(activity) for activity in actual],
+        )
+        for want, got in zip(expected, actual):
+            for name in common + attributes[type(want)]:
+                self.assertEqual(getattr(want, name), getattr(got, name), name)
+
+        ding, motion, remote = actual[:3]
+        self.assertEqual(1582220686158, ding.activity_start_epoch_ms)
+        self.assertEqual(1582220689500, ding.activity_end_epoch_ms)
+        self.assertEqual("https://my.updated.image/image.jpg", motion.image_url)
+        self.assertEqual("My Name", remote.operated_by)
+        self.assertTrue(remote.operated_remote)
@@ -0,0 +1,198 @@
+import unittest
+from unittest.mock import Mock
+
+import aiounittest
+from august.activity_log import ActivityLog
+from august.activity_poller import ActivityPoller, ActivityPollerAsync
+
+
+def _activity_json(number, action="lock", date_time=None):
+    return {
+        "action": action,
+        "dateTime": 1000 * number if date_time is None else date_time,
+        "deviceID": "mockDeviceId",
+        "entities": {"activity": "activity{}".format(number)},
+    }
+
+
+class _FakeHouse:
+    """Serves the newest activities of a house, newest first.
+
+    Every number in unknown is served with an action that has no
+    registered activity type.
+    """
+
+    def __init__(self, count, unknown=()):
+        self.count = count
+        self.unknown = set(unknown)
+        self.limits = []
+
+    def get_house_activity_log(self, access_token, house_id, limit=8):
+        self.limits.append(limit)
+        newest = range(self.count, max(0, self.count - limit), -1)
+        return ActivityLog.from_json(
+            [
+                _activity_json(
+                    number, "mystery_action" if number in self.unknown else "lock"
+                )
+                for number in newest
+            ]
+        )
+
+    async def async_get_house_activity_log(self, access_token, house_id, limit=8):
+        return self.get_house_activity_log(access_token, house_id, limit)
+
+
+def _ids(activities):
+    return [activity.activity_id for activity in activities]
+
+
+class TestActivityPoller(unittest.TestCase):
+    def test_returns_only_new_activities(self):
+        house = _FakeHouse(3)
+        poller = ActivityPoller(house)
+
+        self.assertEqual(
+            ["activity3", "activity2", "activity1"], _ids(poller.poll("token", "h"))
+        )
+        self.assertEqual((3000, "activity3"), poller.cursor("h"))
+        self.assertEqual([], poller.poll("token", "h"))
+
+        house.count = 5
+        self.assertEqual(["activity5", "activity4"], _ids(poller.poll("token", "h")))
+        self.assertEqual((5000, "activity5"), poller.cursor("h"))
+        self.assertEqual([8, 8, 8], house.limits)
+        self.assertEqual(0, poller.gaps)
+
+    def test_pages_back_on_gap(self):
+        house = _FakeHouse(10)
+        poller = ActivityPoller(house, limit=4)
+        poller.poll("token", "h")
+
+        house.count = 25
+        activities = poller.poll("token", "h")
+
+        self.assertEqual(15, len(activities))
+        self.assertEqual("activity25", activities[0].activity_id)
+        self.assertEqual("activity11", activities[-1].activity_id)
+        self.assertEqual([4, 4, 8, 16], house.limits)
+        self.assertEqual(2, poller.gaps)
+        self.assertEqual(0, poller.lost)
+
+    def test_unknown_actions_count_towards_a_full_page(self):
+        house = _FakeHouse(10, unknown=range(11, 30, 2))
+        poller = ActivityPoller(house, limit=4)
+        poller.poll("token", "h")
+
+        house.count = 25
+        activities = poller.poll("token", "h")
+
+        self.assertEqual([4, 4, 8, 16], house.limits)
+        self.assertEqual(2, poller.gaps)
+        self.assertEqual(
+            ["activity24", "activity22", "activity20"], _ids(activities)[:3]
+        )
+        self.assertEqual("activity12", activities[-1].activity_id)
+        self.assertEqual(7, len(activities))
+
+    def test_gap_larger_than_max_limit(self):
+        house = _FakeHouse(10)
+        poller = ActivityPoller(house, limit=4, max_limit=8)
+        poller.poll("token", "h")
+
+        house.count = 100
+        with self.assertLogs("august.activity_poller", level="WARNING"):
+            activities = poller.poll("token", "h")
+
+        self.assertEqual(8, len(activities))
+        self.assertEqual(1, poller.lost)
+
+    def test_seen_set_is_bounded(self):
+        house = _FakeHouse(4)
+        poller = ActivityPoller(house, limit=4, max_limit=4, seen_size=4)
+        for count in range(4, 40):
+            house.count = count
+            poller.poll("token", "h")
+
+        self.assertEqual(4, len(poller._cursors["h"].seen))
+        # Older activities are not returned again once they left the seen-set
+        house.count = 39
+        self.assertEqual([], poller.poll("token", "h"))
+
+    def test_same_time_different_activity(self):
+        api = Mock()
+        poller = ActivityPoller(api)
+        first = _activity_json(1)
+        second = dict(_activity_json(1, "unlock"), entities={"activity": "other"})
+        api.get_house_activity_log.return_value = ActivityLog.from_json([first])
+        poller.poll("token", "h")
+
+        api.get_house_activity_log.return_value = ActivityLog.from_json(
+            [second, first]
+        )
+        self.assertEqual(["other"], _ids(poller.poll("token", "h")))
+
+    def test_late_activity_is_delivered_once(self):
+        api = Mock()
+        poller = ActivityPoller(api)
+        first = _activity_json(1)
+        third = _activity_json(3)
+        api.get_house_activity_log.return_value = ActivityLog.from_json(
+            [third, first]
+        )
+        poller.poll("token", "h")
+
+        # Synced late from an offline lock, older than the high-water mark
+        late = _activity_json(2)
+        api.get_house_activity_log.return_value = ActivityLog.from_json(
+            [third, late, first]
+        )
+        self.assertEqual(["activity2"], _ids(poller.poll("token", "h")))
+        self.assertEqual((3000, "activity3"), poller.cursor("h"))
+        self.assertEqual([], poller.poll("token", "h"))
+
+    def test_ding_is_dated_by_its_log_time(self):
+        api = Mock()
+        poller = ActivityPoller(api)
+        lock = _activity_json(2)
+        # Started before the oldest dateTime of the first page
+        ding = dict(
+            _activity_json(1, "doorbell_call_missed"),
+            info={"started": 900, "ended": 950},
+        )
+        api.get_house_activity_log.return_value = ActivityLog.from_json([lock, ding])
+
+        self.assertEqual(["activity2", "activity1"], _ids(poller.poll("token", "h")))
+        self.assertEqual((2000, "activity2"), poller.cursor("h"))
+        self.assertEqual([], poller.poll("token", "h"))
+
+        later = dict(ding, dateTime=3000, entities={"activity": "activity3"})
+        api.get_house_activity_log.return_value = ActivityLog.from_json(
+            [later, lock, ding]
+        )
+        self.assertEqual(["activity3"], _ids(poller.poll("token", "h")))
+        self.assertEqual((3000, "activity3"), poller.cursor("h"))
+
+    def test_reset(self):
+        house = _FakeHouse(2)
+        poller = ActivityPoller(house)
+        poller.poll("token", "h")
+
+        poller.reset("h")
+
+        self.assertIsNone(poller.cursor("h"))
+        self.assertEqual(2, len(poller.poll("token", "h")))
+
+
+class TestActivityPollerAsync(aiounittest.AsyncTestCase):
+    async def test_async_poll(self):
+        house = _FakeHouse(10)
+        poller = ActivityPollerAsync(house, limit=4)
+
+        self.assertEqual(4, len(await poller.async_poll("token", "h")))
+        house.count = 20
+        activities = await poller.async_poll("token", "h")
+
+        self.assertEqual(10, len(activities))
+        self.assertEqual([4, 4, 8, 16], house.limits)
+        self.assertEqual([], await poller.async_poll("token", "h"))
@@ -1,6 +1,9 @@
 from datetime import datetime
+import io
 import os
+import tempfile
 import unittest
+from unittest.mock import Mock
 
 import august.activity
 from august.api import Api, _raise_response_exceptions
@@ -18,6 +21,7 @@ from august.api_common import (
 from august.bridge import BridgeDetail, BridgeStatus, BridgeStatusDetail
 from august.exceptions import AugustApiHTTPError
 from august.lock import LockDoorStatus, LockStatus
+from august.retry import RetryPolicy
 import dateutil.parser
 from dateutil.tz import tzlocal, tzutc
 from requests.exceptions import HTTPError
@@ -105,6 +109,46 @@ class TestApi(unittest.TestCase):
             doorbell.get_doorbell_image(timeout=50), b"doorbell_image_mocked"
         )
 
+    @requests_mock.Mocker()
+    def test_download_doorbell_image(self, mock):
+        image = bytes(range(256)) * 4
+        mock.register_uri(
+            "get",
+            API_GET_DOORBELL_URL.format(doorbell_id="K98GiDT45GUL"),
+            text=load_fixture("get_doorbell.json"),
+        )
+        mock.register_uri(
+            "get", "https://image.com/vmk16naaaa7ibuey7sar.jpg", content=image
+        )
+        api = Api()
+        doorbell = api.get_doorbell_detail(ACCESS_TOKEN, "K98GiDT45GUL")
+
+        file = io.BytesIO()
+        self.assertEqual(
+            1024,
+            doorbell.download_doorbell_image(
+                file, session=api.http_session, chunk_size=100
+            ),
+        )
+        self.assertEqual(image, file.getvalue())
+
+        buffer = bytearray(2048)
+        self.assertEqual(1024, doorbell.download_doorbell_image(buffer))
+        self.assertEqual(image, buffer[:1024])
+        with self.assertRaises(ValueError):
+            doorbell.download_doorbell_image(bytearray(1000))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "image.jpg")
+            doorbell.download_doorbell_image(path)
+            with open(path, "rb") as fptr:
+                self.assertEqual(image, fptr.read())
+
+            os.remove(path)
+            with self.assertRaises(ValueError):
+                doorbell.download_doorbell_image(path, max_size=1000, chunk_size=100)
+            self.assertFalse(os.path.exists(path))
+
     @requests_mock.Mocker()
     def test_get_doorbell_detail_missing_image(self, mock):
         mock.register_uri(
@@ -718,6 +762,167 @@ class TestApi(unittest.TestCase):
         self.assertIsInstance(activities[8], august.activity.LockOperationActivity)
         self.assertIsInstance(activities[9], august.activity.LockOperationActivity)
 
+    @requests_mock.Mocker()
+    def test_get_house_activity_log(self, mock):
+        house_id = 1234
+        mock.register_uri(
+            "get",
+            API_GET_HOUSE_ACTIVITIES_URL.format(house_id=house_id),
+            text=load_fixture("get_house_activities.json"),
+        )
+
+        api = Api()
+        log = api.get_house_activity_log(ACCESS_TOKEN, house_id)
+
+        self.assertEqual(10, len(log))
+        self.assertEqual([9], log.rows(device_id="mockDevice1"))
+        self.assertIsInstance(log.activity(9), august.activity.LockOperationActivity)
+
+    @requests_mock.Mocker()
+    def test_get_house_activities_lazy(self, mock):
+        house_id = "1234"
+        mock.register_uri(
+            "get",
+            API_GET_HOUSE_ACTIVITIES_URL.format(house_id=house_id),
+            text=load_fixture("get_house_activities.json"),
+        )
+
+        api = Api()
+        eager = api.get_house_activities(ACCESS_TOKEN, house_id)
+        lazy = api.get_house_activities(ACCESS_TOKEN, house_id, lazy=True)
+
+        self.assertEqual(
+            [type(activity) for activity in eager],
+            [type(activity) for activity in lazy],
+        )
+        self.assertIsNotNone(lazy[0]._data)
+        for eager_activity, lazy_activity in zip(eager, lazy):
+            self.assertEqual(eager_activity.action, lazy_activity.action)
+            self.assertEqual(eager_activity.device_id, lazy_activity.device_id)
+            self.assertEqual(
+                eager_activity.activity_end_time, lazy_activity.activity_end_time
+            )
+
+    @requests_mock.Mocker()
+    def test_pooled_session_is_reused(self, mock):
+        mock.register_uri(
+            "get",
+            API_GET_LOCK_URL.format(lock_id="ABC"),
+            text=load_fixture("get_lock.online.json"),
+        )
+
+        api = Api(pool_connections=2, pool_maxsize=4)
+        http_session = api.http_session
+        api.get_lock_detail(ACCESS_TOKEN, "ABC")
+        api.get_lock_detail(ACCESS_TOKEN, "ABC")
+
+        self.assertIs(http_session, api.http_session)
+        self.assertEqual(2, mock.call_count)
+        adapter = http_session.get_adapter("https://api-production.august.com")
+        self.assertEqual(4, adapter._pool_maxsize)
+
+    def test_close_owned_session(self):
+        with Api() as api:
+            http_session = api.http_session
+        self.assertIsNot(http_session, api.http_session)
+
+    def test_close_leaves_passed_session_open(self):
+        http_session = Mock()
+        api = Api(http_session=http_session)
+        api.close()
+
+        http_session.close.assert_not_called()
+        self.assertIs(http_session, api.http_session)
+
+    def test_keep_alive_disabled(self):
+        api = Api(keep_alive=False)
+        self.assertEqual("close", api.http_session.headers["Connection"])
+
+    @requests_mock.Mocker()
+    def test_retry_on_429(self, mock):
+        mock.register_uri(
+            "get",
+            API_GET_LOCK_URL.format(lock_id="ABC"),
+            [
+                {"status_code": 429, "headers": {"Retry-After": "0"}},
+                {"status_code": 429},
+                {"text": load_fixture("get_lock.online.json")},
+            ],
+        )
+
+        retry_policy = RetryPolicy(base_delay=0, jitter=0)
+        api = Api(retry_policy=retry_policy)
+        lock = api.get_lock_detail(ACCESS_TOKEN, "ABC")
+
+        self.assertEqual("A6697750D607098BAE8D6BAA11EF8063", lock.device_id)
+        self.assertEqual(3, mock.call_count)
+        self.assertEqual(2, retry_policy.retries)
+
+    @requests_mock.Mocker()
+    def test_retry_on_429_gives_up(self, mock):
+        mock.register_uri(
+            "get", API_GET_LOCK_URL.format(lock_id="ABC"), status_code=429
+        )
+
+        retry_policy = RetryPolicy(max_attempts=3, base_delay=0, jitter=0)
+        api = Api(retry_policy=retry_policy)
+
+        with self.assertRaises(HTTPError):
+            api.get_lock_detail(ACCESS_TOKEN, "ABC")
+        self.assertEqual(3, mock.call_count)
+        self.assertEqual(1, retry_policy.exhausted)
+
+    @requests_mock.Mocker()
+    def test_get_lock_details(self, mock):
+        mock.register_uri(
+            "get",
+            API_GET_LOCK_URL.format(lock_id="online"),
+            text=load_fixture("get_lock.online.json"),
+        )
+        mock.register_uri(
+            "get",
+            API_GET_LOCK_URL.format(lock_id="offline"),
+            text=load_fixture("get_lock.offline.json"),
+        )
+        mock.register_uri(
+            "get", API_GET_LOCK_URL.format(lock_id="broken"), status_code=500
+        )
+
+        api = Api()
+        details = api.get_lock_details(
+            ACCESS_TOKEN, ["online", "broken", "offline", "online"], max_workers=2
+        )
+
+        self.assertEqual(["online", "broken", "offline"], list(details))
+        self.assertEqual(
+            "A6697750D607098BAE8D6BAA11EF8063", details["online"].device_id
+        )
+        self.assertEqual("ABC", details["offline"].device_id)
+        self.assertIsInstance(details["broken"], HTTPError)
+        self.assertEqual(3, mock.call_count)
+
+    @requests_mock.Mocker()
+    def test_get_doorbell_details_and_pins(self, mock):
+        mock.register_uri(
+            "get",
+            API_GET_DOORBELL_URL.format(doorbell_id="K98GiDT45GUL"),
+            text=load_fixture("get_doorbell.json"),
+        )
+        mock.register_uri(
+            "get",
+            API_GET_PINS_URL.format(lock_id="A6697750D607098BAE8D6BAA11EF8063"),
+            text=load_fixture("get_pins.json"),
+        )
+
+        api = Api()
+        doorbells = api.get_doorbell_details(ACCESS_TOKEN, ["K98GiDT45GUL"])
+        pins = api.get_pins_for_locks(
+            ACCESS_TOKEN, ["A6697750D607098BAE8D6BAA11EF8063"]
+        )
+
+        self.assertEqual("Front Door", doorbells["K98GiDT45GUL"].device_name)
+        self.assertEqual(1, len(pins["A6697750D607098BAE8D6BAA11EF8063"]))
+
     def test__raise_response_exceptions(self):
         four_two_eight = MockedResponse(content="not json")
         four_two_eight.status_code = 404
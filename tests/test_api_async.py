@@ -1,5 +1,8 @@
+import asyncio
 from datetime import datetime
+import io
 import os
+import tempfile
 
 from aiohttp import ClientError, ClientResponse, ClientSession
 from aiohttp.helpers import TimerNoop
@@ -22,8 +25,11 @@ from august.api_common import (
     API_UNLOCK_URL,
 )
 from august.bridge import BridgeDetail, BridgeStatus, BridgeStatusDetail
+from august.cache import ConditionalRequestCache, ResponseCache
 from august.exceptions import AugustApiAIOHTTPError
 from august.lock import LockDoorStatus, LockStatus
+from august.ratelimit import RateLimiter
+from august.retry import RetryPolicy
 import dateutil.parser
 from dateutil.tz import tzlocal, tzutc
 from yarl import URL
@@ -38,6 +44,10 @@ def load_fixture(filename):
         return fptr.read()
 
 
+def mock_sleep():
+    return mock.patch("august.api_async.asyncio.sleep", new=mock.CoroutineMock())
+
+
 def utc_of(year, month, day, hour, minute, second, microsecond):
     return datetime(year, month, day, hour, minute, second, microsecond, tzinfo=tzutc())
 
@@ -105,6 +115,44 @@ class TestApiAsync(aiounittest.AsyncTestCase):
             b"doorbell_image_mocked",
         )
 
+    @aioresponses()
+    async def test_async_download_doorbell_image(self, mock):
+        image = bytes(range(256)) * 4
+        image_url = "https://image.com/vmk16naaaa7ibuey7sar.jpg"
+        mock.get(
+            API_GET_DOORBELL_URL.format(doorbell_id="K98GiDT45GUL"),
+            body=load_fixture("get_doorbell.json"),
+        )
+        for _ in range(4):
+            mock.get(image_url, body=image)
+        session = ClientSession()
+        api = ApiAsync(session)
+        doorbell = await api.async_get_doorbell_detail(ACCESS_TOKEN, "K98GiDT45GUL")
+
+        file = io.BytesIO()
+        self.assertEqual(
+            1024,
+            await doorbell.async_download_doorbell_image(session, file, chunk_size=100),
+        )
+        self.assertEqual(image, file.getvalue())
+
+        buffer = memoryview(bytearray(1024))
+        await doorbell.async_download_doorbell_image(session, buffer)
+        self.assertEqual(image, buffer.tobytes())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "image.jpg")
+            await doorbell.async_download_doorbell_image(session, path)
+            with open(path, "rb") as fptr:
+                self.assertEqual(image, fptr.read())
+
+            os.remove(path)
+            with self.assertRaises(ValueError):
+                await doorbell.async_download_doorbell_image(
+                    session, path, max_size=1000
+                )
+            self.assertFalse(os.path.exists(path))
+
     @aioresponses()
     async def test_async_get_doorbell_detail_missing_image(self, mock):
         mock.get(
@@ -700,6 +748,20 @@ class TestApiAsync(aiounittest.AsyncTestCase):
         self.assertIsInstance(activities[8], august.activity.LockOperationActivity)
         self.assertIsInstance(activities[9], august.activity.LockOperationActivity)
 
+    @aioresponses()
+    async def test_async_get_house_activity_log(self, mock):
+        house_id = 1234
+        mock.get(
+            API_GET_HOUSE_ACTIVITIES_URL.format(house_id=house_id) + "?limit=8",
+            body=load_fixture("get_house_activities.json"),
+        )
+
+        api = ApiAsync(ClientSession())
+        log = await api.async_get_house_activity_log(ACCESS_TOKEN, house_id)
+
+        self.assertEqual(10, len(log))
+        self.assertEqual([1, 3, 8], log.rows(action="unlock"))
+
     @aioresponses()
     async def test_async_refresh_access_token(self, mock):
         mock.get(
@@ -730,6 +792,198 @@ class TestApiAsync(aiounittest.AsyncTestCase):
         )
         assert last_args["json"] == {"code": "123456", "email": "emailaddress"}
 
+    @aioresponses()
+    async def test_async_retry_on_429(self, mock):
+        lock_url = API_GET_LOCK_URL.format(lock_id="ABC")
+        mock.get(lock_url, status=429, headers={"Retry-After": "0"})
+        mock.get(lock_url, status=429)
+        mock.get(lock_url, body=load_fixture("get_lock.online.json"))
+
+        retry_policy = RetryPolicy(base_delay=0.01, jitter=0)
+        api = ApiAsync(ClientSession(), retry_policy=retry_policy)
+        with mock_sleep() as sleep:
+            lock = await api.async_get_lock_detail(ACCESS_TOKEN, "ABC")
+
+        self.assertEqual("A6697750D607098BAE8D6BAA11EF8063", lock.device_id)
+        self.assertEqual(2, retry_policy.retries)
+        self.assertEqual([((0.0,),), ((0.02,),)], sleep.call_args_list)
+
+    @aioresponses()
+    async def test_async_retry_on_429_gives_up(self, mock):
+        lock_url = API_GET_LOCK_URL.format(lock_id="ABC")
+        for _ in range(3):
+            mock.get(lock_url, status=429)
+
+        retry_policy = RetryPolicy(max_attempts=3, base_delay=0, jitter=0)
+        api = ApiAsync(ClientSession(), retry_policy=retry_policy)
+
+        with self.assertRaises(ClientError):
+            await api.async_get_lock_detail(ACCESS_TOKEN, "ABC")
+        self.assertEqual(2, retry_policy.retries)
+        self.assertEqual(1, retry_policy.exhausted)
+
+    @aioresponses()
+    async def test_async_rate_limiter_holds_requests(self, mock):
+        mock.get(API_GET_LOCKS_URL, body="{}")
+        mock.get(API_GET_LOCKS_URL, body="{}")
+
+        limiter = RateLimiter(endpoint_limits={API_GET_LOCKS_URL: (1, 1)})
+        api = ApiAsync(ClientSession(), rate_limiter=limiter)
+        with mock_sleep() as sleep:
+            await api.async_get_locks(ACCESS_TOKEN)
+            await api.async_get_locks(ACCESS_TOKEN)
+
+        self.assertEqual(1, sleep.call_count)
+        self.assertEqual(1, limiter.delayed)
+
+    @aioresponses()
+    async def test_async_get_houses_is_cached(self, mock):
+        mock.get(API_GET_HOUSES_URL, body='[{"HouseID": "h"}]')
+
+        api = ApiAsync(ClientSession(), response_cache=ResponseCache())
+        first = await api.async_get_houses(ACCESS_TOKEN)
+        first[0]["HouseID"] = "changed"
+        second = await api.async_get_houses(ACCESS_TOKEN)
+
+        self.assertEqual([{"HouseID": "h"}], second)
+        self.assertEqual(1, api.response_cache.stats()["hits"])
+
+    @aioresponses()
+    async def test_async_concurrent_gets_are_coalesced(self, mock):
+        mock.get(
+            API_GET_LOCK_URL.format(lock_id="ABC"),
+            body=load_fixture("get_lock.online.json"),
+        )
+
+        api = ApiAsync(ClientSession())
+        first, second = await asyncio.gather(
+            api.async_get_lock_detail(ACCESS_TOKEN, "ABC"),
+            api.async_get_lock_detail(ACCESS_TOKEN, "ABC"),
+        )
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first.lock_status, second.lock_status)
+        self.assertEqual(first.lock_status_epoch_ms, second.lock_status_epoch_ms)
+        first.lock_status = LockStatus.UNLOCKED
+        self.assertEqual(LockStatus.LOCKED, second.lock_status)
+        self.assertEqual(1, api.coalesced_requests)
+        self.assertEqual({}, api._inflight_requests)
+
+    @aioresponses()
+    async def test_async_gets_with_different_tokens_are_not_coalesced(self, mock):
+        lock_url = API_GET_LOCK_URL.format(lock_id="ABC")
+        mock.get(lock_url, body=load_fixture("get_lock.online.json"))
+        mock.get(lock_url, body=load_fixture("get_lock.online.json"))
+
+        api = ApiAsync(ClientSession())
+        first, second = await asyncio.gather(
+            api.async_get_lock_detail(ACCESS_TOKEN, "ABC"),
+            api.async_get_lock_detail("other_token", "ABC"),
+        )
+
+        self.assertIsNot(first, second)
+        self.assertEqual(0, api.coalesced_requests)
+
+    @aioresponses()
+    async def test_async_lock_operations_are_not_coalesced(self, mock):
+        lock_url = API_LOCK_URL.format(lock_id="ABC")
+        mock.put(lock_url, body='{"status":"locked"}')
+        mock.put(lock_url, body='{"status":"locked"}')
+
+        api = ApiAsync(ClientSession())
+        statuses = await asyncio.gather(
+            api.async_lock(ACCESS_TOKEN, "ABC"), api.async_lock(ACCESS_TOKEN, "ABC")
+        )
+
+        self.assertEqual([LockStatus.LOCKED, LockStatus.LOCKED], statuses)
+        self.assertEqual(0, api.coalesced_requests)
+
+    @aioresponses()
+    async def test_async_conditional_get_doorbell_detail(self, mock):
+        doorbell_url = API_GET_DOORBELL_URL.format(doorbell_id="K98GiDT45GUL")
+        mock.get(
+            doorbell_url,
+            body=load_fixture("get_doorbell.json"),
+            headers={"Last-Modified": "Sun, 10 Dec 2017 08:01:35 GMT"},
+        )
+        mock.get(doorbell_url, status=304)
+
+        api = ApiAsync(ClientSession(), conditional_cache=ConditionalRequestCache())
+        first = await api.async_get_doorbell_detail(ACCESS_TOKEN, "K98GiDT45GUL")
+        second = await api.async_get_doorbell_detail(ACCESS_TOKEN, "K98GiDT45GUL")
+
+        self.assertIs(first, second)
+        request = list(mock.requests.values())[0][1]
+        self.assertEqual(
+            "Sun, 10 Dec 2017 08:01:35 GMT",
+            request.kwargs["headers"]["If-Modified-Since"],
+        )
+
+    @aioresponses()
+    async def test_async_get_lock_details(self, mock):
+        mock.get(
+            API_GET_LOCK_URL.format(lock_id="online"),
+            body=load_fixture("get_lock.online.json"),
+        )
+        mock.get(
+            API_GET_LOCK_URL.format(lock_id="offline"),
+            body=load_fixture("get_lock.offline.json"),
+        )
+        mock.get(API_GET_LOCK_URL.format(lock_id="broken"), status=500)
+
+        api = ApiAsync(ClientSession())
+        details = await api.async_get_lock_details(
+            ACCESS_TOKEN, ["online", "broken", "offline", "online"], max_concurrency=2
+        )
+
+        self.assertEqual(["online", "broken", "offline"], list(details))
+        self.assertEqual(
+            "A6697750D607098BAE8D6BAA11EF8063", details["online"].device_id
+        )
+        self.assertEqual("ABC", details["offline"].device_id)
+        self.assertIsInstance(details["broken"], ClientError)
+
+    async def test_async_bulk_fetch_caps_concurrency(self):
+        running = []
+        peak = []
+
+        async def _async_fetch(access_token, device_id):
+            running.append(device_id)
+            peak.append(len(running))
+            await asyncio.sleep(0)
+            running.remove(device_id)
+            return device_id
+
+        api = ApiAsync(ClientSession())
+        results = await api._async_bulk_fetch(
+            _async_fetch, ACCESS_TOKEN, range(10), max_concurrency=3
+        )
+
+        self.assertEqual({i: i for i in range(10)}, results)
+        self.assertEqual(3, max(peak))
+
+    @aioresponses()
+    async def test_async_get_doorbell_details_and_pins(self, mock):
+        mock.get(
+            API_GET_DOORBELL_URL.format(doorbell_id="K98GiDT45GUL"),
+            body=load_fixture("get_doorbell.json"),
+        )
+        mock.get(
+            API_GET_PINS_URL.format(lock_id="A6697750D607098BAE8D6BAA11EF8063"),
+            body=load_fixture("get_pins.json"),
+        )
+
+        api = ApiAsync(ClientSession())
+        doorbells = await api.async_get_doorbell_details(
+            ACCESS_TOKEN, ["K98GiDT45GUL"]
+        )
+        pins = await api.async_get_pins_for_locks(
+            ACCESS_TOKEN, ["A6697750D607098BAE8D6BAA11EF8063"]
+        )
+
+        self.assertEqual("Front Door", doorbells["K98GiDT45GUL"].device_name)
+        self.assertEqual(1, len(pins["A6697750D607098BAE8D6BAA11EF8063"]))
+
     def test__raise_response_exceptions(self):
         loop = mock.Mock()
         request_info = mock.Mock()
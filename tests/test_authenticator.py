@@ -70,6 +70,29 @@ class TestAuthenticator(unittest.TestCase):
 
         self.assertEqual(False, should_refresh)
 
+    @patch("august.api.Api")
+    def test_token_checks_do_not_parse_expiry(self, mock_api):
+        expires_at = datetime.now(timezone.utc) + timedelta(days=8)
+        self._setup_session_response(
+            mock_api, True, True, expires_at=format_datetime(expires_at)
+        )
+
+        authenticator = self._create_authenticator(mock_api)
+        authentication = authenticator.authenticate()
+
+        self.assertEqual(
+            int(expires_at.timestamp()), authentication.access_token_expires_epoch
+        )
+        self.assertAlmostEqual(
+            timedelta(days=8).total_seconds(),
+            authentication.seconds_until_expiry(),
+            delta=5,
+        )
+        with patch("august.authenticator_common.parse_datetime") as parse_datetime:
+            self.assertFalse(authenticator.should_refresh())
+            self.assertFalse(authentication.is_expired())
+        parse_datetime.assert_not_called()
+
     @patch("august.api.Api")
     def test_refresh_token(self, mock_api):
         self._setup_session_response(mock_api, True, True)
@@ -87,6 +110,9 @@ class TestAuthenticator(unittest.TestCase):
             datetime.fromtimestamp(1337, tz=tzutc()),
             access_token.parsed_expiration_time(),
         )
+        self.assertEqual({"exp": 1337}, access_token.jwt_claims)
+        self.assertEqual(1337, access_token.access_token_expires_epoch)
+        self.assertTrue(access_token.is_expired())
 
     @patch("august.api.Api")
     def test_get_session_with_authenticated_response(self, mock_api):
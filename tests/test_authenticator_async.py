@@ -1,5 +1,7 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
 import json
+from unittest.mock import patch
 
 from aiohttp import ClientError, ClientSession
 from aioresponses import aioresponses
@@ -110,6 +112,108 @@ class TestAuthenticatorAsync(aiounittest.AsyncTestCase):
             access_token.parsed_expiration_time(),
         )
 
+    @aioresponses()
+    async def test_async_concurrent_refreshes_share_one_request(
+        self, mock_aioresponses
+    ):
+        self._setup_session_response(mock_aioresponses, True, True)
+
+        authenticator = await self._async_create_authenticator_async(mock_aioresponses)
+        await authenticator.async_authenticate()
+
+        # Expires in 2100
+        token = "e30=.eyJleHAiOjQxMDI0NDQ4MDB9.e30="
+        mock_aioresponses.get(
+            API_GET_HOUSES_URL, body=token, headers={HEADER_AUGUST_ACCESS_TOKEN: token}
+        )
+
+        results = await asyncio.gather(
+            *(authenticator.async_refresh_access_token(force=True) for _ in range(5))
+        )
+
+        self.assertEqual(1, len(list(mock_aioresponses.requests.values())[-1]))
+        for authentication in results:
+            self.assertIs(results[0], authentication)
+        self.assertEqual(token, await authenticator.async_get_access_token())
+
+    @aioresponses()
+    async def test_async_get_access_token_without_refresh(self, mock_aioresponses):
+        expires_at = format_datetime(datetime.now(timezone.utc) + timedelta(days=8))
+        self._setup_session_response(
+            mock_aioresponses, True, True, expires_at=expires_at
+        )
+
+        authenticator = await self._async_create_authenticator_async(mock_aioresponses)
+        await authenticator.async_authenticate()
+
+        self.assertEqual("access_token", await authenticator.async_get_access_token())
+
+    @aioresponses()
+    async def test_async_background_refresh(self, mock_aioresponses):
+        expires_at = format_datetime(
+            datetime.now(timezone.utc) + timedelta(days=7, hours=1)
+        )
+        self._setup_session_response(
+            mock_aioresponses, True, True, expires_at=expires_at
+        )
+
+        authenticator = await self._async_create_authenticator_async(mock_aioresponses)
+        await authenticator.async_authenticate()
+        self.assertFalse(authenticator.should_refresh())
+
+        token = "e30=.eyJleHAiOjEzMzd9.e30="
+        mock_aioresponses.get(
+            API_GET_HOUSES_URL, body=token, headers={HEADER_AUGUST_ACCESS_TOKEN: token}
+        )
+
+        # Renewing two hours ahead of the threshold makes it due right away,
+        # and the spread of due tokens picks no delay
+        with patch(
+            "august.authenticator_async.random.uniform", side_effect=[7200, 0, 7200]
+        ):
+            task = authenticator.start_background_refresh(jitter=7200)
+            self.assertIs(task, authenticator.start_background_refresh())
+            for _ in range(100):
+                if authenticator._authentication.access_token == token:
+                    break
+                await asyncio.sleep(0)
+
+        self.assertEqual(token, authenticator._authentication.access_token)
+        self.assertFalse(task.done())
+        await authenticator.async_stop_background_refresh()
+        self.assertTrue(task.cancelled())
+
+    @aioresponses()
+    async def test_async_background_refresh_spreads_due_tokens(
+        self, mock_aioresponses
+    ):
+        expires_at = format_datetime(
+            datetime.now(timezone.utc) + timedelta(minutes=30)
+        )
+        self._setup_session_response(
+            mock_aioresponses, True, True, expires_at=expires_at
+        )
+
+        authenticator = await self._async_create_authenticator_async(mock_aioresponses)
+        await authenticator.async_authenticate()
+        access_token = authenticator._authentication.access_token
+
+        with patch(
+            "august.authenticator_async.random.uniform", side_effect=[7200, 1800]
+        ) as uniform:
+            task = authenticator.start_background_refresh(jitter=7200)
+            for _ in range(10):
+                await asyncio.sleep(0)
+
+        # Due already, so the refresh waits a random time, bounded by the
+        # half hour left before the token expires, instead of running now
+        self.assertEqual(2, uniform.call_count)
+        self.assertEqual(0, uniform.call_args[0][0])
+        self.assertAlmostEqual(1800, uniform.call_args[0][1], delta=5)
+        self.assertEqual(access_token, authenticator._authentication.access_token)
+        self.assertFalse(task.done())
+        await authenticator.async_stop_background_refresh()
+
     @aioresponses()
     async def test_async_get_session_with_authenticated_response(
         self, mock_aioresponses
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import tempfile
+
+from aiohttp import ClientSession
+from aioresponses import aioresponses
+import aiounittest
+from august.api_async import ApiAsync
+from august.api_common import API_GET_SESSION_URL
+from august.authenticator_common import Authentication, AuthenticationState
+from august.authenticator_pool import AuthenticatorPool
+from august.token_store import SQLiteTokenStore
+
+
+def format_datetime(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+class TestAuthenticatorPool(aiounittest.AsyncTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = SQLiteTokenStore(os.path.join(directory.name, "tokens.db"))
+        self.addCleanup(self.store.close)
+
+    @aioresponses()
+    async def test_pool(self, mock_aioresponses):
+        self.store.set(
+            "phone:stored",
+            Authentication(
+                AuthenticationState.AUTHENTICATED,
+                install_id="stored_install",
+                access_token="stored_token",
+                access_token_expires=format_datetime(
+                    datetime.now(timezone.utc) + timedelta(days=30)
+                ),
+            ),
+        )
+        pool = AuthenticatorPool(ApiAsync(ClientSession()), self.store)
+        with self.assertRaises(RuntimeError):
+            pool.add_account("phone", "stored", "pass")
+        await pool.async_load()
+
+        stored = pool.add_account("phone", "stored", "pass")
+        new = pool.add_account("phone", "new", "pass", install_id="new_install")
+
+        self.assertIs(stored, pool.add_account("phone", "stored", "pass"))
+        self.assertIs(new, pool.get("phone:new"))
+        self.assertEqual(["phone:stored", "phone:new"], pool.identifiers)
+        self.assertEqual("stored_token", stored.authentication.access_token)
+        self.assertEqual(
+            AuthenticationState.REQUIRES_AUTHENTICATION, new.authentication.state
+        )
+        expiries = pool.expiries()
+        self.assertAlmostEqual(
+            timedelta(days=30).total_seconds(), expiries["phone:stored"], delta=5
+        )
+        self.assertIsNone(expiries["phone:new"])
+
+        mock_aioresponses.post(
+            API_GET_SESSION_URL,
+            headers={"x-august-access-token": "new_token"},
+            body=json.dumps(
+                {
+                    "expiresAt": format_datetime(
+                        datetime.now(timezone.utc) + timedelta(days=60)
+                    ),
+                    "vPassword": True,
+                    "vInstallId": True,
+                }
+            ),
+        )
+        await new.async_authenticate()
+
+        self.assertEqual("new_token", self.store.get("phone:new").access_token)
+        self.assertEqual("new_install", self.store.get("phone:new").install_id)
+
+        pool.start_background_refresh()
+        await pool.async_stop_background_refresh()
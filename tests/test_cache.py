@@ -0,0 +1,216 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from august.api import Api
+from august.api_common import (
+    API_GET_DOORBELL_URL,
+    API_GET_HOUSES_URL,
+    API_GET_LOCK_STATUS_URL,
+    API_GET_LOCK_URL,
+    API_GET_LOCKS_URL,
+    API_LOCK_URL,
+)
+from august.cache import ConditionalRequestCache, ResponseCache
+from august.lock import LockStatus
+import requests_mock
+
+ACCESS_TOKEN = "eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9"
+
+
+def load_fixture(filename):
+    """Load a fixture."""
+    path = os.path.join(os.path.dirname(__file__), "fixtures", filename)
+    with open(path) as fptr:
+        return fptr.read()
+
+
+def request_key(url, access_token=ACCESS_TOKEN):
+    return ("get", url, (), access_token)
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_only_endpoints_with_ttl_are_cached(self):
+        cache = ResponseCache()
+        lock_key = request_key(API_GET_LOCK_URL.format(lock_id="A"))
+        cache.set(request_key(API_GET_LOCKS_URL), {"A": {}})
+        cache.set(lock_key, {"LockID": "A"})
+
+        self.assertEqual({"A": {}}, cache.get(request_key(API_GET_LOCKS_URL)))
+        self.assertIsNone(cache.get(lock_key))
+        self.assertEqual(
+            {"hits": 1, "misses": 0, "evictions": 0, "size": 1}, cache.stats()
+        )
+
+    def test_entries_expire(self):
+        cache = ResponseCache(ttls={API_GET_LOCKS_URL: 10})
+        with patch("august.cache.time.monotonic", return_value=100):
+            cache.set(request_key(API_GET_LOCKS_URL), {})
+        with patch("august.cache.time.monotonic", return_value=109):
+            self.assertEqual({}, cache.get(request_key(API_GET_LOCKS_URL)))
+        with patch("august.cache.time.monotonic", return_value=111):
+            self.assertIsNone(cache.get(request_key(API_GET_LOCKS_URL)))
+        self.assertEqual(1, cache.stats()["misses"])
+        self.assertEqual(0, cache.stats()["size"])
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(ttls={API_GET_LOCK_URL: 60}, max_entries=2)
+        keys = [request_key(API_GET_LOCK_URL.format(lock_id=i)) for i in range(3)]
+        cache.set(keys[0], 0)
+        cache.set(keys[1], 1)
+        cache.get(keys[0])
+        cache.set(keys[2], 2)
+
+        self.assertEqual(0, cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(2, cache.get(keys[2]))
+        self.assertEqual(1, cache.stats()["evictions"])
+
+    def test_invalidate(self):
+        cache = ResponseCache(ttls={API_GET_LOCK_URL: 60, API_GET_LOCKS_URL: 60})
+        lock_url = API_GET_LOCK_URL.format(lock_id="A")
+        cache.set(request_key(lock_url), 1)
+        cache.set(request_key(lock_url, "other"), 2)
+        cache.set(request_key(API_GET_LOCK_URL.format(lock_id="B")), 3)
+        cache.set(request_key(API_GET_LOCKS_URL), 4)
+
+        cache.invalidate(lock_url)
+        self.assertIsNone(cache.get(request_key(lock_url)))
+        self.assertIsNone(cache.get(request_key(lock_url, "other")))
+        self.assertEqual(
+            3, cache.get(request_key(API_GET_LOCK_URL.format(lock_id="B")))
+        )
+
+        cache.invalidate_endpoint(API_GET_LOCK_URL)
+        self.assertEqual(1, cache.stats()["size"])
+        cache.clear()
+        self.assertEqual(0, cache.stats()["size"])
+
+
+class TestApiResponseCache(unittest.TestCase):
+    @requests_mock.Mocker()
+    def test_discovery_endpoints_are_cached(self, mock):
+        mock.register_uri("get", API_GET_LOCKS_URL, text="{}")
+        mock.register_uri("get", API_GET_HOUSES_URL, text='[{"HouseID": "h"}]')
+
+        api = Api(response_cache=ResponseCache())
+        api.get_locks(ACCESS_TOKEN)
+        api.get_locks(ACCESS_TOKEN)
+        api.get_houses(ACCESS_TOKEN)
+        houses = api.get_houses(ACCESS_TOKEN)
+        api.get_locks("other_token")
+
+        self.assertEqual([{"HouseID": "h"}], houses)
+        self.assertEqual(3, mock.call_count)
+        self.assertEqual(2, api.response_cache.stats()["hits"])
+
+    @requests_mock.Mocker()
+    def test_cached_responses_are_copies(self, mock):
+        mock.register_uri("get", API_GET_HOUSES_URL, text='[{"HouseID": "h"}]')
+
+        api = Api(response_cache=ResponseCache())
+        api.get_houses(ACCESS_TOKEN)[0]["HouseID"] = "changed"
+        api.get_houses(ACCESS_TOKEN).append({})
+
+        self.assertEqual([{"HouseID": "h"}], api.get_houses(ACCESS_TOKEN))
+        self.assertEqual(1, mock.call_count)
+
+    @requests_mock.Mocker()
+    def test_lock_operation_invalidates_lock_entries(self, mock):
+        lock_url = API_GET_LOCK_URL.format(lock_id="ABC")
+        status_url = API_GET_LOCK_STATUS_URL.format(lock_id="ABC")
+        mock.register_uri("get", lock_url, text="{}")
+        mock.register_uri("get", status_url, text='{"status": "unlocked"}')
+        mock.register_uri(
+            "put", API_LOCK_URL.format(lock_id="ABC"), text='{"status": "locked"}'
+        )
+
+        api = Api(
+            response_cache=ResponseCache(
+                ttls={API_GET_LOCK_URL: 60, API_GET_LOCK_STATUS_URL: 60}
+            )
+        )
+        api.get_lock_status(ACCESS_TOKEN, "ABC")
+        api.get_lock_status(ACCESS_TOKEN, "ABC")
+        self.assertEqual(1, mock.call_count)
+
+        self.assertEqual(LockStatus.LOCKED, api.lock(ACCESS_TOKEN, "ABC"))
+        api.get_lock_status(ACCESS_TOKEN, "ABC")
+        self.assertEqual(3, mock.call_count)
+
+
+class TestConditionalRequestCache(unittest.TestCase):
+    def test_applies_to_detail_endpoints(self):
+        self.assertTrue(
+            ConditionalRequestCache.applies_to(API_GET_LOCK_URL.format(lock_id="A"))
+        )
+        self.assertTrue(
+            ConditionalRequestCache.applies_to(
+                API_GET_DOORBELL_URL.format(doorbell_id="A")
+            )
+        )
+        self.assertFalse(ConditionalRequestCache.applies_to(API_GET_LOCKS_URL))
+
+    def test_headers_from_validators(self):
+        cache = ConditionalRequestCache()
+        cache.set("a", {"ETag": '"v1"', "Last-Modified": "yesterday"}, 1)
+        cache.set("b", {}, 2)
+
+        self.assertEqual(
+            ({"If-None-Match": '"v1"', "If-Modified-Since": "yesterday"}, 1),
+            cache.get("a"),
+        )
+        self.assertEqual((None, None), cache.get("b"))
+        self.assertEqual(1, cache.stats()["size"])
+
+    @requests_mock.Mocker()
+    def test_not_modified_returns_previous_detail(self, mock):
+        lock_url = API_GET_LOCK_URL.format(lock_id="ABC")
+        mock.register_uri(
+            "get",
+            lock_url,
+            [
+                {
+                    "text": load_fixture("get_lock.online.json"),
+                    "headers": {"ETag": '"v1"'},
+                },
+                {"status_code": 304, "headers": {"ETag": '"v1"'}},
+            ],
+        )
+
+        api = Api(conditional_cache=ConditionalRequestCache())
+        first = api.get_lock_detail(ACCESS_TOKEN, "ABC")
+        second = api.get_lock_detail(ACCESS_TOKEN, "ABC")
+
+        self.assertIs(first, second)
+        self.assertNotIn("If-None-Match", mock.request_history[0].headers)
+        self.assertEqual('"v1"', mock.request_history[1].headers["If-None-Match"])
+        self.assertEqual(1, api.conditional_cache.stats()["not_modified"])
+
+    @requests_mock.Mocker()
+    def test_modified_response_replaces_detail(self, mock):
+        lock_url = API_GET_LOCK_URL.format(lock_id="ABC")
+        mock.register_uri(
+            "get",
+            lock_url,
+            [
+                {
+                    "text": load_fixture("get_lock.online.json"),
+                    "headers": {"ETag": '"v1"'},
+                },
+                {
+                    "text": load_fixture("get_lock.online.json"),
+                    "headers": {"ETag": '"v2"'},
+                },
+                {"status_code": 304},
+            ],
+        )
+
+        api = Api(conditional_cache=ConditionalRequestCache())
+        first = api.get_lock_detail(ACCESS_TOKEN, "ABC")
+        second = api.get_lock_detail(ACCESS_TOKEN, "ABC")
+        third = api.get_lock_detail(ACCESS_TOKEN, "ABC")
+
+        self.assertIsNot(first, second)
+        self.assertIs(second, third)
+        self.assertEqual('"v2"', mock.request_history[2].headers["If-None-Match"])
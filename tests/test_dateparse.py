@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+import logging
+import os
+import timeit
+import unittest
+
+from august.dateparse import (
+    _parse_utc_iso8601,
+    datetime_to_epoch_ms,
+    epoch_ms_to_datetime,
+    parse_datetime,
+)
+import dateutil.parser
+from dateutil.tz import tzoffset
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TestDateParse(unittest.TestCase):
+    def test_matches_dateutil(self):
+        for value in (
+            "2017-12-10T04:48:30.272Z",
+            "2017-12-10T08:01:35Z",
+            "2020-02-20 17:44:45.123Z",
+            "2019-02-12T03:52:28.7Z",
+            "2019-02-12T03:52:28.123456Z",
+        ):
+            parsed = _parse_utc_iso8601(value)
+            self.assertEqual(dateutil.parser.parse(value), parsed, value)
+            self.assertIs(timezone.utc, parsed.tzinfo)
+
+    def test_unusual_formats_fall_back_to_dateutil(self):
+        for value in (
+            "2017-12-10T04:48:30+01:00",
+            "2017-12-10T04:48:30.1234567Z",
+            "2017-13-10T04:48:30Z",
+            "2017-12-10T04:48:30.2\u00b2Z",
+            "2017-12-10T04:48:3\u00b2Z",
+            "Sun, 10 Dec 2017 08:01:35 GMT",
+        ):
+            self.assertIsNone(_parse_utc_iso8601(value), value)
+
+        self.assertEqual(
+            datetime(2017, 12, 10, 4, 48, 30, tzinfo=tzoffset(None, 3600)),
+            parse_datetime("2017-12-10T04:48:30+01:00"),
+        )
+
+    def test_epoch_ms(self):
+        parsed = parse_datetime("2017-12-10T04:48:30.272Z")
+
+        self.assertEqual(1512881310272, datetime_to_epoch_ms(parsed))
+        self.assertEqual(parsed, epoch_ms_to_datetime(1512881310272))
+        self.assertIs(timezone.utc, epoch_ms_to_datetime(1512881310272).tzinfo)
+        self.assertIsNone(epoch_ms_to_datetime(None))
+        self.assertEqual(
+            1582007217000, datetime_to_epoch_ms(datetime.fromtimestamp(1582007217))
+        )
+
+    def test_memoized(self):
+        self.assertIs(
+            parse_datetime("2017-12-10T04:48:30.272Z"),
+            parse_datetime("2017-12-10T04:48:30.272Z"),
+        )
+
+
+@unittest.skipUnless(os.environ.get("AUGUST_BENCHMARK"), "set AUGUST_BENCHMARK=1")
+class BenchmarkDateParse(unittest.TestCase):
+    """Compare dateutil, the fast path and the memoized parser.
+
+    Timings are logged rather than asserted, run with
+    AUGUST_BENCHMARK=1 pytest tests/test_dateparse.py --log-cli-level=INFO
+    """
+
+    def test_benchmark_against_dateutil(self):
+        value = "2017-12-10T04:48:30.272Z"
+        number = 2000
+        parsers = (
+            ("dateutil", dateutil.parser.parse),
+            ("fast path", _parse_utc_iso8601),
+            ("memoized", parse_datetime),
+        )
+
+        for name, parse in parsers:
+            self.assertEqual(dateutil.parser.parse(value), parse(value), name)
+            seconds = min(timeit.repeat(lambda: parse(value), number=number, repeat=3))
+            _LOGGER.info("%s: %.2fus per parse", name, seconds / number * 1e6)
@@ -0,0 +1,227 @@
+import asyncio
+from datetime import datetime, timezone
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+
+from aiohttp import ClientSession
+from aioresponses import aioresponses
+import aiounittest
+from august.activity import DoorbellMotionActivity
+from august.api import Api
+from august.doorbell import DoorbellDetail
+from august.image_cache import ImageCache, image_cache_key
+from august.util import update_doorbell_image_from_activity
+import requests_mock
+
+IMAGE_URL = "https://image.com/vmk16naaaa7ibuey7sar.jpg"
+
+
+def load_fixture(filename):
+    """Load a fixture."""
+    path = os.path.join(os.path.dirname(__file__), "fixtures", filename)
+    with open(path) as fptr:
+        return fptr.read()
+
+
+def _image(number, created_at=None):
+    return Mock(
+        image_url="https://image.com/{}.jpg".format(number),
+        image_created_at_datetime=created_at,
+    )
+
+
+class TestImageCache(unittest.TestCase):
+    def test_key_includes_created_at(self):
+        created_at = datetime(2020, 2, 20, 17, 44, 45, tzinfo=timezone.utc)
+
+        self.assertEqual(64, len(image_cache_key(IMAGE_URL)))
+        self.assertEqual(
+            image_cache_key(IMAGE_URL, created_at),
+            image_cache_key(IMAGE_URL, created_at),
+        )
+        self.assertNotEqual(
+            image_cache_key(IMAGE_URL), image_cache_key(IMAGE_URL, created_at)
+        )
+
+    @requests_mock.Mocker()
+    def test_get_image_downloads_once(self, mock):
+        mock.register_uri("get", IMAGE_URL, content=b"image")
+        doorbell = DoorbellDetail(json.loads(load_fixture("get_doorbell.json")))
+        cache = ImageCache()
+
+        self.assertEqual(b"image", cache.get_image(doorbell))
+        self.assertEqual(b"image", cache.get_image(doorbell))
+
+        self.assertEqual(1, mock.call_count)
+        stats = cache.stats()
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(0.5, stats["hit_ratio"])
+        self.assertEqual(5, stats["bytes_saved"])
+
+    def test_memory_is_byte_bounded(self):
+        cache = ImageCache(max_bytes=10)
+        cache.put("https://image.com/1.jpg", None, b"12345")
+        cache.put("https://image.com/2.jpg", None, b"12345")
+        self.assertIsNotNone(cache.get("https://image.com/1.jpg"))
+
+        cache.put("https://image.com/3.jpg", None, b"12345")
+
+        self.assertIsNone(cache.get("https://image.com/2.jpg"))
+        self.assertIsNotNone(cache.get("https://image.com/1.jpg"))
+        self.assertEqual(10, cache.stats()["memory_bytes"])
+        self.assertEqual(1, cache.stats()["evictions"])
+
+    def test_spills_to_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ImageCache(max_bytes=10, spill_directory=directory)
+            for number in range(4):
+                cache.put("https://image.com/{}.jpg".format(number), None, b"12345")
+
+            self.assertEqual(2, len(os.listdir(directory)))
+            self.assertEqual(b"12345", cache.get("https://image.com/0.jpg"))
+            self.assertEqual(1, cache.stats()["disk_hits"])
+
+            # A new process picks up the spilled images
+            reopened = ImageCache(max_bytes=10, spill_directory=directory)
+            self.assertEqual(3, reopened.stats()["spilled_images"])
+            self.assertEqual(b"12345", reopened.get("https://image.com/1.jpg"))
+
+    def test_removes_spill_left_by_a_crash(self):
+        with tempfile.TemporaryDirectory() as directory:
+            temp_path = os.path.join(directory, image_cache_key(IMAGE_URL) + ".tmp")
+            with open(temp_path, "wb") as file:
+                file.write(b"123")
+
+            cache = ImageCache(spill_directory=directory)
+
+            self.assertFalse(os.path.exists(temp_path))
+            self.assertEqual(0, cache.stats()["disk_bytes"])
+
+    def test_disk_is_byte_bounded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ImageCache(
+                max_bytes=5, spill_directory=directory, max_disk_bytes=10
+            )
+            for number in range(6):
+                cache.put("https://image.com/{}.jpg".format(number), None, b"12345")
+
+            self.assertEqual(2, len(os.listdir(directory)))
+            self.assertEqual(10, cache.stats()["disk_bytes"])
+            self.assertIsNone(cache.get("https://image.com/0.jpg"))
+            self.assertIsNotNone(cache.get("https://image.com/3.jpg"))
+
+    @requests_mock.Mocker()
+    def test_update_doorbell_image_prefetches(self, mock):
+        mock.register_uri(
+            "get", "https://my.updated.image/image.jpg", content=b"new"
+        )
+        doorbell = DoorbellDetail(json.loads(load_fixture("get_doorbell.json")))
+        activity = DoorbellMotionActivity(
+            json.loads(load_fixture("doorbell_motion_activity.json"))
+        )
+        api = Api()
+        self.addCleanup(api.close)
+        cache = ImageCache(session=api.http_session)
+        self.addCleanup(cache.close)
+
+        self.assertTrue(
+            update_doorbell_image_from_activity(doorbell, activity, image_cache=cache)
+        )
+        cache.close()
+
+        self.assertEqual(
+            b"new",
+            cache.get(doorbell.image_url, doorbell.image_created_at_datetime),
+        )
+        self.assertEqual(1, mock.call_count)
+
+
+class TestImageCacheAsync(aiounittest.AsyncTestCase):
+    @aioresponses()
+    async def test_async_get_image_shares_download(self, mock):
+        mock.get("https://image.com/1.jpg", body=b"image")
+        session = ClientSession()
+        cache = ImageCache()
+        image = _image(1)
+
+        first, second = await asyncio.gather(
+            cache.async_get_image(session, image),
+            cache.async_get_image(session, image),
+        )
+        third = await cache.async_get_image(session, image)
+
+        self.assertEqual([b"image"] * 3, [first, second, third])
+        self.assertEqual(1, len(mock.requests))
+        stats = cache.stats()
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(1, stats["joined"])
+        self.assertEqual(2, stats["hits"])
+        self.assertEqual(10, stats["bytes_saved"])
+        await session.close()
+
+    async def test_async_caller_joins_prefetch_thread(self):
+        release = threading.Event()
+
+        def slow_get(url, timeout):
+            release.wait(5)
+            return Mock(content=b"image")
+
+        session = Mock()
+        session.get.side_effect = slow_get
+        cache = ImageCache(session=session)
+        self.addCleanup(cache.close)
+        cache.prefetch(_image(1))
+        while not cache._inflight:
+            await asyncio.sleep(0.001)
+
+        aiohttp_session = Mock()
+        waiter = asyncio.ensure_future(
+            cache.async_get_image(aiohttp_session, _image(1))
+        )
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(b"image", await waiter)
+        aiohttp_session.request.assert_not_called()
+        self.assertEqual(1, session.get.call_count)
+        self.assertEqual(1, cache.stats()["joined"])
+
+    @aioresponses()
+    async def test_prefetch_on_the_event_loop(self, mock):
+        mock.get("https://my.updated.image/image.jpg", body=b"new")
+        session = ClientSession()
+        cache = ImageCache(aiohttp_session=session)
+        doorbell = DoorbellDetail(json.loads(load_fixture("get_doorbell.json")))
+        activity = DoorbellMotionActivity(
+            json.loads(load_fixture("doorbell_motion_activity.json"))
+        )
+
+        self.assertTrue(
+            update_doorbell_image_from_activity(doorbell, activity, image_cache=cache)
+        )
+        for _ in range(100):
+            if cache.stats()["images"]:
+                break
+            await asyncio.sleep(0.001)
+
+        self.assertEqual(
+            b"new",
+            cache.get(doorbell.image_url, doorbell.image_created_at_datetime),
+        )
+        self.assertIsNone(cache._executor)
+        await session.close()
+
+    async def test_async_get_image_from_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ImageCache(max_bytes=0, spill_directory=directory)
+            cache.put("https://image.com/1.jpg", None, b"image")
+
+            image = await cache.async_get_image(Mock(), _image(1))
+
+            self.assertEqual(b"image", image)
+            self.assertEqual(1, cache.stats()["disk_hits"])
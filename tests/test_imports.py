@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_times(module):
+    """Import a module in a fresh interpreter, return {module: cumulative us}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def _top_level(times):
+    return {name.split(".")[0] for name in times}
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "-X importtime needs Python 3.7")
+class TestImportTime(unittest.TestCase):
+    def _assert_not_imported(self, module, forbidden):
+        times = _import_times(module)
+        self.assertEqual(
+            set(),
+            _top_level(times) & set(forbidden),
+            "{} took {:.1f}ms to import".format(module, times[module] / 1000),
+        )
+
+    def test_api_does_not_load_aiohttp(self):
+        self._assert_not_imported("august.api", ("aiohttp", "aiofiles", "dateutil"))
+
+    def test_authenticator_does_not_load_aiohttp(self):
+        self._assert_not_imported(
+            "august.authenticator", ("aiohttp", "aiofiles", "dateutil")
+        )
+
+    def test_api_async_does_not_load_requests(self):
+        self._assert_not_imported("august.api_async", ("requests", "dateutil"))
+
+    def test_authenticator_async_does_not_load_requests(self):
+        self._assert_not_imported(
+            "august.authenticator_async", ("requests", "dateutil")
+        )
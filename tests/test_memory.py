@@ -0,0 +1,95 @@
+import json
+import os
+import tracemalloc
+import unittest
+
+from august.activity import (
+    DoorbellDingActivity,
+    DoorbellMotionActivity,
+    DoorbellViewActivity,
+    DoorOperationActivity,
+    LockOperationActivity,
+)
+from august.api_common import _process_doorbells_json, _process_locks_json
+from august.doorbell import DoorbellDetail
+from august.lock import LockDetail
+from august.pin import Pin
+
+
+def load_fixture(filename):
+    """Load a fixture."""
+    path = os.path.join(os.path.dirname(__file__), "fixtures", filename)
+    with open(path) as fptr:
+        return fptr.read()
+
+
+def slot_names(cls):
+    return [name for klass in cls.__mro__ for name in getattr(klass, "__slots__", ())]
+
+
+class DictBacked:
+    """Holds the same attributes as a model in a per-instance __dict__."""
+
+    def __init__(self, model):
+        for name in slot_names(type(model)):
+            setattr(self, name, getattr(model, name))
+
+
+def slotted_copy(model):
+    copy = type(model).__new__(type(model))
+    for name in slot_names(type(model)):
+        setattr(copy, name, getattr(model, name))
+    return copy
+
+
+def allocated_bytes(factory, models):
+    """Bytes allocated by factory for each model, attribute values are shared."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        copies = [factory(model) for model in models]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del copies
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size / len(models)
+
+
+class TestSlots(unittest.TestCase):
+    def test_models_have_no_instance_dict(self):
+        lock_detail = LockDetail(json.loads(load_fixture("get_lock.online.json")))
+        models = [
+            lock_detail,
+            lock_detail.bridge,
+            lock_detail.bridge.status,
+            lock_detail.keypad,
+            DoorbellDetail(json.loads(load_fixture("get_doorbell.json"))),
+            Pin(json.loads(load_fixture("get_pins.json"))["loaded"][0]),
+            LockOperationActivity(json.loads(load_fixture("lock_activity.json"))),
+            DoorOperationActivity(json.loads(load_fixture("door_open_activity.json"))),
+            DoorbellMotionActivity(
+                json.loads(load_fixture("doorbell_motion_activity.json"))
+            ),
+            DoorbellDingActivity({"dateTime": 0, "info": {"started": 0, "ended": 0}}),
+            DoorbellViewActivity({"dateTime": 0, "info": {"started": 0, "ended": 0}}),
+            *_process_locks_json(json.loads(load_fixture("get_locks.json"))),
+            *_process_doorbells_json(json.loads(load_fixture("get_doorbells.json"))),
+        ]
+        for model in models:
+            self.assertFalse(hasattr(model, "__dict__"), type(model).__name__)
+
+    def test_per_object_memory_reduction(self):
+        activity_data = json.loads(load_fixture("lock_activity.json"))
+        lock_data = json.loads(load_fixture("get_lock.online.json"))
+        for factory in (
+            lambda: LockOperationActivity(activity_data),
+            lambda: LockDetail(lock_data),
+        ):
+            models = [factory() for _ in range(1000)]
+
+            slotted = allocated_bytes(slotted_copy, models)
+            with_dict = allocated_bytes(DictBacked, models)
+
+            # at least a quarter smaller, the exact saving depends on the python version
+            self.assertLess(slotted * 1.25, with_dict, type(models[0]).__name__)
@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+
+from august.api import Api
+from august.api_common import (
+    API_GET_LOCK_STATUS_URL,
+    API_GET_LOCK_URL,
+    API_GET_LOCKS_URL,
+    _endpoint_for_url,
+)
+from august.ratelimit import RATE_LIMIT_GLOBAL, RateLimiter, TokenBucket
+import requests_mock
+
+ACCESS_TOKEN = "eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9"
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_reserve_within_capacity(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        self.assertEqual(0, bucket.reserve(bucket._updated))
+        self.assertEqual(0, bucket.reserve(bucket._updated))
+        self.assertEqual(1, bucket.reserve(bucket._updated))
+        self.assertEqual(2, bucket.reserve(bucket._updated))
+        self.assertEqual(-2, bucket.level(bucket._updated))
+
+    def test_refill(self):
+        bucket = TokenBucket(rate=2, capacity=2)
+        now = bucket._updated
+        bucket.reserve(now)
+        bucket.reserve(now)
+        self.assertEqual(1, bucket.level(now + 0.5))
+        self.assertEqual(2, bucket.level(now + 10))
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_endpoint_for_url(self):
+        self.assertEqual(
+            API_GET_LOCK_URL, _endpoint_for_url(API_GET_LOCK_URL.format(lock_id="A"))
+        )
+        self.assertEqual(
+            API_GET_LOCK_STATUS_URL,
+            _endpoint_for_url(API_GET_LOCK_STATUS_URL.format(lock_id="A")),
+        )
+        self.assertEqual(API_GET_LOCKS_URL, _endpoint_for_url(API_GET_LOCKS_URL))
+        self.assertEqual("https://other", _endpoint_for_url("https://other"))
+
+    def test_no_buckets(self):
+        limiter = RateLimiter()
+        self.assertEqual(0, limiter.reserve(API_GET_LOCKS_URL))
+        self.assertEqual({}, limiter.levels())
+
+    def test_endpoint_and_global_buckets(self):
+        limiter = RateLimiter(
+            rate=100, capacity=3, endpoint_limits={API_GET_LOCK_URL: (1, 1)}
+        )
+        lock_url = API_GET_LOCK_URL.format(lock_id="A")
+
+        self.assertEqual(0, limiter.reserve(lock_url))
+        self.assertGreater(limiter.reserve(lock_url), 0.9)
+        self.assertEqual(0, limiter.reserve(API_GET_LOCKS_URL))
+        self.assertGreater(limiter.reserve(API_GET_LOCKS_URL), 0)
+
+        levels = limiter.levels()
+        self.assertEqual({RATE_LIMIT_GLOBAL, API_GET_LOCK_URL}, set(levels))
+        self.assertLess(levels[API_GET_LOCK_URL], 0)
+        self.assertEqual(2, limiter.delayed)
+
+    @requests_mock.Mocker()
+    def test_shared_between_apis(self, mock):
+        mock.register_uri("get", API_GET_LOCKS_URL, text="{}")
+
+        limiter = RateLimiter(rate=1, capacity=1)
+        first = Api(rate_limiter=limiter)
+        second = Api(rate_limiter=limiter)
+
+        with patch("august.api.time.sleep") as sleep:
+            first.get_locks(ACCESS_TOKEN)
+            second.get_locks(ACCESS_TOKEN)
+
+        self.assertEqual(1, sleep.call_count)
+        self.assertEqual(2, mock.call_count)
+        self.assertEqual(1, limiter.delayed)
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import time
+import unittest
+
+from august.retry import RetryPolicy, parse_retry_after
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_parse_retry_after_seconds(self):
+        self.assertEqual(3.0, parse_retry_after("3"))
+        self.assertEqual(0.0, parse_retry_after("-1"))
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_parse_retry_after_http_date(self):
+        now = datetime(2020, 2, 20, 12, 0, 0, tzinfo=timezone.utc)
+        retry_at = format_datetime(now + timedelta(seconds=120), usegmt=True)
+        self.assertEqual(120.0, parse_retry_after(retry_at, now=now))
+
+    def test_should_retry(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.should_retry(429))
+        self.assertFalse(policy.should_retry(200))
+        self.assertFalse(policy.should_retry(500))
+
+    def test_exponential_backoff_without_jitter(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+        self.assertEqual(
+            [1, 2, 4, 5, 5], [policy.backoff(attempt) for attempt in range(1, 6)]
+        )
+
+    def test_backoff_jitter_stays_in_range(self):
+        policy = RetryPolicy(base_delay=4, max_delay=4, jitter=0.5)
+        for _ in range(100):
+            self.assertTrue(2 <= policy.backoff(3) <= 4)
+
+    def test_invalid_jitter(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(jitter=2)
+
+    def test_next_delay_honors_retry_after(self):
+        policy = RetryPolicy(base_delay=1, jitter=0)
+        self.assertEqual(7.0, policy.next_delay(1, time.monotonic(), "7"))
+        self.assertEqual(1, policy.retries)
+        self.assertEqual(7.0, policy.total_delay)
+
+    def test_next_delay_gives_up_after_max_attempts(self):
+        policy = RetryPolicy(max_attempts=2, base_delay=0, jitter=0)
+        started = time.monotonic()
+        self.assertEqual(0, policy.next_delay(1, started))
+        self.assertIsNone(policy.next_delay(2, started))
+        self.assertEqual(
+            {"retries": 1, "exhausted": 1, "total_delay": 0}, policy.stats()
+        )
+
+    def test_next_delay_gives_up_past_deadline(self):
+        policy = RetryPolicy(base_delay=1, jitter=0, deadline=10)
+        self.assertEqual(1, policy.next_delay(1, time.monotonic()))
+        self.assertIsNone(policy.next_delay(1, time.monotonic() - 9.5))
+        self.assertIsNone(policy.next_delay(1, time.monotonic(), "60"))
+        self.assertEqual(2, policy.exhausted)
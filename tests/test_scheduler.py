@@ -0,0 +1,164 @@
+import json
+import os
+import unittest
+
+import aiounittest
+from asynctest import mock
+from august.activity import LockOperationActivity
+from august.doorbell import DoorbellDetail
+from august.lock import LockDetail
+from august.scheduler import (
+    POLL_DOORBELL_DETAIL,
+    POLL_HOUSE_ACTIVITIES,
+    POLL_LOCK_DETAIL,
+    PollScheduler,
+)
+
+
+def load_fixture(filename):
+    """Load a fixture."""
+    path = os.path.join(os.path.dirname(__file__), "fixtures", filename)
+    with open(path) as fptr:
+        return fptr.read()
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _lock_detail(bridge_status="online"):
+    data = json.loads(load_fixture("get_lock.online_with_doorsense.json"))
+    data["Bridge"]["status"]["current"] = bridge_status
+    return LockDetail(data)
+
+
+def _lock_activity(epoch_ms):
+    return LockOperationActivity(
+        {"action": "lock", "dateTime": epoch_ms, "deviceID": "ABC"}
+    )
+
+
+def _scheduler(clock):
+    scheduler = PollScheduler(
+        min_interval=5, max_interval=60, offline_interval=600, clock=clock
+    )
+    scheduler.add_house("house")
+    scheduler.add_lock("ABC", house_id="house")
+    return scheduler
+
+
+class TestPollScheduler(unittest.TestCase):
+    def test_backs_off_when_quiet(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock)
+        self.assertEqual(
+            [(POLL_HOUSE_ACTIVITIES, "house"), (POLL_LOCK_DETAIL, "ABC")],
+            sorted(scheduler.due()),
+        )
+
+        intervals = []
+        for _ in range(6):
+            scheduler.record_detail(POLL_LOCK_DETAIL, _lock_detail())
+            intervals.append(scheduler.schedule()[-1]["interval"])
+        self.assertEqual([10, 20, 40, 60, 60, 60], intervals)
+        self.assertNotIn((POLL_LOCK_DETAIL, "ABC"), scheduler.due())
+
+        clock.now += 60
+        self.assertIn((POLL_LOCK_DETAIL, "ABC"), scheduler.due())
+
+    def test_polls_faster_after_events(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock)
+        scheduler.record_activities("house", [_lock_activity(1000)])
+        scheduler.record_activities("house", [_lock_activity(1000)])
+        for _ in range(4):
+            scheduler.record_detail(POLL_LOCK_DETAIL, _lock_detail())
+        self.assertEqual(20, scheduler.seconds_until_due())
+
+        self.assertTrue(
+            scheduler.record_activities(
+                "house", [_lock_activity(2000), _lock_activity(1000)]
+            )
+        )
+
+        self.assertEqual(
+            [
+                {
+                    "kind": POLL_LOCK_DETAIL,
+                    "target_id": "ABC",
+                    "due_in": 5,
+                    "interval": 5,
+                    "paused": False,
+                },
+                {
+                    "kind": POLL_HOUSE_ACTIVITIES,
+                    "target_id": "house",
+                    "due_in": 5,
+                    "interval": 5,
+                    "paused": False,
+                },
+            ],
+            sorted(scheduler.schedule(), key=lambda poll: poll["kind"], reverse=True),
+        )
+
+    def test_command_resets_interval(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock)
+        for _ in range(5):
+            scheduler.record_detail(POLL_LOCK_DETAIL, _lock_detail())
+
+        scheduler.record_event("ABC")
+
+        clock.now += 5
+        self.assertIn((POLL_LOCK_DETAIL, "ABC"), scheduler.due())
+
+    def test_pauses_devices_behind_offline_bridge(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock)
+
+        scheduler.record_detail(POLL_LOCK_DETAIL, _lock_detail("offline"))
+        scheduler.record_event("ABC")
+
+        poll = [p for p in scheduler.schedule() if p["kind"] == POLL_LOCK_DETAIL][0]
+        self.assertTrue(poll["paused"])
+        self.assertEqual(600, poll["due_in"])
+
+        clock.now += 600
+        scheduler.record_detail(POLL_LOCK_DETAIL, _lock_detail())
+        poll = [p for p in scheduler.schedule() if p["kind"] == POLL_LOCK_DETAIL][0]
+        self.assertFalse(poll["paused"])
+        self.assertEqual(10, poll["interval"])
+
+    def test_pauses_offline_doorbells(self):
+        clock = _Clock()
+        scheduler = PollScheduler(clock=clock)
+        doorbell = DoorbellDetail(json.loads(load_fixture("get_doorbell.offline.json")))
+        scheduler.add_doorbell(doorbell.device_id)
+
+        scheduler.record_detail(POLL_DOORBELL_DETAIL, doorbell)
+
+        self.assertTrue(scheduler.schedule()[0]["paused"])
+
+
+class TestPollSchedulerAsync(aiounittest.AsyncTestCase):
+    async def test_async_poll_due(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock)
+        api = mock.Mock()
+        api.async_get_house_activities = mock.CoroutineMock(
+            return_value=[_lock_activity(1000)]
+        )
+        api.async_get_lock_detail = mock.CoroutineMock(side_effect=ValueError)
+
+        results = await scheduler.async_poll_due(api, "token")
+
+        api.async_get_house_activities.assert_awaited_once_with("token", "house")
+        api.async_get_lock_detail.assert_awaited_once_with("token", "ABC")
+        self.assertEqual(1, len(results[(POLL_HOUSE_ACTIVITIES, "house")]))
+        self.assertIsInstance(results[(POLL_LOCK_DETAIL, "ABC")], ValueError)
+        self.assertEqual([], scheduler.due())
+        self.assertEqual(10, scheduler.seconds_until_due())
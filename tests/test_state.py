@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import threading
+import unittest
+
+import aiounittest
+from august.activity import DoorbellMotionActivity, LockOperationActivity
+from august.doorbell import DoorbellDetail
+from august.lock import LockDetail, LockDoorStatus, LockStatus
+from august.state import (
+    STATE_BATTERY_LEVEL,
+    STATE_DOOR_STATE,
+    STATE_IMAGE_URL,
+    STATE_LOCK_STATUS,
+    DeviceStateChange,
+    DeviceStateStore,
+)
+
+
+def load_fixture(filename):
+    """Load a fixture."""
+    path = os.path.join(os.path.dirname(__file__), "fixtures", filename)
+    with open(path) as fptr:
+        return fptr.read()
+
+
+def _lock_detail():
+    return LockDetail(json.loads(load_fixture("get_lock.online_with_doorsense.json")))
+
+
+def _doorbell_detail():
+    return DoorbellDetail(json.loads(load_fixture("get_doorbell.json")))
+
+
+class TestDeviceStateStore(unittest.TestCase):
+    def test_update_detail(self):
+        store = DeviceStateStore()
+        lock = _lock_detail()
+
+        changes = store.update_detail(lock)
+
+        self.assertIs(lock, store.get("ABC"))
+        self.assertIn("ABC", store)
+        self.assertEqual(
+            [
+                DeviceStateChange("ABC", STATE_LOCK_STATUS, None, LockStatus.LOCKED),
+                DeviceStateChange("ABC", STATE_DOOR_STATE, None, LockDoorStatus.OPEN),
+                DeviceStateChange("ABC", STATE_BATTERY_LEVEL, None, 92),
+            ],
+            changes,
+        )
+        self.assertEqual([], store.update_detail(_lock_detail()))
+
+        low_battery = json.loads(load_fixture("get_lock.online_with_doorsense.json"))
+        low_battery["battery"] = 0.1
+        self.assertEqual(
+            [DeviceStateChange("ABC", STATE_BATTERY_LEVEL, 92, 10)],
+            store.update_detail(LockDetail(low_battery)),
+        )
+
+    def test_update_from_lock_result(self):
+        store = DeviceStateStore()
+        store.update_detail(_lock_detail())
+
+        changes = store.update_from_lock_result(json.loads(load_fixture("unlock.json")))
+
+        self.assertEqual(
+            [
+                DeviceStateChange(
+                    "ABC", STATE_LOCK_STATUS, LockStatus.LOCKED, LockStatus.UNLOCKED
+                ),
+                DeviceStateChange(
+                    "ABC", STATE_DOOR_STATE, LockDoorStatus.OPEN, LockDoorStatus.CLOSED
+                ),
+            ],
+            changes,
+        )
+        self.assertEqual(LockStatus.UNLOCKED, store.get("ABC").lock_status)
+
+    def test_update_from_activities_notifies_subscribers(self):
+        store = DeviceStateStore()
+        store.update_details([_lock_detail(), _doorbell_detail()])
+        all_changes = []
+        doorbell_changes = []
+        unsubscribe = store.subscribe(all_changes.append)
+        store.subscribe(doorbell_changes.append, device_id="K98GiDT45GUL")
+
+        store.update_from_activities(
+            [
+                LockOperationActivity(json.loads(load_fixture("unlock_activity.json"))),
+                DoorbellMotionActivity(
+                    json.loads(load_fixture("doorbell_motion_activity.json"))
+                ),
+            ]
+        )
+
+        image_change = DeviceStateChange(
+            "K98GiDT45GUL",
+            STATE_IMAGE_URL,
+            "https://image.com/vmk16naaaa7ibuey7sar.jpg",
+            "https://my.updated.image/image.jpg",
+        )
+        self.assertEqual(1, len(all_changes))
+        self.assertCountEqual(
+            [
+                DeviceStateChange(
+                    "ABC", STATE_LOCK_STATUS, LockStatus.LOCKED, LockStatus.UNLOCKED
+                ),
+                image_change,
+            ],
+            all_changes[0],
+        )
+        self.assertEqual([[image_change]], doorbell_changes)
+
+        unsubscribe()
+        store.update_from_lock_result(json.loads(load_fixture("lock.json")))
+        self.assertEqual(1, len(all_changes))
+
+    def test_failing_callback_does_not_stop_others(self):
+        store = DeviceStateStore()
+        received = []
+
+        def _fail(changes):
+            raise RuntimeError
+
+        store.subscribe(_fail)
+        store.subscribe(received.append)
+        with self.assertLogs("august.state", level="ERROR"):
+            store.update_detail(_lock_detail())
+
+        self.assertEqual(1, len(received))
+
+
+class TestDeviceStateStoreAsync(aiounittest.AsyncTestCase):
+    async def test_async_subscribe(self):
+        store = DeviceStateStore()
+        queue = store.async_subscribe(device_id="ABC")
+
+        store.update_detail(_doorbell_detail())
+        thread = threading.Thread(target=store.update_detail, args=(_lock_detail(),))
+        thread.start()
+        thread.join()
+
+        changes = [await queue.get() for _ in range(3)]
+        self.assertEqual(
+            [STATE_LOCK_STATUS, STATE_DOOR_STATE, STATE_BATTERY_LEVEL],
+            [change.attribute for change in changes],
+        )
+        self.assertTrue(queue.empty())
+
+        store.async_unsubscribe(queue)
+        store.update_from_lock_result(json.loads(load_fixture("unlock.json")))
+        await asyncio.sleep(0)
+        self.assertTrue(queue.empty())
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import aiounittest
+from august.authenticator import Authenticator
+from august.authenticator_common import (
+    Authentication,
+    AuthenticationState,
+    to_authentication_json,
+)
+from august.token_store import FileTokenStore, MemoryTokenStore, SQLiteTokenStore
+
+
+def format_datetime(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _authentication(token, days):
+    return Authentication(
+        AuthenticationState.AUTHENTICATED,
+        install_id="install_" + token,
+        access_token=token,
+        access_token_expires=format_datetime(
+            datetime.now(timezone.utc) + timedelta(days=days)
+        ),
+    )
+
+
+class TestSQLiteTokenStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "tokens.db")
+
+    def test_set_get_and_load_all(self):
+        store = SQLiteTokenStore(self.path)
+        self.addCleanup(store.close)
+        self.assertIsNone(store.get("phone:one"))
+
+        store.set("phone:one", _authentication("one", 30))
+        store.set("phone:two", _authentication("two", 10))
+        store.set("phone:one", _authentication("newer", 60))
+
+        reopened = SQLiteTokenStore(self.path)
+        self.addCleanup(reopened.close)
+        authentications = reopened.load_all()
+        self.assertEqual({"phone:one", "phone:two"}, set(authentications))
+        self.assertEqual("newer", authentications["phone:one"].access_token)
+        self.assertEqual("install_two", authentications["phone:two"].install_id)
+        self.assertEqual(
+            AuthenticationState.AUTHENTICATED, authentications["phone:two"].state
+        )
+        self.assertEqual("two", reopened.get("phone:two").access_token)
+
+    def test_expiries_soonest_first(self):
+        store = SQLiteTokenStore(self.path)
+        self.addCleanup(store.close)
+        store.set("phone:one", _authentication("one", 30))
+        store.set("phone:two", _authentication("two", 10))
+        store.set("phone:three", _authentication("three", 20))
+
+        expiries = store.expiries()
+
+        self.assertEqual(
+            ["phone:two", "phone:three", "phone:one"],
+            [account for account, _ in expiries],
+        )
+        store.delete("phone:two")
+        self.assertEqual(2, len(store.expiries()))
+
+    def test_authenticator_uses_store(self):
+        store = SQLiteTokenStore(self.path)
+        self.addCleanup(store.close)
+        store.set("phone:user", _authentication("stored", 30))
+        store.set("phone:expired", _authentication("expired", -1))
+
+        authenticator = Authenticator(
+            Mock(), "phone", "user", "pass", install_id="x", token_store=store
+        )
+        self.assertEqual("stored", authenticator.authentication.access_token)
+
+        with self.assertLogs("august.authenticator_common", level="ERROR"):
+            expired = Authenticator(
+                Mock(), "phone", "expired", "pass", token_store=store
+            )
+        self.assertEqual(
+            AuthenticationState.REQUIRES_AUTHENTICATION, expired.authentication.state
+        )
+
+
+class TestMemoryTokenStore(unittest.TestCase):
+    def test_skips_unchanged_writes(self):
+        store = MemoryTokenStore()
+        authentication = _authentication("one", 30)
+
+        self.assertTrue(store.set("phone:one", authentication))
+        self.assertFalse(store.set("phone:one", authentication))
+        self.assertTrue(store.set("phone:one", _authentication("two", 30)))
+
+        self.assertEqual(2, store.writes)
+        self.assertEqual(1, store.skipped_writes)
+        self.assertEqual("two", store.get("phone:one").access_token)
+        store.delete("phone:one")
+        self.assertEqual({}, store.load_all())
+
+
+class TestFileTokenStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(directory.name, "token.json")
+
+    def test_reads_legacy_cache_file(self):
+        with open(self.path, "w") as file:
+            file.write(to_authentication_json(_authentication("legacy", 30)))
+
+        store = FileTokenStore(self.path)
+
+        self.assertEqual("legacy", store.get("phone:user").access_token)
+        authentications = store.load_all()
+        self.assertEqual({None}, set(authentications))
+        self.assertEqual("legacy", authentications[None].access_token)
+
+    def test_set_replaces_file_atomically(self):
+        store = FileTokenStore(self.path)
+        store.set("phone:user", _authentication("one", 30))
+
+        with patch("august.token_store.os.replace", side_effect=OSError):
+            with self.assertRaises(OSError):
+                store.set("phone:user", _authentication("two", 30))
+
+        self.assertEqual(["token.json"], os.listdir(self.directory))
+        reopened = FileTokenStore(self.path)
+        self.assertEqual("one", reopened.get("phone:user").access_token)
+
+        store.set("phone:user", _authentication("three", 30))
+        with open(self.path) as file:
+            data = json.load(file)
+        self.assertEqual("three", data["access_token"])
+        self.assertEqual("phone:user", data["account"])
+
+    def test_skips_unchanged_writes(self):
+        with open(self.path, "w") as file:
+            file.write(to_authentication_json(_authentication("one", 30)))
+        store = FileTokenStore(self.path)
+        authentication = store.get("phone:user")
+
+        with patch("august.token_store.tempfile.mkstemp") as mkstemp:
+            self.assertFalse(store.set("phone:user", authentication))
+        mkstemp.assert_not_called()
+
+    def test_unreadable_file(self):
+        with open(self.path, "w") as file:
+            file.write("{not json")
+
+        with self.assertLogs("august.token_store", level="ERROR"):
+            self.assertIsNone(FileTokenStore(self.path).get("phone:user"))
+        self.assertIsNone(FileTokenStore(self.path + ".missing").get("phone:user"))
+
+
+class TestTokenStoreAsync(aiounittest.AsyncTestCase):
+    async def test_async_file_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileTokenStore(os.path.join(directory, "token.json"))
+
+            self.assertIsNone(await store.async_get("phone:user"))
+            self.assertTrue(
+                await store.async_set("phone:user", _authentication("one", 30))
+            )
+            authentication = await store.async_get("phone:user")
+            self.assertEqual("one", authentication.access_token)
+            self.assertFalse(await store.async_set("phone:user", authentication))
+            await store.async_delete("phone:user")
+            self.assertEqual({}, await store.async_load_all())
+
+    async def test_async_memory_store(self):
+        store = MemoryTokenStore()
+        await store.async_set("phone:user", _authentication("one", 30))
+
+        self.assertEqual(["phone:user"], list(await store.async_load_all()))
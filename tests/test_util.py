@@ -13,6 +13,7 @@ from august.activity import (
 from august.lock import LockDetail, LockDoorStatus, LockStatus
 from august.doorbell import DoorbellDetail
 from august.util import (
+    update_details_from_activities,
     update_lock_detail_from_activity,
     as_utc_from_local,
     update_doorbell_image_from_activity,
@@ -72,6 +73,7 @@ class TestLockDetail(unittest.TestCase):
 
         self.assertTrue(update_lock_detail_from_activity(lock, lock_operation_activity))
         self.assertEqual(LockStatus.LOCKED, lock.lock_status)
+        self.assertEqual(1582007218000, lock.lock_status_epoch_ms)
         self.assertEqual(
             as_utc_from_local(datetime.datetime.fromtimestamp(1582007218000 / 1000)),
             lock.lock_status_datetime,
@@ -93,6 +95,7 @@ class TestLockDetail(unittest.TestCase):
 
         self.assertTrue(update_lock_detail_from_activity(lock, open_operation_activity))
         self.assertEqual(LockDoorStatus.OPEN, lock.door_state)
+        self.assertEqual(1582007219000, lock.door_state_epoch_ms)
         self.assertEqual(
             as_utc_from_local(datetime.datetime.fromtimestamp(1582007219000 / 1000)),
             lock.door_state_datetime,
@@ -126,6 +129,17 @@ class TestLockDetail(unittest.TestCase):
         self.assertEqual(LockDoorStatus.CLOSED, lock.door_state)
         self.assertEqual(LockStatus.UNLOCKED, lock.lock_status)
 
+    def test_update_lock_without_status_time(self):
+        lock = LockDetail(json.loads(load_fixture("get_lock.offline.json")))
+        lock_operation_activity = LockOperationActivity(
+            dict(json.loads(load_fixture("lock_activity.json")), deviceID="ABC")
+        )
+        self.assertIsNone(lock.lock_status_epoch_ms)
+
+        self.assertTrue(update_lock_detail_from_activity(lock, lock_operation_activity))
+        self.assertEqual(LockStatus.LOCKED, lock.lock_status)
+        self.assertEqual(1582007218000, lock.lock_status_epoch_ms)
+
 
 class TestDetail(unittest.TestCase):
     def test_update_doorbell_image_from_activity(self):
@@ -206,3 +220,65 @@ class TestDetail(unittest.TestCase):
             doorbell.image_created_at_datetime,
         )
         self.assertEqual("https://my.updated.image/image.jpg", doorbell.image_url)
+
+
+class TestUpdateDetailsFromActivities(unittest.TestCase):
+    def test_applies_newest_activity_per_device(self):
+        lock = LockDetail(
+            json.loads(load_fixture("get_lock.online_with_doorsense.json"))
+        )
+        doorbell = DoorbellDetail(json.loads(load_fixture("get_doorbell.json")))
+        activities = [
+            LockOperationActivity(json.loads(load_fixture(fixture)))
+            for fixture in ("unlock_activity.json", "lock_activity.json")
+        ] + [
+            DoorOperationActivity(json.loads(load_fixture(fixture)))
+            for fixture in (
+                "door_open_activity.json",
+                "door_closed_activity.json",
+                "door_closed_activity_wrong_deviceid.json",
+            )
+        ] + [
+            DoorbellMotionActivity(json.loads(load_fixture(fixture)))
+            for fixture in (
+                "doorbell_motion_activity_old.json",
+                "doorbell_motion_activity.json",
+                "doorbell_motion_activity_no_image.json",
+            )
+        ]
+
+        changed = update_details_from_activities(
+            activities, {lock.device_id: lock, doorbell.device_id: doorbell}
+        )
+
+        self.assertEqual({"ABC", "K98GiDT45GUL"}, changed)
+        self.assertEqual(LockStatus.LOCKED, lock.lock_status)
+        self.assertEqual(1582007218000, lock.lock_status_epoch_ms)
+        self.assertEqual(LockDoorStatus.OPEN, lock.door_state)
+        self.assertEqual(1582007219000, lock.door_state_epoch_ms)
+        self.assertEqual("https://my.updated.image/image.jpg", doorbell.image_url)
+
+        self.assertEqual(
+            set(),
+            update_details_from_activities(
+                activities, {lock.device_id: lock, doorbell.device_id: doorbell}
+            ),
+        )
+
+    def test_skips_mismatched_details(self):
+        lock = LockDetail(
+            json.loads(load_fixture("get_lock.online_with_doorsense.json"))
+        )
+        activities = [
+            DoorbellMotionActivity(
+                dict(
+                    json.loads(load_fixture("doorbell_motion_activity.json")),
+                    deviceID="ABC",
+                )
+            )
+        ]
+
+        self.assertEqual(
+            set(), update_details_from_activities(activities, {"ABC": lock})
+        )
+        self.assertEqual(set(), update_details_from_activities(activities, {}))